@@ -0,0 +1,304 @@
+"""
+Benchmark suite untuk indexing, kompresi postings, dan query, dari command
+line (menggantikan benchmark.ipynb), dengan hasil dalam format JSON.
+
+    python benchmark.py run [--output hasil.json] [--baseline baseline.json]
+    python benchmark.py compare baseline.json hasil.json [--threshold 0.1]
+
+run mengukur, untuk setiap postings encoding:
+    indexing   waktu setiap fase (parse, invert, merge, save) dan indexing
+               end-to-end, beserta ukuran index, dictionary, dan intermediate
+               index (bytes)
+    codecs     throughput encode/decode (juta postings per detik) dan bits per
+               posting, pada postings list sintetis dan postings list dari
+               collection
+    queries    persentil latency retrieve, retrieve_topk, dan retrieve_boolean
+               untuk query yang diambil dari kalimat-kalimat di collection
+
+compare membandingkan dua hasil run: metrik waktu dan ukuran (semakin kecil
+semakin baik) dan throughput (semakin besar semakin baik) yang memburuk lebih
+dari threshold (relatif) dilaporkan sebagai regresi, dan exit code 1 jika ada
+regresi, sehingga bisa dipakai di CI.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import re
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault('TQDM_DISABLE', '1')
+
+import numpy as np
+
+import compression
+from bsbi import BSBIIndex, BSBISearcher, Preprocessor
+from index import InvertedIndexReader
+
+DEFAULT_ENCODINGS = ['StandardPostings', 'VBEPostings', 'BICPostings']
+
+
+def timed(function, *args):
+    """Menjalankan function(*args), dan mengembalikan <hasil, durasi dalam detik>"""
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def summarize(durations):
+    """Ringkasan beberapa pengukuran durasi (detik)"""
+    return {"min_s": min(durations), "median_s": statistics.median(durations)}
+
+
+def percentiles_ms(durations):
+    """Persentil latency (ms, nearest-rank) dari durasi-durasi dalam detik"""
+    durations = sorted(durations)
+
+    def percentile(p):
+        return durations[max(0, -(-len(durations) * p // 100) - 1)] * 1000
+
+    return {"n": len(durations), "mean_ms": sum(durations) / len(durations) * 1000,
+            "p50_ms": percentile(50), "p95_ms": percentile(95), "p99_ms": percentile(99)}
+
+
+def file_size(path):
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+def bench_indexing(data_dir, postings_encoding, output_dir, repeat):
+    """
+    Mengukur setiap fase indexing (dengan memanggil langkah-langkah
+    BSBIIndex.index satu per satu) dan indexing end-to-end, repeat kali.
+    Index hasil indexing end-to-end terakhir tersimpan di output_dir.
+    """
+    phases = {"parse": [], "invert": [], "merge": [], "save": [], "total": []}
+    for _ in range(repeat):
+        shutil.rmtree(output_dir, ignore_errors=True)
+        os.makedirs(output_dir)
+        bsbi = BSBIIndex(data_dir, output_dir, postings_encoding)
+        block_dirs = sorted(next(os.walk(data_dir))[1])
+        parsed, duration = timed(lambda: [(block_dir, bsbi.parse_block(block_dir)) for block_dir in block_dirs])
+        phases["parse"].append(duration)
+        _, duration = timed(bsbi.write_blocks, parsed, bsbi.invert_write)
+        phases["invert"].append(duration)
+        _, duration = timed(bsbi.merge_runs, bsbi.intermediate_indices, bsbi.index_name)
+        phases["merge"].append(duration)
+        _, duration = timed(bsbi.save)
+        phases["save"].append(duration)
+
+        shutil.rmtree(output_dir)
+        os.makedirs(output_dir)
+        _, duration = timed(BSBIIndex(data_dir, output_dir, postings_encoding).index)
+        phases["total"].append(duration)
+
+    result = {phase: summarize(durations) for phase, durations in phases.items()}
+    intermediate_bytes = sum(file_size(os.path.join(output_dir, name)) for name in os.listdir(output_dir)
+                             if name.startswith('intermediate_') and name.endswith('.index'))
+    result["sizes"] = {"index_bytes": file_size(os.path.join(output_dir, 'main_index.index')),
+                       "dict_bytes": file_size(os.path.join(output_dir, 'main_index.dict')),
+                       "terms_idmap_bytes": file_size(os.path.join(output_dir, 'terms.idmap')),
+                       "docs_idmap_bytes": file_size(os.path.join(output_dir, 'docs.idmap')),
+                       "intermediate_bytes": intermediate_bytes}
+    return result
+
+
+def synthetic_postings(seed=0, n_lists=2000, universe=10 ** 6):
+    """Postings list sintetis dengan panjang log-uniform antara 1 dan 10^4"""
+    rng = np.random.default_rng(seed)
+    lengths = np.exp(rng.uniform(0, np.log(10 ** 4), n_lists)).astype(np.int64)
+    return [np.unique(rng.integers(0, universe, length)).tolist() for length in lengths]
+
+
+def collection_postings(index_dir, postings_encoding):
+    """Semua postings list dari main index di index_dir"""
+    with InvertedIndexReader('main_index', postings_encoding, directory=index_dir) as index:
+        return [entry[1] for entry in index.scan()]
+
+
+def bench_codec(postings_encoding, postings_lists, repeat):
+    """Throughput encode/decode postings_encoding untuk postings_lists"""
+    n = sum(map(len, postings_lists))
+    if postings_encoding == compression.BICPostings:
+        def decode(encoded_lists):
+            return [postings_encoding.decode(encoded, len(p)) for encoded, p in zip(encoded_lists, postings_lists)]
+    else:
+        def decode(encoded_lists):
+            return [postings_encoding.decode(encoded) for encoded in encoded_lists]
+
+    encode_durations, decode_durations = [], []
+    for _ in range(repeat):
+        encoded_lists, duration = timed(lambda: [postings_encoding.encode(p) for p in postings_lists])
+        encode_durations.append(duration)
+        decoded_lists, duration = timed(decode, encoded_lists)
+        decode_durations.append(duration)
+    assert decoded_lists == postings_lists, postings_encoding.__name__ + " decode salah"
+    return {"postings": n,
+            "bits_per_posting": 8 * sum(map(len, encoded_lists)) / n,
+            "encode_mpostings_per_s": n / min(encode_durations) / 1e6,
+            "decode_mpostings_per_s": n / min(decode_durations) / 1e6}
+
+
+def sample_queries(data_dir, n_queries, seed=0):
+    """
+    Query berupa 1-3 kata (huruf kecil, tanpa tanda baca) berurutan dari
+    dokumen acak di collection, yang setelah preprocessing tidak kosong.
+    """
+    rng = random.Random(seed)
+    paths = sorted(os.path.join(root, name) for root, _, names in os.walk(data_dir) for name in names)
+    queries = []
+    while len(queries) < n_queries:
+        with open(rng.choice(paths), encoding='utf-8', errors='ignore') as f:
+            words = re.findall(r'[a-z0-9]+', f.read().lower())
+        if len(words) == 0:
+            continue
+        length = rng.randint(1, 3)
+        start = rng.randrange(max(1, len(words) - length + 1))
+        query = " ".join(words[start:start + length])
+        if len(Preprocessor.preprocess(query)) > 0:
+            queries.append(query)
+    return queries
+
+
+def bench_queries(index_dir, postings_encoding, queries):
+    """Latency setiap mode query di index_dir, tanpa result cache"""
+    boolean_queries = [" OR ".join(query.split()) for query in queries]
+    with BSBISearcher(index_dir, postings_encoding) as searcher:
+        result = {}
+        for mode, run, mode_queries in [("retrieve", searcher.retrieve, queries),
+                                        ("topk", searcher.retrieve_topk, queries),
+                                        ("boolean_or", searcher.retrieve_boolean, boolean_queries)]:
+            durations = []
+            for query in mode_queries:
+                _, duration = timed(run, query)
+                durations.append(duration)
+            result[mode] = percentiles_ms(durations)
+    return result
+
+
+def run(args):
+    encodings = [getattr(compression, name) for name in args.encodings]
+    work_dir = tempfile.mkdtemp(prefix='benchmark_')
+    results = {"meta": {"timestamp": time.strftime('%Y-%m-%dT%H:%M:%S'), "python": platform.python_version(),
+                        "numpy": np.__version__, "platform": platform.platform(), "cpus": os.cpu_count(),
+                        "data_dir": args.data_dir, "repeat": args.repeat, "queries": args.queries},
+               "indexing": {}, "codecs": {"synthetic": {}, "collection": {}}, "queries": {}}
+    try:
+        # pemanasan: stem cache (lihat Preprocessor) sudah terisi sebelum
+        # pengukuran pertama, sehingga fase parse semua encoding sebanding
+        warm_up = BSBIIndex(args.data_dir, work_dir, encodings[0])
+        for block_dir in sorted(next(os.walk(args.data_dir))[1]):
+            warm_up.parse_block(block_dir)
+        queries = sample_queries(args.data_dir, args.queries)
+        synthetic = synthetic_postings()
+        collection = None
+        for postings_encoding in encodings:
+            name = postings_encoding.__name__
+            index_dir = os.path.join(work_dir, name)
+            print("indexing", name, file=sys.stderr)
+            results["indexing"][name] = bench_indexing(args.data_dir, postings_encoding, index_dir, args.repeat)
+            if collection is None:
+                collection = collection_postings(index_dir, postings_encoding)
+            print("codecs", name, file=sys.stderr)
+            results["codecs"]["synthetic"][name] = bench_codec(postings_encoding, synthetic, args.repeat)
+            results["codecs"]["collection"][name] = bench_codec(postings_encoding, collection, args.repeat)
+            print("queries", name, file=sys.stderr)
+            results["queries"][name] = bench_queries(index_dir, postings_encoding, queries)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    output = json.dumps(results, indent=2)
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            return report_regressions(compare(json.load(f), results, args.threshold))
+    return 0
+
+
+def flatten(results, prefix=''):
+    """Metrik-metrik numerik dari hasil run, dengan key berupa path bertitik"""
+    metrics = {}
+    for key, value in results.items():
+        if key == 'meta':
+            continue
+        if isinstance(value, dict):
+            metrics.update(flatten(value, prefix + key + '.'))
+        elif isinstance(value, (int, float)):
+            metrics[prefix + key] = value
+    return metrics
+
+
+def higher_is_better(metric):
+    """True untuk metrik throughput, False untuk waktu/ukuran, None jika bukan metrik performa"""
+    if metric.endswith('_per_s'):
+        return True
+    if metric.endswith(('_s', '_ms', '_bytes', 'bits_per_posting')):
+        return False
+    return None
+
+
+def compare(baseline, results, threshold):
+    """
+    Membandingkan metrik-metrik results dengan baseline.
+
+    Returns
+    -------
+    List[Tuple[str, float, float, float]]
+        <metrik, nilai baseline, nilai sekarang, perubahan relatif> untuk
+        setiap metrik yang memburuk lebih dari threshold
+    """
+    baseline, results = flatten(baseline), flatten(results)
+    regressions = []
+    for metric in sorted(baseline.keys() & results.keys()):
+        direction = higher_is_better(metric)
+        old, new = baseline[metric], results[metric]
+        if direction is None or old == 0:
+            continue
+        change = (new - old) / old
+        if (-change if direction else change) > threshold:
+            regressions.append((metric, old, new, change))
+    return regressions
+
+
+def report_regressions(regressions):
+    for metric, old, new, change in regressions:
+        print("REGRESI {}: {:.6g} -> {:.6g} ({:+.1%})".format(metric, old, new, change))
+    if len(regressions) == 0:
+        print("tidak ada regresi")
+    return 1 if len(regressions) > 0 else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark indexing, kompresi, dan query")
+    commands = parser.add_subparsers(dest='command', required=True)
+    run_parser = commands.add_parser('run', help="menjalankan benchmark")
+    run_parser.add_argument('--data-dir', default='collection')
+    run_parser.add_argument('--encodings', nargs='+', default=DEFAULT_ENCODINGS,
+                            help="nama class postings encoding di compression.py")
+    run_parser.add_argument('--repeat', type=int, default=3, help="banyaknya pengulangan setiap pengukuran")
+    run_parser.add_argument('--queries', type=int, default=500, help="banyaknya query")
+    run_parser.add_argument('--output', help="file JSON hasil (default stdout)")
+    run_parser.add_argument('--baseline', help="hasil run sebelumnya untuk dibandingkan")
+    run_parser.add_argument('--threshold', type=float, default=0.1, help="batas regresi relatif")
+    compare_parser = commands.add_parser('compare', help="membandingkan dua hasil run")
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('results')
+    compare_parser.add_argument('--threshold', type=float, default=0.1, help="batas regresi relatif")
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        return run(args)
+    with open(args.baseline) as f, open(args.results) as g:
+        return report_regressions(compare(json.load(f), json.load(g), args.threshold))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,31 +1,48 @@
+import math
 import os
 import pickle
 import contextlib
 import heapq
+import threading
 import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-from itertools import groupby
+from itertools import groupby, repeat
 from operator import itemgetter
-from functools import reduce
 
-from index import InvertedIndexReader, InvertedIndexWriter
-from util import IdMap, sorted_intersect
-from compression import StandardPostings, VBEPostings
+from index import InvertedIndexReader, InvertedIndexWriter, PostingsCache, SegmentedIndexReader
+from util import (FrozenIdMap, IdMap, PostingsListCursor, ResultCache, StemCache, TombstoneBitmap, cursor_intersect,
+                  maxscore_topk, multi_intersect, timer)
+from compression import PositionsList, StandardPostings, VBEPostings
+from query import iterate, parse_query, plan_query
 from Sastrawi.Stemmer.StemmerFactory import StemmerFactory
 from Sastrawi.StopWordRemover.StopWordRemoverFactory import StopWordRemoverFactory
 from tqdm import tqdm
+import numpy as np
 
 from Sastrawi.Stemmer.StemmerFactory import StemmerFactory
+from Sastrawi.Stemmer.Filter import TextNormalizer
 import spacy
 
 
 class Preprocessor:
-    stemmer = StemmerFactory().create_stemmer()
+    # Stemmer Sastrawi tanpa cache bawaannya (yang tidak dibatasi ukurannya);
+    # hasil stemming per kata di-cache oleh stem_cache, dipakai bersama oleh
+    # parse_block (indexing) dan retrieve (query)
+    stemmer = StemmerFactory().create_stemmer().delegatedStemmer
+    stem_cache = StemCache(stemmer.stem_word)
     tokenizer = spacy.blank("id")
 
+    @staticmethod
+    def stem(s):
+        """Sama dengan Sastrawi stemmer.stem(s), namun dengan stem cache per kata"""
+        words = TextNormalizer.normalize_text(s).split(' ')
+        return ' '.join(map(Preprocessor.stem_cache, words))
+
     @staticmethod
     def preprocess(s):
-        return [t.text for t in Preprocessor.tokenizer(Preprocessor.stemmer.stem(s)) if not t.is_stop]
+        return [t.text for t in Preprocessor.tokenizer(Preprocessor.stem(s)) if not t.is_stop]
 
 
 class BSBIIndex:
@@ -35,39 +52,92 @@ class BSBIIndex:
     term_id_map(IdMap): Untuk mapping terms ke termIDs
     doc_id_map(IdMap): Untuk mapping relative paths dari dokumen (misal,
                     /collection/0/gamma.txt) to docIDs
+    doc_length(np.ndarray): Panjang (banyaknya token setelah preprocessing)
+                    dari setiap dokumen, di-index oleh docID
     data_dir(str): Path ke data
     output_dir(str): Path ke output index files
     postings_encoding: Lihat di compression.py, kandidatnya adalah StandardPostings,
                     VBEPostings, dsb.
     index_name(str): Nama dari file yang berisi inverted index
+    stem_cache_path(str): Path ke file persistent stem cache (opsional). Jika
+                    diberikan, Preprocessor.stem_cache dimuat dari file ini
+                    sebelum indexing/query dan disimpan kembali setelah indexing.
+    positional(bool): Jika True, posisi setiap term di setiap dokumen juga
+                    disimpan (di positions file, lihat InvertedIndex), sehingga
+                    index mendukung phrase query (lihat query.py)
+    merge_factor(int): Banyaknya segment bersebelahan dengan tier yang sama
+                    yang digabung menjadi satu segment (lihat update dan
+                    select_merge)
+    merge_fan_in(int): Banyaknya index maksimum yang di-merge sekaligus; jika
+                    intermediate index lebih banyak, merge dilakukan dalam
+                    beberapa pass (lihat merge_runs)
+    merge_buffer_size(int): Ukuran buffer read-ahead setiap index yang
+                    di-merge dan buffer write-behind index hasil merge (bytes)
+    stats(util.Stats): Jika diberikan, durasi fase-fase indexing (parse,
+                    invert, merge, save), banyaknya dokumen dan token, serta
+                    statistik I/O reader/writer index dicatat di sini (dan
+                    dipakai juga oleh searcher)
     """
 
-    def __init__(self, data_dir, output_dir, postings_encoding, index_name="main_index"):
+    def __init__(self, data_dir, output_dir, postings_encoding, index_name="main_index",
+                 stem_cache_path=None, positional=False, merge_factor=4, merge_fan_in=64,
+                 merge_buffer_size=1 << 20, stats=None):
+        if merge_fan_in < 2:
+            raise ValueError("merge_fan_in minimal 2")
         self.term_id_map = IdMap()
         self.doc_id_map = IdMap()
+        self.doc_length = np.zeros(0, dtype=np.uint32)
         self.data_dir = data_dir
         self.output_dir = output_dir
         self.index_name = index_name
         self.postings_encoding = postings_encoding
+        self.stem_cache_path = stem_cache_path
+        self.positional = positional
+        self.merge_factor = merge_factor
+        self.merge_fan_in = merge_fan_in
+        self.merge_buffer_size = merge_buffer_size
+        self.stats = stats
 
         # Untuk menyimpan nama-nama file dari semua intermediate inverted index
         self.intermediate_indices = []
 
+        # Melindungi manifest dari update dan background merge yang berjalan
+        # bersamaan (lihat update dan merge_segments)
+        self.manifest_lock = threading.Lock()
+        self.merge_thread = None
+
     def save(self):
-        """Menyimpan doc_id_map and term_id_map ke output directory via pickle"""
+        """
+        Menyimpan doc_id_map and term_id_map ke output directory via pickle
+        (untuk dimuat kembali saat indexing), dan juga dalam format FrozenIdMap
+        (terms.idmap dan docs.idmap, untuk BSBISearcher). doc_length disimpan
+        sebagai array uint32 di docs.length. File-file yang dibaca searcher
+        diganti dengan os.replace, sehingga searcher yang sedang berjalan
+        tidak pernah melihat file yang setengah ditulis.
+        """
 
         with open(os.path.join(self.output_dir, 'terms.dict'), 'wb') as f:
             pickle.dump(self.term_id_map, f)
         with open(os.path.join(self.output_dir, 'docs.dict'), 'wb') as f:
             pickle.dump(self.doc_id_map, f)
+        FrozenIdMap.write(self.term_id_map, os.path.join(self.output_dir, 'terms.idmap'))
+        FrozenIdMap.write(self.doc_id_map, os.path.join(self.output_dir, 'docs.idmap'))
+        doc_length_path = os.path.join(self.output_dir, 'docs.length')
+        self.doc_length.astype(np.uint32).tofile(doc_length_path + '.tmp')
+        os.replace(doc_length_path + '.tmp', doc_length_path)
+        if self.stem_cache_path is not None:
+            Preprocessor.stem_cache.save(self.stem_cache_path)
 
     def load(self):
-        """Memuat doc_id_map and term_id_map dari output directory"""
+        """Memuat doc_id_map, term_id_map, dan doc_length dari output directory"""
 
         with open(os.path.join(self.output_dir, 'terms.dict'), 'rb') as f:
             self.term_id_map = pickle.load(f)
         with open(os.path.join(self.output_dir, 'docs.dict'), 'rb') as f:
             self.doc_id_map = pickle.load(f)
+        self.doc_length = np.fromfile(os.path.join(self.output_dir, 'docs.length'), dtype=np.uint32)
+        if self.stem_cache_path is not None:
+            Preprocessor.stem_cache.load(self.stem_cache_path)
 
     def parse_block(self, block_dir_relative):
         """
@@ -105,17 +175,82 @@ class BSBIIndex:
         parse_block(...).
         """
         pairs = []
+        for doc_id, term_ids in self.parse_documents(block_dir_relative):
+            pairs.extend([(term_id, doc_id) for term_id in term_ids])
+
+        return pairs
+
+    def parse_documents(self, block_dir_relative):
+        """
+        Generator yang melakukan parsing dokumen satu per satu di sebuah block.
+        Dokumen yang tidak menghasilkan token sama sekali dilewati (dan tidak
+        mendapatkan docID), sama seperti pada parse_block.
+
+        Parameters
+        ----------
+        block_dir_relative : str
+            Relative Path ke directory yang mengandung text files untuk sebuah block.
 
+        Yields
+        ------
+        Tuple[Int, List[Int]]
+            Pasangan <docID, list of termIDs> untuk setiap dokumen, termIDs
+            sesuai urutan kemunculan token di dokumen
+        """
         blocks_path = Path(".") / self.data_dir / block_dir_relative
         block_fns = blocks_path.glob("*.txt")
         for fn in block_fns:
             with open(fn, "r") as f:
                 text = f.read()
                 tokens = Preprocessor.preprocess(text)
-                pairs.extend([(self.term_id_map[t], self.doc_id_map[fn.name])
-                             for t in tokens])
+            if len(tokens) == 0:
+                continue
+            term_ids = [self.term_id_map[t] for t in tokens]
+            yield self.doc_id_map[fn.name], term_ids
 
-        return pairs
+    def stream_runs(self, block_dirs, memory_budget):
+        """
+        Generator yang mengumpulkan <termID, docID> pairs dari semua block ke
+        dalam dua buffer array('I') (4 byte per termID dan per docID), lalu
+        menghasilkan buffer tersebut sebagai sebuah "run" setiap kali ukurannya
+        mencapai memory_budget, tanpa memperhatikan batas sub-directory.
+
+        Buffer hanya di-flush di batas dokumen, sehingga setiap docID hanya
+        muncul di satu run dan rentang docID antar run tidak saling beririsan.
+
+        Parameters
+        ----------
+        block_dirs: List[str]
+            Relative path dari block-block yang akan di-parsing, terurut
+        memory_budget: int
+            Ukuran maksimum (dalam bytes) buffer pairs sebelum di-flush
+
+        Yields
+        ------
+        Tuple[str, Tuple[array, array]]
+            Pasangan <nama run, (termIDs, docIDs)>
+        """
+        run_id = 0
+        term_ids, doc_ids = array('I'), array('I')
+        for block_dir_relative in block_dirs:
+            for doc_id, doc_term_ids in self.parse_documents(block_dir_relative):
+                term_ids.extend(doc_term_ids)
+                doc_ids.extend(repeat(doc_id, len(doc_term_ids)))
+                if (term_ids.itemsize + doc_ids.itemsize) * len(term_ids) >= memory_budget:
+                    yield 'run' + str(run_id), (term_ids, doc_ids)
+                    run_id += 1
+                    term_ids, doc_ids = array('I'), array('I')
+        if len(term_ids) > 0:
+            yield 'run' + str(run_id), (term_ids, doc_ids)
+
+    def invert_write_run(self, run, index):
+        """
+        Sama seperti invert_write, untuk run hasil stream_runs (pasangan
+        array termIDs dan array docIDs).
+        """
+        term_ids, doc_ids = run
+        self.invert_write_arrays(np.frombuffer(term_ids, dtype=np.uint32),
+                                 np.frombuffer(doc_ids, dtype=np.uint32), index)
 
     def invert_write(self, td_pairs, index):
         """
@@ -135,36 +270,115 @@ class BSBIIndex:
         index: InvertedIndexWriter
             Inverted index pada disk (file) yang terkait dengan suatu "block"
         """
-        term_dict = {}
-        for term_id, doc_id in td_pairs:
-            if term_id not in term_dict:
-                term_dict[term_id] = set()
-            term_dict[term_id].add(doc_id)
-        for term_id in sorted(term_dict.keys()):
-            index.append(term_id, sorted(list(term_dict[term_id])))
+        pairs = np.array(td_pairs, dtype=np.uint32).reshape(-1, 2)
+        self.invert_write_arrays(pairs[:, 0], pairs[:, 1], index)
+
+    def invert_write_arrays(self, term_ids, doc_ids, index, positions=None):
+        """
+        Versi vectorized dari invert_write: td_pairs diberikan sebagai dua
+        array NumPy yang sejajar (termIDs dan docIDs). Inversion dilakukan
+        oleh invert_arrays, lalu seluruh postings ditulis sekaligus dengan
+        InvertedIndexWriter.append_block. Panjang dokumen-dokumen di block
+        (banyaknya pair per docID) ditambahkan ke self.doc_length.
+
+        Untuk index positional, posisi setiap pair dihitung dari urutannya di
+        dalam dokumen (pairs dari satu dokumen harus bersebelahan dan sesuai
+        urutan token), kecuali jika positions diberikan.
+
+        Parameters
+        ----------
+        term_ids: np.ndarray
+            termID dari setiap pair
+        doc_ids: np.ndarray
+            docID dari setiap pair
+        index: InvertedIndexWriter
+            Inverted index pada disk (file) yang terkait dengan suatu "block"
+        positions: np.ndarray
+            posisi token dari setiap pair di dokumennya (opsional)
+        """
+        if index.positional and positions is None:
+            positions = token_positions(doc_ids)
+        if self.stats is not None:
+            self.stats.add('tokens', len(term_ids))
+        self.add_doc_length(np.bincount(doc_ids))
+        index.append_block(*invert_arrays(term_ids, doc_ids, positions if index.positional else None))
+
+    def add_doc_length(self, counts):
+        """Menambahkan counts (banyaknya token setiap docID, di-index oleh docID) ke self.doc_length"""
+        if len(counts) > len(self.doc_length):
+            self.doc_length = np.concatenate(
+                (self.doc_length, np.zeros(len(counts) - len(self.doc_length), dtype=np.uint32)))
+        self.doc_length[:len(counts)] += counts.astype(np.uint32)
 
-    def merge(self, indices, merged_index):
+    def merge(self, indices, merged_index, deleted=None):
         """
         Lakukan merging ke semua intermediate inverted indices menjadi
         sebuah single index.
 
         Ini adalah bagian yang melakukan EXTERNAL MERGE SORT
 
+        Index-index yang di-merge (block atau segment) umumnya mencakup
+        rentang docID yang terpisah dan terurut, sehingga postings list
+        sebuah term dari index-index tersebut cukup disambung. Jika
+        postings_encoding mendukungnya (concatenate, misalnya VBEPostings dan
+        StandardPostings) dan tidak ada dokumen yang dihapus, encoded
+        postings list disambung tanpa decoding; merge biasa (decode,
+        heapq.merge, encode ulang) hanya dilakukan untuk term yang rentang
+        docID-nya bertumpuk.
+
         Parameters
         ----------
         indices: List[InvertedIndexReader]
             A list of intermediate InvertedIndexReader objects, masing-masing
             merepresentasikan sebuah intermediate inveted index yang iterable
-            di sebuah block.
+            di sebuah block. Setiap index dibaca secara sekuensial dengan
+            InvertedIndexReader.scan (buffer read-ahead merge_buffer_size).
 
         merged_index: InvertedIndexWriter
             Instance InvertedIndexWriter object yang merupakan hasil merging dari
             semua intermediate InvertedIndexWriter objects
+
+        deleted: TombstoneBitmap
+            Jika diberikan, postings dari docID yang sudah dihapus dibuang
+            (term yang semua postings-nya terhapus tidak ditulis)
         """
-        merged_heap = heapq.merge(*indices)
+        concatenate = not deleted and hasattr(self.postings_encoding, 'concatenate')
+        merged_heap = heapq.merge(*[index.scan(self.merge_buffer_size, encoded=concatenate) for index in indices],
+                                  key=itemgetter(0))
+        # semua index memakai postings_encoding yang sama
+        decoder = indices[0] if len(indices) > 0 else None
         for t, ps in groupby(merged_heap, key=itemgetter(0)):
-            postings = map(itemgetter(1), ps)
-            merged_index.append(t, list(heapq.merge(*postings)))
+            if not concatenate:
+                entries = ps
+            else:
+                # setiap entry adalah (term, df, max_tf, last_doc, encoded postings
+                # list, encoded TF list, encoded positions), terurut sesuai index
+                _, dfs, max_tfs, last_docs, encoded_postings_lists, encoded_tf_lists, encoded_positions = \
+                    zip(*ps)
+                encoded_postings_list = self.postings_encoding.concatenate(encoded_postings_lists, last_docs)
+                if encoded_postings_list is not None:
+                    merged_index.append_encoded(t, sum(dfs), encoded_postings_list,
+                                                self.postings_encoding.concatenate_tf(encoded_tf_lists),
+                                                max(max_tfs), last_docs[-1], b"".join(encoded_positions))
+                    continue
+                entries = []
+                for df, encoded_postings_list, encoded_tf_list, encoded in zip(
+                        dfs, encoded_postings_lists, encoded_tf_lists, encoded_positions):
+                    tf_list = decoder.decode_tf(encoded_tf_list, df)
+                    entry = (t, decoder.decode(encoded_postings_list, df), tf_list)
+                    if decoder.positional:
+                        positions_list = PositionsList(encoded, tf_list)
+                        entry += ([positions_list[i] for i in range(df)],)
+                    entries.append(entry)
+
+            # setiap entry adalah (term, postings_list, tf_list[, positions_lists]);
+            # postings dari beberapa index di-merge bersama kolom-kolom lainnya
+            merged = heapq.merge(*[zip(*entry[1:]) for entry in entries])
+            if deleted:
+                merged = [posting for posting in merged if posting[0] not in deleted]
+                if len(merged) == 0:
+                    continue
+            merged_index.append(t, *map(list, zip(*merged)))
 
     def retrieve(self, query):
         """
@@ -189,27 +403,90 @@ class BSBIIndex:
 
         JANGAN LEMPAR ERROR/EXCEPTION untuk terms yang TIDAK ADA di collection.
         """
-        if len(self.term_id_map) == 0 or len(self.doc_id_map) == 0:
-            self.load()
+        with self.searcher() as searcher:
+            return searcher.retrieve(query)
 
-        terms = Preprocessor.preprocess(query)
+    def retrieve_many(self, queries, workers=1):
+        """
+        Versi batch dari retrieve, lihat BSBISearcher.retrieve_many
 
-        terms = [self.term_id_map[word] for word in terms]
+        Result
+        ------
+        List[List[str]]
+            Hasil retrieve untuk setiap query, sesuai urutan queries
+        """
+        with self.searcher() as searcher:
+            return searcher.retrieve_many(queries, workers)
 
-        with InvertedIndexReader(self.index_name, self.postings_encoding, directory=self.output_dir) as merged_index:
-            if any([t not in merged_index.postings_dict for t in terms]):
-                # at least one of the term not recognized
-                return []
+    def retrieve_boolean(self, query):
+        """
+        Boolean retrieval dengan query AND/OR/NOT dan tanda kurung, lihat
+        BSBISearcher.retrieve_boolean
 
-            # sort term and associated posting lists based on their length
-            sorted_terms = sorted(
-                terms, key=lambda t: merged_index.postings_dict[t][1])
-            results = reduce(sorted_intersect, map(
-                merged_index.get_postings_list, sorted_terms))
+        Result
+        ------
+        List[str]
+            Daftar dokumen terurut yang memenuhi query
+        """
+        with self.searcher() as searcher:
+            return searcher.retrieve_boolean(query)
+
+    def retrieve_topk(self, query, k=10):
+        """
+        Ranked retrieval dengan BM25, lihat BSBISearcher.retrieve_topk
 
-            return [self.doc_id_map[r] for r in results]
+        Result
+        ------
+        List[Tuple[float, str]]
+            k pasangan <skor, nama dokumen> dengan skor terbesar, terurut
+        """
+        with self.searcher() as searcher:
+            return searcher.retrieve_topk(query, k)
 
-    def index(self):
+    def delete(self, doc_names):
+        """
+        Menghapus dokumen-dokumen dari index. Dokumen hanya ditandai di
+        tombstone bitmap (<index_name>.deleted, lihat util.TombstoneBitmap)
+        dengan biaya O(1) per dokumen, lalu generation dinaikkan sehingga
+        BSBISearcher berhenti mengembalikan dokumen tersebut. Postings-nya
+        baru benar-benar dibuang ketika segment yang memuatnya ditulis ulang
+        oleh merge (lihat merge_segments dan compact).
+
+        docID tidak pernah dipakai ulang, sehingga bit tombstone tetap valid
+        sampai index dibangun ulang dengan index (yang mengosongkan bitmap;
+        dokumen yang file-nya masih ada di collection akan ter-index lagi).
+
+        Parameters
+        ----------
+        doc_names: Iterable[str]
+            Nama dokumen (path, seperti hasil retrieve); nama yang tidak ada
+            di index diabaikan
+
+        Returns
+        -------
+        int
+            Banyaknya dokumen yang baru dihapus
+        """
+        doc_id_map = load_id_map(self.output_dir, 'docs')
+        doc_ids = [doc_id for doc_id in (doc_id_map.get(name) for name in doc_names) if doc_id is not None]
+        with self.manifest_lock:
+            deleted = TombstoneBitmap.mark(tombstone_path(self.output_dir, self.index_name), doc_ids)
+            if deleted > 0:
+                write_generation(self.output_dir, self.index_name)
+        return deleted
+
+    def searcher(self, cache_bytes=None, result_cache_size=None, result_cache_ttl=None):
+        """
+        Membuka BSBISearcher untuk index ini. Untuk banyak query, gunakan satu
+        searcher yang sama (lihat search.py) alih-alih memanggil retrieve
+        berkali-kali.
+        """
+        return BSBISearcher(self.output_dir, self.postings_encoding, index_name=self.index_name,
+                            stem_cache_path=self.stem_cache_path, cache_bytes=cache_bytes,
+                            result_cache_size=result_cache_size, result_cache_ttl=result_cache_ttl,
+                            stats=self.stats)
+
+    def index(self, workers=1, memory_budget=None, block_dirs=None):
         """
         Base indexing code
         BAGIAN UTAMA untuk melakukan Indexing dengan skema BSBI (blocked-sort
@@ -218,23 +495,1006 @@ class BSBIIndex:
         Method ini scan terhadap semua data di collection, memanggil parse_block
         untuk parsing dokumen dan memanggil invert_write yang melakukan inversion
         di setiap block dan menyimpannya ke index yang baru.
+
+        Parameters
+        ----------
+        workers: int
+            Banyaknya process yang melakukan parsing dan inversion block secara
+            paralel. workers=1 (default) berarti indexing serial seperti biasa;
+            None berarti sebanyak jumlah CPU. Hasil akhir (term_id_map,
+            doc_id_map, dan main_index) identik dengan indexing serial.
+        memory_budget: int
+            Jika diberikan, indexing dilakukan secara streaming: intermediate
+            index ditulis setiap kali buffer <termID, docID> pairs mencapai
+            memory_budget bytes (lihat stream_runs), bukan per sub-directory.
+            Hanya untuk indexing serial.
+        block_dirs: List[str]
+            Sub-directory collection yang di-index (misalnya satu shard, lihat
+            shard.py); default semua sub-directory di data_dir
+
+        Index yang dihasilkan terdiri dari satu segment (main index);
+        segment-segment dari update sebelumnya dihapus. term_id_map,
+        doc_id_map, dan doc_length dibangun ulang dari awal, sehingga
+        memanggil index berkali-kali pada instance yang sama menghasilkan index
+        yang sama dengan instance baru.
+
+        Returns
+        -------
+        int
+            Generation dari index yang baru dibuat (lihat BSBISearcher)
+        """
+        if memory_budget is not None and workers != 1:
+            raise ValueError("memory_budget hanya didukung untuk indexing serial (workers=1)")
+
+        if self.stem_cache_path is not None:
+            Preprocessor.stem_cache.load(self.stem_cache_path)
+
+        self.wait_for_merges()
+        self.term_id_map = IdMap()
+        self.doc_id_map = IdMap()
+        self.doc_length = np.zeros(0, dtype=np.uint32)
+        if block_dirs is None:
+            block_dirs = next(os.walk(self.data_dir))[1]
+        block_dirs = sorted(block_dirs)
+        self.write_segment(self.index_name, block_dirs, workers, memory_budget)
+        with self.manifest_lock, timer(self.stats, 'save'):
+            self.save()
+            old_manifest = read_manifest(self.output_dir, self.index_name)
+            write_manifest(self.output_dir, self.index_name,
+                           {'segments': [self.index_name], 'blocks': block_dirs,
+                            'next_segment': old_manifest['next_segment'] if old_manifest else 0})
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(tombstone_path(self.output_dir, self.index_name))
+            generation = write_generation(self.output_dir, self.index_name)
+        if old_manifest is not None:
+            for segment in old_manifest['segments']:
+                if segment != self.index_name:
+                    remove_segment(self.output_dir, segment)
+        return generation
+
+    def update(self, workers=1, memory_budget=None, background_merge=True):
+        """
+        Incremental indexing: sub-directory (block) di collection yang belum
+        pernah di-index menjadi sebuah segment baru, tanpa parsing ulang
+        dokumen-dokumen lama. Segment baru langsung bisa di-query setelah
+        method ini selesai (generation bertambah; BSBISearcher memuat ulang
+        index secara otomatis), dan query dijalankan di semua segment (lihat
+        index.SegmentedIndexReader).
+
+        Setelah segment baru ditambahkan, segment-segment kecil digabung
+        dengan merge policy bertingkat (lihat select_merge), sehingga banyaknya
+        segment tetap logaritmik dan setiap dokumen hanya di-merge ulang
+        O(log) kali. Jika background_merge, merge dijalankan di background
+        thread (lihat wait_for_merges).
+
+        Hanya satu proses/instance BSBIIndex yang boleh memanggil update untuk
+        sebuah output_dir pada satu waktu.
+
+        Parameters
+        ----------
+        workers, memory_budget:
+            Lihat index
+        background_merge: bool
+            Jika False, merge dijalankan (sampai selesai) sebelum method ini
+            selesai
+
+        Returns
+        -------
+        int
+            Generation dari index setelah segment baru ditambahkan
+        """
+        manifest = read_manifest(self.output_dir, self.index_name)
+        if manifest is None:
+            return self.index(workers=workers, memory_budget=memory_budget)
+
+        self.load()
+        block_dirs = [block_dir for block_dir in sorted(next(os.walk(self.data_dir))[1])
+                      if block_dir not in manifest['blocks']]
+        if len(block_dirs) == 0:
+            return read_generation(self.output_dir, self.index_name)
+
+        with self.manifest_lock:
+            manifest = read_manifest(self.output_dir, self.index_name)
+            segment = self.next_segment_name(manifest)
+        self.write_segment(segment, block_dirs, workers, memory_budget)
+        with self.manifest_lock, timer(self.stats, 'save'):
+            self.save()
+            manifest = read_manifest(self.output_dir, self.index_name)
+            manifest['segments'].append(segment)
+            manifest['blocks'].extend(block_dirs)
+            write_manifest(self.output_dir, self.index_name, manifest)
+            generation = write_generation(self.output_dir, self.index_name)
+
+        if self.merge_thread is None or not self.merge_thread.is_alive():
+            if background_merge:
+                self.merge_thread = threading.Thread(target=self.merge_segments)
+                self.merge_thread.start()
+            else:
+                self.merge_segments()
+        return generation
+
+    def next_segment_name(self, manifest):
+        """Nama segment baru yang unik; harus dipanggil dengan manifest_lock"""
+        name = self.index_name + '_segment' + str(manifest['next_segment'])
+        manifest['next_segment'] += 1
+        write_manifest(self.output_dir, self.index_name, manifest)
+        return name
+
+    def merge_segments(self):
+        """
+        Menjalankan merge policy (select_merge) berulang kali sampai tidak ada
+        lagi segment yang perlu digabung (lihat merge_selected).
+        """
+        def select(manifest):
+            sizes = [os.path.getsize(os.path.join(self.output_dir, segment + '.index'))
+                     for segment in manifest['segments']]
+            return select_merge(sizes, self.merge_factor)
+
+        while self.merge_selected(select):
+            pass
+
+    def compact(self):
+        """
+        Menggabungkan semua segment menjadi satu segment, sekaligus membuang
+        postings dari semua dokumen yang sudah dihapus (lihat delete).
+
+        Returns
+        -------
+        int
+            Generation dari index setelah compaction
         """
-        # loop untuk setiap sub-directory di dalam folder collection (setiap block)
-        for block_dir_relative in tqdm(sorted(next(os.walk(self.data_dir))[1])):
-            td_pairs = self.parse_block(block_dir_relative)
+        self.wait_for_merges()
+        self.merge_selected(lambda manifest: slice(0, len(manifest['segments'])))
+        return read_generation(self.output_dir, self.index_name)
+
+    def merge_selected(self, select):
+        """
+        Menggabungkan segment-segment manifest['segments'][select(manifest)]
+        menjadi satu segment. Postings dari dokumen yang sudah dihapus dibuang
+        saat merge. Segment hasil merge menggantikan segment-segment yang
+        digabung di manifest sekaligus (satu generation baru), lalu file
+        segment-segment lama dihapus.
+
+        Returns
+        -------
+        bool
+            False jika tidak ada segment yang dipilih (atau belum ada index)
+        """
+        with self.manifest_lock:
+            manifest = read_manifest(self.output_dir, self.index_name)
+            selected = select(manifest) if manifest is not None else None
+            if selected is None:
+                return False
+            segments = manifest['segments'][selected]
+            merged_segment = self.next_segment_name(manifest)
+            deleted = TombstoneBitmap.load(tombstone_path(self.output_dir, self.index_name))
+
+        self.merge_runs(segments, merged_segment, deleted)
+
+        with self.manifest_lock:
+            # segment baru dari update hanya ditambahkan di akhir, sehingga
+            # posisi segment-segment yang digabung tidak berubah
+            manifest = read_manifest(self.output_dir, self.index_name)
+            manifest['segments'][selected] = [merged_segment]
+            write_manifest(self.output_dir, self.index_name, manifest)
+            write_generation(self.output_dir, self.index_name)
+        for segment in segments:
+            remove_segment(self.output_dir, segment)
+        return True
+
+    def wait_for_merges(self):
+        """Menunggu background merge (jika ada) selesai"""
+        if self.merge_thread is not None:
+            self.merge_thread.join()
+            self.merge_thread = None
+
+    def write_segment(self, segment, block_dirs, workers, memory_budget):
+        """
+        Parsing dan inversion block-block di block_dirs ke intermediate
+        index, lalu merge semuanya menjadi satu index (segment) bernama
+        segment. Lihat index.
+        """
+        self.intermediate_indices = []
+        n_docs = len(self.doc_id_map)
+        if memory_budget is not None:
+            self.write_blocks(tqdm(self.stream_runs(block_dirs, memory_budget)),
+                              invert_write=self.invert_write_run)
+        elif workers == 1:
+            blocks = ((block_dir_relative, self.parse_block(block_dir_relative))
+                      for block_dir_relative in block_dirs)
+            self.write_blocks(tqdm(blocks, total=len(block_dirs)),
+                              invert_write=self.invert_write)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                parsed_blocks = executor.map(
+                    _parse_invert_block, [(self.data_dir, b, self.positional) for b in block_dirs])
+                self.write_blocks(tqdm(zip(block_dirs, parsed_blocks), total=len(block_dirs)),
+                                  invert_write=self.reconcile_write)
+
+        if self.stats is not None:
+            self.stats.add('documents', len(self.doc_id_map) - n_docs)
+        self.merge_runs(self.intermediate_indices, segment)
+
+    def merge_runs(self, runs, output, deleted=None):
+        """
+        Merge index-index bernama runs (terurut sesuai rentang docID-nya)
+        menjadi satu index bernama output. Jika runs lebih banyak dari
+        merge_fan_in, merge dilakukan dalam beberapa pass: setiap pass
+        menggabungkan paling banyak merge_fan_in runs bersebelahan menjadi
+        satu run baru, sehingga banyaknya file yang terbuka bersamaan
+        terbatas dan setiap run tetap dibaca secara sekuensial. Run-run
+        antara diberi nama berdasarkan output (sehingga merge ke output
+        berbeda yang berjalan bersamaan tidak saling menimpa), dan dihapus
+        setelah dipakai.
+        """
+        merge_pass = 0
+        while len(runs) > self.merge_fan_in:
+            merged_runs = []
+            for i in range(0, len(runs), self.merge_fan_in):
+                merged_run = '{}_merge_{}_{}'.format(output, merge_pass, i // self.merge_fan_in)
+                self.merge_run_group(runs[i:i + self.merge_fan_in], merged_run, deleted)
+                merged_runs.append(merged_run)
+            if merge_pass > 0:
+                for run in runs:
+                    remove_segment(self.output_dir, run)
+            runs = merged_runs
+            merge_pass += 1
+        self.merge_run_group(runs, output, deleted)
+        if merge_pass > 0:
+            for run in runs:
+                remove_segment(self.output_dir, run)
+
+    def merge_run_group(self, runs, output, deleted=None):
+        """Satu merge (tanpa batas fan-in) dari index-index runs ke index output"""
+        with timer(self.stats, 'merge'), \
+                InvertedIndexWriter(output, self.postings_encoding, directory=self.output_dir,
+                                    positional=self.positional, buffer_size=self.merge_buffer_size,
+                                    stats=self.stats) as merged_index:
+            with contextlib.ExitStack() as stack:
+                indices = [stack.enter_context(InvertedIndexReader(run, self.postings_encoding,
+                                                                   directory=self.output_dir, stats=self.stats))
+                           for run in runs]
+                self.merge(indices, merged_index, deleted)
+
+    def write_blocks(self, blocks, invert_write):
+        """
+        Menulis setiap block ke intermediate index masing-masing, dengan
+        urutan sesuai urutan block (sub-directory) di collection.
+
+        Parameters
+        ----------
+        blocks: Iterable[Tuple[str, Any]]
+            Pasangan <nama block, hasil parsing block>
+        invert_write: Callable
+            Fungsi yang menulis hasil parsing sebuah block ke InvertedIndexWriter
+        """
+        blocks = iter(blocks)
+        while True:
+            # parsing block berjalan di dalam iterator blocks
+            with timer(self.stats, 'parse'):
+                block = next(blocks, None)
+            if block is None:
+                break
+            block_dir_relative, parsed = block
             index_id = 'intermediate_index_'+block_dir_relative
             self.intermediate_indices.append(index_id)
-            with InvertedIndexWriter(index_id, self.postings_encoding, directory=self.output_dir) as index:
-                self.invert_write(td_pairs, index)
-                td_pairs = None
+            with timer(self.stats, 'invert'), \
+                    InvertedIndexWriter(index_id, self.postings_encoding, directory=self.output_dir,
+                                        positional=self.positional, stats=self.stats) as index:
+                invert_write(parsed, index)
+                block = parsed = None
 
-        self.save()
+    def reconcile_write(self, parsed_block, index):
+        """
+        Memetakan hasil parsing + inversion dari worker process (yang masih
+        menggunakan termID dan docID lokal) ke self.term_id_map dan
+        self.doc_id_map, lalu menyimpannya ke index.
+
+        Term dan dokumen lokal didaftarkan sesuai urutan kemunculan pertamanya
+        di block, sehingga ID global yang dihasilkan sama persis dengan ID pada
+        indexing serial. Karena dokumen baru mendapatkan docID global yang
+        naik sesuai urutan docID lokalnya, postings list dari worker tetap
+        terurut setelah dipetakan; process utama hanya mengurutkan ulang
+        postings list per term berdasarkan termID global (tanpa inversion
+        ulang). Inversion diulang hanya jika urutan docID global tidak sama
+        dengan urutan docID lokal (karena ada nama dokumen yang sudah pernah
+        di-index sebelumnya).
 
-        with InvertedIndexWriter(self.index_name, self.postings_encoding, directory=self.output_dir) as merged_index:
+        Parameters
+        ----------
+        parsed_block: Tuple[List[str], List[str], Tuple[np.ndarray, ...]]
+            Keluaran _parse_invert_block: terms lokal, nama dokumen lokal, dan
+            keluaran invert_arrays dengan termID dan docID lokal
+        index: InvertedIndexWriter
+            Inverted index pada disk (file) yang terkait dengan suatu "block"
+        """
+        terms, docs, (local_terms, local_postings, tfs, offsets, positions) = parsed_block
+        term_ids = np.array([self.term_id_map[t] for t in terms], dtype=np.uint32)[local_terms]
+        doc_ids = np.array([self.doc_id_map[d] for d in docs], dtype=np.uint32)
+        if np.any(np.diff(doc_ids.astype(np.int64)) <= 0):
+            self.invert_write_arrays(np.repeat(np.repeat(term_ids, np.diff(offsets)), tfs),
+                                     np.repeat(doc_ids[local_postings], tfs), index, positions)
+            return
+
+        order = np.argsort(term_ids)
+        lengths = np.diff(offsets)[order]
+        take = gather_ranges(offsets[:-1][order], lengths)
+        if positions is not None:
+            position_starts = np.cumsum(tfs, dtype=np.int64) - tfs
+            positions = positions[gather_ranges(position_starts[take], tfs[take])]
+        postings, tfs = doc_ids[local_postings[take]], tfs[take]
+        if self.stats is not None:
+            self.stats.add('tokens', int(tfs.sum()))
+        self.add_doc_length(np.bincount(postings, weights=tfs))
+        index.append_block(term_ids[order], postings, tfs, np.append(0, np.cumsum(lengths)), positions)
+
+
+class BSBISearcher:
+    """
+    Searcher read-only untuk index hasil BSBIIndex.index(). term_id_map,
+    doc_id_map, dan metadata index dimuat sekali ketika searcher dibuat, dan
+    index file di-memory-map (lihat InvertedIndexReader), sehingga latency
+    query hanya ditentukan oleh pemrosesan postings.
+
+    Searcher tidak pernah mengubah state maupun menulis ke disk: term pada
+    query yang tidak ada di collection tidak ditambahkan ke term_id_map.
+    Karena itu satu searcher aman dipakai bersama oleh beberapa thread.
+
+    Setiap kali BSBIIndex.index() selesai, generation index bertambah (lihat
+    write_generation). Searcher memeriksa generation di disk pada setiap
+    query, dan jika berubah, memuat ulang index yang baru (reload) sehingga
+    result cache dan postings cache generation lama tidak pernah dipakai.
+    Dokumen yang dihapus (BSBIIndex.delete) disaring dari hasil semua query
+    dengan tombstone bitmap yang dimuat bersama generation-nya.
+
+    Attributes
+    ----------
+    term_id_map(FrozenIdMap): Untuk mapping terms ke termIDs
+    doc_id_map(FrozenIdMap): Untuk mapping docIDs ke nama dokumen
+    doc_length(array): Panjang setiap dokumen (di-index oleh docID), untuk
+                    BM25; None untuk index lama yang tidak menyimpan docs.length
+    index(InvertedIndexReader): Reader dari main index (SegmentedIndexReader
+                    jika index terdiri dari beberapa segment, lihat
+                    BSBIIndex.update), terbuka selama searcher belum di-close
+    generation(int): Generation dari index yang sedang dipakai
+    tombstones(TombstoneBitmap): docID-docID yang sudah dihapus
+    postings_cache(PostingsCache): Cache postings list yang sudah di-decode,
+                    dengan ukuran maksimum cache_bytes; None jika cache_bytes
+                    tidak diberikan
+    result_cache(ResultCache): Cache hasil query dengan key himpunan termID
+                    query, maksimum result_cache_size query dan (opsional)
+                    kadaluarsa setelah result_cache_ttl detik; None jika
+                    result_cache_size tidak diberikan
+    stats(util.Stats): Jika diberikan, statistik I/O reader index dan
+                    statistik setiap query dicatat di sini (lihat record_query)
+    """
+
+    def __init__(self, output_dir, postings_encoding, index_name="main_index", stem_cache_path=None,
+                 cache_bytes=None, result_cache_size=None, result_cache_ttl=None, stats=None):
+        self.output_dir = output_dir
+        self.postings_encoding = postings_encoding
+        self.index_name = index_name
+        self.cache_bytes = cache_bytes
+        self.result_cache = (ResultCache(result_cache_size, ttl=result_cache_ttl)
+                             if result_cache_size is not None else None)
+        self.lock = threading.Lock()
+        self.stats = stats
+
+        if stem_cache_path is not None:
+            Preprocessor.stem_cache.load(stem_cache_path)
+        self.state = None
+        # banyaknya pemakai setiap reader index yang masih terbuka (state
+        # saat ini dihitung sebagai satu pemakai, lihat acquire)
+        self.readers = {}
+        self.reload()
+
+    def reload(self):
+        """
+        Memuat term_id_map, doc_id_map, dan index dari generation terbaru di
+        disk. Semua state diganti sekaligus (satu assignment), sehingga query
+        yang sedang berjalan di thread lain tetap memakai state lamanya (lihat
+        acquire); reader lama ditutup begitu tidak ada query yang memakainya.
+        """
+        generation_stamp = stat_generation(self.output_dir, self.index_name)
+        generation = read_generation(self.output_dir, self.index_name)
+        term_id_map = load_id_map(self.output_dir, 'terms')
+        doc_id_map = load_id_map(self.output_dir, 'docs')
+        doc_length = load_doc_length(self.output_dir)
+        tombstones = TombstoneBitmap.load(tombstone_path(self.output_dir, self.index_name))
+
+        postings_cache = PostingsCache(self.cache_bytes) if self.cache_bytes is not None else None
+        while True:
+            manifest = read_manifest(self.output_dir, self.index_name)
+            segments = manifest['segments'] if manifest is not None else [self.index_name]
+            if len(segments) == 1:
+                index = InvertedIndexReader(segments[0], self.postings_encoding, directory=self.output_dir,
+                                            use_mmap=True, cache=postings_cache, stats=self.stats)
+            else:
+                index = SegmentedIndexReader(segments, self.postings_encoding, directory=self.output_dir,
+                                             use_mmap=True, cache=postings_cache, stats=self.stats)
+            try:
+                index.__enter__()
+                break
+            except FileNotFoundError:
+                # segment dihapus oleh background merge yang selesai di antara
+                # pembacaan manifest dan pembukaan segment; coba lagi dengan
+                # manifest yang baru
+                if read_manifest(self.output_dir, self.index_name) == manifest:
+                    raise
+        old_state = self.state
+        self.state = (generation_stamp, generation, term_id_map, doc_id_map, index, doc_length, tombstones)
+        self.readers[index] = 1
+        if old_state is not None:
+            self.release(old_state[4])
+
+    def refresh(self):
+        """
+        Memanggil reload jika generation index di disk sudah berubah.
+
+        Returns
+        -------
+        bool
+            True jika index dimuat ulang
+        """
+        if stat_generation(self.output_dir, self.index_name) == self.state[0]:
+            return False
+        with self.lock:
+            if stat_generation(self.output_dir, self.index_name) == self.state[0]:
+                return False
+            self.reload()
+            return True
+
+    @contextlib.contextmanager
+    def acquire(self):
+        """
+        Context manager yang memanggil refresh lalu mengembalikan state
+        terbaru. Reader index dari state tersebut tetap terbuka selama context
+        berjalan walaupun reload terjadi di thread lain; reader generation
+        lama ditutup oleh query terakhir yang memakainya.
+        """
+        self.refresh()
+        with self.lock:
+            state = self.state
+            self.readers[state[4]] += 1
+        try:
+            yield state
+        finally:
+            with self.lock:
+                self.release(state[4])
+
+    def release(self, index):
+        """Mengurangi pemakai reader index, dan menutupnya jika sudah tidak dipakai (dipanggil dengan lock)"""
+        self.readers[index] -= 1
+        if self.readers[index] == 0 and index is not self.index:
+            del self.readers[index]
+            index.__exit__(None, None, None)
+
+    @property
+    def generation(self):
+        return self.state[1]
+
+    @property
+    def term_id_map(self):
+        return self.state[2]
+
+    @property
+    def doc_id_map(self):
+        return self.state[3]
+
+    @property
+    def index(self):
+        return self.state[4]
+
+    @property
+    def doc_length(self):
+        return self.state[5][0] if self.state[5] is not None else None
+
+    @property
+    def tombstones(self):
+        return self.state[6]
+
+    @property
+    def postings_cache(self):
+        return self.index.cache
+
+    def close(self):
+        """Menutup index file"""
+        self.index.__exit__(None, None, None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        self.close()
+
+    def record_query(self, mode, query, start, results, **data):
+        """
+        Mencatat satu query ke stats: counter queries, query_results,
+        query_seconds, dan result_cache_hits, lalu event 'query' dengan data
+        mode, query, seconds, results (banyaknya hasil), cached, dan data
+        tambahan dari method retrieve (misalnya terms, banyaknya term query,
+        dan postings_lengths, df setiap term yang di-intersect).
+        """
+        seconds = time.perf_counter() - start
+        self.stats.update(queries=1, query_results=len(results), query_seconds=seconds,
+                          result_cache_hits=int(data.get('cached', False)))
+        self.stats.emit('query', mode=mode, query=query, seconds=seconds, results=len(results), **data)
+
+    def retrieve(self, query):
+        """
+        Melakukan boolean retrieval untuk mengambil semua dokumen yang
+        mengandung semua kata pada query (lihat BSBIIndex.retrieve).
+
+        Query dinormalisasi menjadi himpunan termID hasil preprocessing
+        (stemming dan stopwords removal), sehingga query yang hanya berbeda
+        urutan kata, imbuhan, atau stopwords memakai entry result cache yang
+        sama.
+
+        Parameters
+        ----------
+        query: str
+            Query tokens yang dipisahkan oleh spasi
+
+        Result
+        ------
+        List[str]
+            Daftar dokumen terurut yang mengandung sebuah query tokens, atau
+            EMPTY LIST [] jika tidak ada yang match.
+        """
+        start = time.perf_counter() if self.stats is not None else None
+        with self.acquire() as state:
+            _, generation, term_id_map, doc_id_map, index, _, tombstones = state
+
+            terms = [term_id_map.get(word) for word in Preprocessor.preprocess(query)]
+            if any([t not in index.postings_dict for t in terms]):
+                # at least one of the term not recognized
+                if self.stats is not None:
+                    self.record_query('and', query, start, [], terms=len(set(terms)), cached=False)
+                return []
+
+            key = tuple(sorted(set(terms)))
+            if self.result_cache is not None:
+                results = self.result_cache.get(key, generation)
+                if results is not None:
+                    if self.stats is not None:
+                        self.record_query('and', query, start, results, terms=len(key), cached=True)
+                    return list(results)
+
+            # sort term and associated posting lists based on their length
+            sorted_terms = sorted(
+                key, key=lambda t: index.postings_dict[t][1])
+            if hasattr(self.postings_encoding, 'cursor'):
+                # postings list hanya di-decode pada block yang dikunjungi
+                results = cursor_intersect(
+                    list(map(index.get_cursor, sorted_terms)))
+            else:
+                results = multi_intersect(
+                    list(map(index.get_postings_list, sorted_terms)))
+
+            results = [doc_id_map[r] for r in tombstones.filter(results)]
+            if self.stats is not None:
+                self.record_query('and', query, start, results, terms=len(key), cached=False,
+                                  postings_lengths=[index.postings_dict[t][1] for t in sorted_terms])
+            if self.result_cache is not None:
+                self.result_cache.put(key, results, generation)
+                results = list(results)
+            return results
+
+    def retrieve_many(self, queries, workers=1):
+        """
+        Versi batch dari retrieve untuk banyak query sekaligus. Semua query
+        di-preprocess terlebih dahulu, query yang sama (setelah normalisasi,
+        lihat retrieve) hanya dievaluasi sekali, dan postings list setiap
+        term yang dibutuhkan hanya dibaca dan di-decode sekali untuk seluruh
+        batch, dengan urutan sesuai posisinya di index file (sekuensial).
+        Setelah itu setiap query dievaluasi dengan multi_intersect dari
+        postings list yang sudah di-decode tersebut.
+
+        Parameters
+        ----------
+        queries: List[str]
+            Query-query (lihat retrieve)
+        workers: int
+            Banyaknya thread untuk decoding postings list dan evaluasi query;
+            1 berarti serial
+
+        Result
+        ------
+        List[List[str]]
+            Hasil retrieve untuk setiap query, sesuai urutan queries
+        """
+        start = time.perf_counter() if self.stats is not None else None
+        with self.acquire() as state:
+            _, generation, term_id_map, doc_id_map, index, _, tombstones = state
+
+            query_keys = {}
+            for query in set(queries):
+                terms = [term_id_map.get(word) for word in Preprocessor.preprocess(query)]
+                if any([t not in index.postings_dict for t in terms]):
+                    query_keys[query] = None
+                else:
+                    query_keys[query] = tuple(sorted(set(terms)))
+            keys = [query_keys[query] for query in queries]
+
+            results = {None: []}
+            for key in set(keys):
+                if key is not None and self.result_cache is not None:
+                    cached = self.result_cache.get(key, generation)
+                    if cached is not None:
+                        results[key] = cached
+            pending = [key for key in set(keys) if key not in results]
+
+            # setiap postings list hanya di-decode sekali, dengan urutan offset
+            # di index file (offset None untuk SegmentedIndexReader)
+            terms = sorted(set(t for key in pending for t in key),
+                           key=lambda t: (index.postings_dict[t][0] or 0, t))
             with contextlib.ExitStack() as stack:
-                indices = [stack.enter_context(InvertedIndexReader(index_id, self.postings_encoding, directory=self.output_dir))
-                           for index_id in self.intermediate_indices]
-                self.merge(indices, merged_index)
+                if workers > 1:
+                    map_ = stack.enter_context(ThreadPoolExecutor(max_workers=workers)).map
+                else:
+                    map_ = map
+                postings_lists = dict(zip(terms, map_(index.get_postings_list, terms)))
+
+                def evaluate(key):
+                    matches = multi_intersect([postings_lists[t] for t in key])
+                    return [doc_id_map[doc] for doc in tombstones.filter(matches)]
+
+                for key, key_results in zip(pending, map_(evaluate, pending)):
+                    results[key] = key_results
+                    if self.result_cache is not None:
+                        self.result_cache.put(key, key_results, generation)
+            if self.stats is not None:
+                seconds = time.perf_counter() - start
+                self.stats.update(queries=len(keys), query_results=sum(len(results[key]) for key in keys),
+                                  query_seconds=seconds, result_cache_hits=len(set(keys) - set(pending) - {None}))
+                self.stats.emit('query', mode='many', query=list(queries), seconds=seconds,
+                                results=[len(results[key]) for key in keys], unique=len(pending), terms=len(terms),
+                                postings_lengths=[index.postings_dict[t][1] for t in terms])
+            return [list(results[key]) for key in keys]
+
+    def retrieve_boolean(self, query):
+        """
+        Boolean retrieval dengan query language AND, OR, NOT, tanda kurung, dan
+        frasa (lihat query.py), misalnya '(kanker OR tumor) AND "paru paru"'.
+        Frasa hanya didukung oleh index positional.
+        Dua kata yang bersebelahan tanpa operator berarti AND, sehingga query
+        tanpa operator sama dengan retrieve(query).
+
+        Operand AND diurutkan berdasarkan df dan NOT didorong ke term
+        (plan_query), lalu query dievaluasi dengan pohon cursor; hasil
+        mengalir dari cursor akar tanpa membuat list hasil antara.
+
+        Parameters
+        ----------
+        query: str
+            Boolean query
+
+        Result
+        ------
+        List[str]
+            Daftar dokumen terurut yang memenuhi query, atau EMPTY LIST [] jika
+            tidak ada yang match.
+
+        Raises
+        ------
+        ValueError
+            jika query tidak sesuai grammar
+        """
+        start = time.perf_counter() if self.stats is not None else None
+        with self.acquire() as state:
+            _, generation, term_id_map, doc_id_map, index, _, tombstones = state
+            n_docs = len(doc_id_map)
+            query_terms = set()
+
+            def analyze(word):
+                terms = [term_id_map.get(t) for t in Preprocessor.preprocess(word)]
+                query_terms.update(terms)
+                return [(t, index.postings_dict[t][1] if t in index.postings_dict else 0) for t in terms]
+
+            plan = plan_query(parse_query(query), analyze, n_docs)
+            if plan is None:
+                if self.stats is not None:
+                    self.record_query('boolean', query, start, [], terms=len(query_terms), cached=False)
+                return []
+
+            key = ('boolean', repr(plan))
+            if self.result_cache is not None:
+                results = self.result_cache.get(key, generation)
+                if results is not None:
+                    if self.stats is not None:
+                        self.record_query('boolean', query, start, results, terms=len(query_terms), cached=True)
+                    return list(results)
+
+            results = [doc_id_map[doc] for doc in tombstones.filter(iterate(plan.cursor(index, n_docs)))]
+            if self.stats is not None:
+                self.record_query('boolean', query, start, results, terms=len(query_terms), cached=False)
+            if self.result_cache is not None:
+                self.result_cache.put(key, results, generation)
+                results = list(results)
+            return results
+
+    def retrieve_topk(self, query, k=10, k1=1.2, b=0.75):
+        """
+        Ranked retrieval: mengembalikan k dokumen dengan skor BM25 terbesar
+        terhadap query (disjunctive, dokumen cukup mengandung salah satu term
+        query). Term query yang tidak ada di collection diabaikan.
+
+            BM25(d, q) = sum_t idf(t) * tf(t, d) * (k1 + 1) /
+                                       (tf(t, d) + k1 * (1 - b + b * |d| / avgdl))
+            idf(t)     = log(1 + (N - df(t) + 0.5) / (df(t) + 0.5))
+
+        Top-k dihitung dengan MaxScore (lihat util.maxscore_topk), dengan
+        upper bound skor setiap term dihitung dari max_tf term tersebut dan
+        panjang dokumen terpendek, sehingga sebagian besar postings dari term
+        yang umum tidak perlu di-score.
+
+        Parameters
+        ----------
+        query: str
+            Query tokens yang dipisahkan oleh spasi
+        k: int
+            Banyaknya dokumen yang dikembalikan
+        k1, b: float
+            Parameter BM25
+
+        Result
+        ------
+        List[Tuple[float, str]]
+            k pasangan <skor, nama dokumen> dengan skor terbesar, terurut
+            dari skor terbesar; EMPTY LIST [] jika tidak ada yang match.
+        """
+        start = time.perf_counter() if self.stats is not None else None
+        with self.acquire() as state:
+            _, generation, term_id_map, doc_id_map, index, doc_length, tombstones = state
+            if doc_length is None:
+                raise ValueError("index tidak menyimpan panjang dokumen (docs.length), lakukan indexing ulang")
+            doc_length, avg_doc_length, min_doc_length = doc_length
+
+            terms = [term_id_map.get(word) for word in Preprocessor.preprocess(query)]
+            key = ('bm25', k, k1, b) + tuple(sorted(set(t for t in terms if t in index.postings_dict)))
+            if self.result_cache is not None:
+                results = self.result_cache.get(key, generation)
+                if results is not None:
+                    if self.stats is not None:
+                        self.record_query('topk', query, start, results, terms=len(key) - 4, cached=True)
+                    return list(results)
+
+            n_docs = len(doc_length)
+            cursors, upper_bounds, scorers = [], [], []
+            for term in key[4:]:
+                term_posting_dict = index.postings_dict[term]
+                df, max_tf = term_posting_dict[1], term_posting_dict[4]
+                idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+                tf_list = index.get_tf_list(term)
+                cursors.append(PostingsListCursor(index.get_postings_list(term)))
+                upper_bounds.append(idf * max_tf * (k1 + 1) /
+                                    (max_tf + k1 * (1 - b + b * min_doc_length / avg_doc_length)))
+                scorers.append(lambda c, idf=idf, tf_list=tf_list: idf * tf_list[c.pos] * (k1 + 1) / (
+                    tf_list[c.pos] + k1 * (1 - b + b * doc_length[c.doc] / avg_doc_length)))
+
+            results = [(score, doc_id_map[doc])
+                       for score, doc in maxscore_topk(cursors, upper_bounds, scorers, k, deleted=tombstones)]
+            if self.stats is not None:
+                self.record_query('topk', query, start, results, terms=len(key) - 4, cached=False,
+                                  postings_lengths=[index.postings_dict[t][1] for t in key[4:]])
+            if self.result_cache is not None:
+                self.result_cache.put(key, results, generation)
+                results = list(results)
+            return results
+
+
+def load_id_map(output_dir, name):
+    """
+    Memuat IdMap read-only untuk proses query: FrozenIdMap (<name>.idmap)
+    jika ada, atau IdMap hasil pickle (<name>.dict) untuk index lama.
+    """
+    path = os.path.join(output_dir, name + '.idmap')
+    if os.path.exists(path):
+        return FrozenIdMap(path)
+    with open(os.path.join(output_dir, name + '.dict'), 'rb') as f:
+        return pickle.load(f)
+
+
+def load_doc_length(output_dir):
+    """
+    Memuat panjang dokumen (docs.length) untuk proses query.
+
+    Returns
+    -------
+    Tuple[array, float, int]
+        panjang setiap dokumen, rata-rata, dan minimumnya; None jika index
+        tidak menyimpan docs.length
+    """
+    doc_length = array('I')
+    try:
+        with open(os.path.join(output_dir, 'docs.length'), 'rb') as f:
+            doc_length.frombytes(f.read())
+    except FileNotFoundError:
+        return None
+    if len(doc_length) == 0:
+        return doc_length, 1.0, 0
+    return doc_length, sum(doc_length) / len(doc_length), min(doc_length)
+
+
+def tombstone_path(output_dir, index_name):
+    return os.path.join(output_dir, index_name + '.deleted')
+
+
+def manifest_path(output_dir, index_name):
+    return os.path.join(output_dir, index_name + '.manifest')
+
+
+def read_manifest(output_dir, index_name):
+    """
+    Manifest index: dictionary dengan key 'segments' (nama segment-segment
+    yang aktif, terurut sesuai rentang docID-nya), 'blocks' (sub-directory
+    collection yang sudah di-index), dan 'next_segment' (counter untuk nama
+    segment baru). None jika index belum pernah dibuat.
+    """
+    try:
+        with open(manifest_path(output_dir, index_name), 'rb') as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def write_manifest(output_dir, index_name, manifest):
+    """Mengganti manifest secara atomik (lihat write_generation)"""
+    path = manifest_path(output_dir, index_name)
+    with open(path + '.tmp', 'wb') as f:
+        pickle.dump(manifest, f)
+    os.replace(path + '.tmp', path)
+
+
+def remove_segment(output_dir, segment):
+    """Menghapus file-file sebuah segment yang sudah tidak ada di manifest"""
+    for extension in ('.index', '.dict', '.pos'):
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(os.path.join(output_dir, segment + extension))
+
+
+def select_merge(sizes, merge_factor):
+    """
+    Merge policy bertingkat (tiered): ukuran setiap segment dikelompokkan ke
+    tier floor(log_merge_factor(ukuran)), dan merge_factor segment
+    bersebelahan dengan tier yang sama digabung menjadi satu segment (dengan
+    tier yang lebih tinggi). Dengan begitu banyaknya segment tetap
+    O(merge_factor * log(ukuran index)), dan setiap posting hanya ditulis ulang
+    O(log(ukuran index)) kali.
+
+    Parameters
+    ----------
+    sizes: List[int]
+        Ukuran (bytes) setiap segment, sesuai urutan di manifest
+    merge_factor: int
+
+    Returns
+    -------
+    slice
+        Segment-segment yang harus digabung, atau None jika tidak ada
+    """
+    tiers = [int(math.log(max(size, 1), merge_factor)) for size in sizes]
+    for start in range(len(tiers) - merge_factor + 1):
+        if len(set(tiers[start:start + merge_factor])) == 1:
+            return slice(start, start + merge_factor)
+    return None
+
+
+def generation_path(output_dir, index_name):
+    return os.path.join(output_dir, index_name + '.gen')
+
+
+def read_generation(output_dir, index_name):
+    """Generation dari index di output_dir (0 jika belum pernah ditulis)"""
+    try:
+        with open(generation_path(output_dir, index_name), 'r') as f:
+            return int(f.read())
+    except FileNotFoundError:
+        return 0
+
+
+def stat_generation(output_dir, index_name):
+    """
+    Penanda murah (tanpa membaca isi file) untuk mendeteksi perubahan
+    generation: file generation selalu diganti dengan os.replace, sehingga
+    inode-nya berubah setiap generation baru.
+    """
+    try:
+        st = os.stat(generation_path(output_dir, index_name))
+        return st.st_ino, st.st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def write_generation(output_dir, index_name):
+    """Menaikkan generation index di output_dir, dan mengembalikan generation baru"""
+    generation = read_generation(output_dir, index_name) + 1
+    path = generation_path(output_dir, index_name)
+    with open(path + '.tmp', 'w') as f:
+        f.write(str(generation))
+    os.replace(path + '.tmp', path)
+    return generation
+
+
+def token_positions(doc_ids):
+    """
+    Posisi setiap pair di dokumennya, untuk pairs dimana pair-pair dari satu
+    dokumen bersebelahan dan sesuai urutan token di dokumen tersebut.
+    """
+    starts = np.flatnonzero(np.diff(doc_ids, prepend=-1) != 0)
+    return np.arange(len(doc_ids)) - np.repeat(starts, np.diff(np.append(starts, len(doc_ids))))
+
+
+def invert_arrays(term_ids, doc_ids, positions=None):
+    """
+    Inversion <termID, docID> pairs secara vectorized: satu kali lexsort
+    (termID, lalu docID), kemudian pembuangan pair duplikat dan deteksi
+    batas antar term dengan perbandingan elemen yang bersebelahan.
+
+    Parameters
+    ----------
+    term_ids: np.ndarray
+        termID dari setiap pair
+    doc_ids: np.ndarray
+        docID dari setiap pair
+    positions: np.ndarray
+        posisi token dari setiap pair (opsional, untuk index positional)
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+        (terms, postings, tfs, offsets, positions): terms terurut dan unik,
+        postings adalah gabungan semua postings list (terurut, tanpa
+        duplikat), tfs adalah banyaknya pair duplikat (term frequency) untuk
+        setiap posting, postings list dari terms[i] adalah
+        postings[offsets[i]:offsets[i + 1]], dan positions adalah posisi dari
+        semua pair, terurut per posting (None jika positions tidak diberikan)
+    """
+    if positions is None:
+        order = np.lexsort((doc_ids, term_ids))
+    else:
+        order = np.lexsort((positions, doc_ids, term_ids))
+        positions = positions[order]
+    term_ids = term_ids[order]
+    doc_ids = doc_ids[order]
+
+    keep = np.ones(len(order), dtype=bool)
+    keep[1:] = (term_ids[1:] != term_ids[:-1]) | (doc_ids[1:] != doc_ids[:-1])
+    term_ids = term_ids[keep]
+    postings = doc_ids[keep]
+    tfs = np.diff(np.append(np.flatnonzero(keep), len(order))).astype(np.uint32)
+
+    starts = np.flatnonzero(np.diff(term_ids, prepend=-1) != 0)
+    offsets = np.append(starts, len(postings))
+    return term_ids[starts], postings, tfs, offsets, positions
+
+
+def gather_ranges(starts, lengths):
+    """
+    Indeks-indeks dari gabungan rentang [starts[i], starts[i] + lengths[i]),
+    sesuai urutan i; array[gather_ranges(starts, lengths)] menyambung
+    potongan-potongan array tersebut.
+    """
+    starts, lengths = np.asarray(starts, dtype=np.int64), np.asarray(lengths, dtype=np.int64)
+    output_starts = np.cumsum(lengths) - lengths
+    return np.repeat(starts - output_starts, lengths) + np.arange(int(np.sum(lengths)))
+
+
+def _parse_invert_block(args):
+    """
+    Dijalankan di worker process: parsing dan inversion satu block dengan
+    IdMap lokal. Lihat BSBIIndex.reconcile_write.
+    """
+    data_dir, block_dir_relative, positional = args
+    block_index = BSBIIndex(data_dir, output_dir=None, postings_encoding=None)
+    term_ids, doc_ids = array('I'), array('I')
+    for doc_id, doc_term_ids in block_index.parse_documents(block_dir_relative):
+        term_ids.extend(doc_term_ids)
+        doc_ids.extend(repeat(doc_id, len(doc_term_ids)))
+    doc_ids = np.array(doc_ids, dtype=np.uint32)
+    inverted = invert_arrays(np.array(term_ids, dtype=np.uint32), doc_ids,
+                             token_positions(doc_ids) if positional else None)
+    return block_index.term_id_map.id_to_str, block_index.doc_id_map.id_to_str, inverted
 
 
 if __name__ == "__main__":
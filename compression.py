@@ -1,5 +1,10 @@
 import array
 import math
+from bisect import bisect_left
+from itertools import accumulate
+from itertools import chain
+
+import numpy as np
 from bitstring import BitStream, BitString, pack
 from bitarray import bitarray
 from bitarray.util import int2ba, ba2int
@@ -57,6 +62,67 @@ class StandardPostings:
         decoded_postings_list.frombytes(encoded_postings_list)
         return decoded_postings_list.tolist()
 
+    @staticmethod
+    def encode_tf(tf_list):
+        """
+        Encode list of term frequencies menjadi stream of bytes
+
+        Parameters
+        ----------
+        tf_list: List[int]
+            List of term frequencies, sejajar dengan postings list
+
+        Returns
+        -------
+        bytes
+            bytearray yang merepresentasikan nilai raw TF kemunculan term di setiap
+            dokumen pada list of postings
+        """
+        return StandardPostings.encode(tf_list)
+
+    @staticmethod
+    def decode_tf(encoded_tf_list):
+        """
+        Decodes list of term frequencies dari sebuah stream of bytes
+
+        Returns
+        -------
+        List[int]
+            List of term frequencies yang merupakan hasil decoding dari encoded_tf_list
+        """
+        return StandardPostings.decode(encoded_tf_list)
+
+    @staticmethod
+    def concatenate(encoded_postings_lists, last_docs):
+        """
+        Menyambung beberapa encoded postings list menjadi encoded postings
+        list gabungannya tanpa decoding: docID disimpan apa adanya, sehingga
+        cukup disambung byte per byte.
+
+        Parameters
+        ----------
+        encoded_postings_lists: List[bytes]
+            Encoded postings list yang akan disambung, berurutan
+        last_docs: List[int]
+            docID terakhir dari setiap postings list
+
+        Returns
+        -------
+        bytes
+            Hasil penyambungan, atau None jika rentang docID dari postings
+            list yang bersebelahan saling bertumpuk (harus di-merge biasa)
+        """
+        itemsize = array.array('L').itemsize
+        for last_doc, encoded_postings_list in zip(last_docs, encoded_postings_lists[1:]):
+            if StandardPostings.decode(encoded_postings_list[:itemsize])[0] <= last_doc:
+                return None
+        return b"".join(encoded_postings_lists)
+
+    @staticmethod
+    def concatenate_tf(encoded_tf_lists):
+        """Menyambung beberapa encoded TF list tanpa decoding"""
+        return b"".join(encoded_tf_lists)
+
 
 class BICPostings:
     @staticmethod
@@ -156,6 +222,19 @@ class BICPostings:
         decoded.append(hi)
         return decoded
 
+    @staticmethod
+    def encode_tf(tf_list):
+        """
+        Term frequencies tidak terurut, sehingga yang di-encode dengan BIC
+        adalah prefix sum-nya (terurut naik, karena setiap TF >= 1).
+        """
+        return BICPostings.encode(list(accumulate(tf_list)))
+
+    @staticmethod
+    def decode_tf(encoded_tf_list, n):
+        cumulative = BICPostings.decode(encoded_tf_list, n)
+        return [b - a for a, b in zip([0] + cumulative, cumulative)]
+
 
 class VBEPostings:
     """ 
@@ -176,6 +255,10 @@ class VBEPostings:
 
     """
 
+    # Batas panjang postings list (atau encoded bytes) dimana versi vectorized
+    # mulai lebih cepat dari loop Python biasa
+    VECTORIZE_MIN_LENGTH = 64
+
     @staticmethod
     def vb_encode_number(number):
         """
@@ -202,6 +285,74 @@ class VBEPostings:
             bytes.append(VBEPostings.vb_encode_number(number))
         return b"".join(bytes)
 
+    @staticmethod
+    def vb_encode_array(numbers):
+        """
+        Versi vectorized dari vb_encode. Setiap byte keluaran dihitung untuk
+        semua number sekaligus: pertama byte terakhir (7 bit terendah dengan
+        bit awal 1), lalu 7 bit berikutnya untuk number yang masih butuh byte
+        tambahan, dst. Format keluaran sama persis dengan vb_encode.
+
+        Parameters
+        ----------
+        numbers: np.ndarray
+            array of non-negative integers
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray]
+            bytestream (uint8) hasil encoding, dan posisi byte terakhir + 1
+            dari setiap number di bytestream tersebut
+        """
+        numbers = np.asarray(numbers, dtype=np.int64)
+        n_bytes = np.ones(len(numbers), dtype=np.int64)
+        rest = numbers >> 7
+        while rest.any():
+            n_bytes += rest > 0
+            rest >>= 7
+        ends = np.cumsum(n_bytes)
+
+        out = np.empty(ends[-1] if len(ends) > 0 else 0, dtype=np.uint8)
+        last = ends - 1
+        out[last] = (numbers & 127) | 128
+        k = 1
+        while True:
+            more = n_bytes > k
+            if not more.any():
+                break
+            out[last[more] - k] = (numbers[more] >> (7 * k)) & 127
+            k += 1
+        return out, ends
+
+    @staticmethod
+    def vb_decode_array(encoded_bytestream):
+        """
+        Versi vectorized dari vb_decode: setiap byte digeser sesuai jaraknya
+        ke byte terakhir dari number yang memuatnya, lalu dijumlahkan per
+        number dengan np.add.reduceat.
+
+        Returns
+        -------
+        np.ndarray
+            array (int64) of numbers hasil decoding
+        """
+        decoded_bytestream = np.frombuffer(encoded_bytestream, dtype=np.uint8)
+        ends = np.flatnonzero(decoded_bytestream >= 128)
+        if len(ends) == 0:
+            return np.zeros(0, dtype=np.int64)
+        decoded_bytestream = decoded_bytestream[:ends[-1] + 1]
+
+        number_of_byte = np.zeros(len(decoded_bytestream), dtype=np.int64)
+        number_of_byte[ends[:-1] + 1] = 1
+        number_of_byte = np.cumsum(number_of_byte)
+        shifts = 7 * (ends[number_of_byte] - np.arange(len(decoded_bytestream)))
+        values = (decoded_bytestream & 127).astype(np.int64) << shifts
+
+        starts = np.empty(len(ends), dtype=np.int64)
+        starts[0] = 0
+        starts[1:] = ends[:-1] + 1
+        return np.add.reduceat(values, starts)
+
     @staticmethod
     def encode(postings_list):
         """
@@ -209,6 +360,9 @@ class VBEPostings:
         Encoding). JANGAN LUPA diubah dulu ke gap-based list, sebelum
         di-encode dan diubah ke bytearray.
 
+        Untuk postings list yang panjang digunakan versi vectorized (NumPy);
+        untuk yang pendek, loop Python biasa lebih cepat.
+
         Parameters
         ----------
         postings_list: List[int]
@@ -219,9 +373,11 @@ class VBEPostings:
         bytes
             bytearray yang merepresentasikan urutan integer di postings_list
         """
-        list_of_gaps = [postings_list[0]] + [b - a for a,
-                                             b in zip(postings_list, postings_list[1:])]
-        return VBEPostings.vb_encode(list_of_gaps)
+        if len(postings_list) < VBEPostings.VECTORIZE_MIN_LENGTH:
+            list_of_gaps = [postings_list[0]] + [b - a for a,
+                                                 b in zip(postings_list, postings_list[1:])]
+            return VBEPostings.vb_encode(list_of_gaps)
+        return VBEPostings.encode_many([postings_list])[0]
 
     @staticmethod
     def vb_decode(encoded_bytestream):
@@ -260,11 +416,452 @@ class VBEPostings:
         List[int]
             list of docIDs yang merupakan hasil decoding dari encoded_postings_list
         """
-        decoded_list_of_gaps = VBEPostings.vb_decode(encoded_postings_list)
-        start = 0
-        decoded_postings_list = [
-            start := start + a for a in decoded_list_of_gaps]
-        return decoded_postings_list
+        if len(encoded_postings_list) < VBEPostings.VECTORIZE_MIN_LENGTH:
+            decoded_list_of_gaps = VBEPostings.vb_decode(encoded_postings_list)
+            start = 0
+            decoded_postings_list = [
+                start := start + a for a in decoded_list_of_gaps]
+            return decoded_postings_list
+        return np.cumsum(VBEPostings.vb_decode_array(encoded_postings_list)).tolist()
+
+    @staticmethod
+    def encode_many(postings_lists):
+        """
+        Batch encoding: meng-encode banyak postings list dengan satu kali
+        pemanggilan vb_encode_array, sehingga overhead NumPy tidak dibayar
+        per postings list.
+
+        Parameters
+        ----------
+        postings_lists: List[List[int]]
+            List of postings lists (masing-masing terurut)
+
+        Returns
+        -------
+        List[bytes]
+            hasil encode dari setiap postings list, sama dengan encode(...)
+        """
+        lengths = np.fromiter(map(len, postings_lists), dtype=np.int64,
+                              count=len(postings_lists))
+        postings = np.fromiter(chain.from_iterable(postings_lists), dtype=np.int64,
+                               count=lengths.sum())
+        list_ends = np.cumsum(lengths)
+        list_starts = (list_ends - lengths)[lengths > 0]
+
+        gaps = np.diff(postings, prepend=0)
+        gaps[list_starts] = postings[list_starts]
+        encoded, ends = VBEPostings.vb_encode_array(gaps)
+
+        encoded = encoded.tobytes()
+        byte_ends = np.zeros(len(postings_lists) + 1, dtype=np.int64)
+        byte_ends[1:][lengths > 0] = ends[list_ends[lengths > 0] - 1]
+        byte_ends = np.maximum.accumulate(byte_ends).tolist()
+        return [encoded[byte_ends[i]:byte_ends[i + 1]] for i in range(len(postings_lists))]
+
+    @staticmethod
+    def decode_many(encoded_postings_lists):
+        """
+        Batch decoding: kebalikan dari encode_many.
+
+        Parameters
+        ----------
+        encoded_postings_lists: List[bytes]
+            List of encoded postings lists
+
+        Returns
+        -------
+        List[List[int]]
+            hasil decode dari setiap encoded postings list, sama dengan decode(...)
+        """
+        stream = np.frombuffer(b"".join(encoded_postings_lists), dtype=np.uint8)
+        byte_ends = np.cumsum([len(e) for e in encoded_postings_lists], dtype=np.int64)
+        stops = np.concatenate(([0], np.cumsum(stream >= 128)))
+        list_ends = stops[byte_ends]
+
+        postings = np.cumsum(VBEPostings.vb_decode_array(stream))
+        list_starts = np.concatenate(([0], list_ends))[:-1]
+        bases = np.concatenate(([0], postings))[list_starts]
+        postings -= np.repeat(bases, list_ends - list_starts)
+
+        postings = postings.tolist()
+        list_starts = list_starts.tolist()
+        list_ends = list_ends.tolist()
+        return [postings[a:b] for a, b in zip(list_starts, list_ends)]
+
+    @staticmethod
+    def encode_tf(tf_list):
+        """
+        Encode list of term frequencies dengan Variable-Byte Encoding, TANPA
+        gap-based (term frequencies tidak terurut).
+        """
+        if len(tf_list) < VBEPostings.VECTORIZE_MIN_LENGTH:
+            return VBEPostings.vb_encode(tf_list)
+        return VBEPostings.vb_encode_array(tf_list)[0].tobytes()
+
+    @staticmethod
+    def decode_tf(encoded_tf_list):
+        """Kebalikan dari encode_tf"""
+        if len(encoded_tf_list) < VBEPostings.VECTORIZE_MIN_LENGTH:
+            return VBEPostings.vb_decode(encoded_tf_list)
+        return VBEPostings.vb_decode_array(encoded_tf_list).tolist()
+
+    @staticmethod
+    def concatenate(encoded_postings_lists, last_docs):
+        """
+        Menyambung beberapa encoded postings list tanpa decoding (lihat
+        StandardPostings.concatenate): hanya gap pertama dari setiap postings
+        list (yang berisi docID pertamanya apa adanya) yang di-decode dan
+        di-encode ulang menjadi gap terhadap docID terakhir postings list
+        sebelumnya; sisa bytestream-nya disalin apa adanya.
+        """
+        parts = [encoded_postings_lists[0]]
+        for last_doc, encoded_postings_list in zip(last_docs, encoded_postings_lists[1:]):
+            first_end = 0
+            while encoded_postings_list[first_end] < 128:
+                first_end += 1
+            first_doc = VBEPostings.vb_decode(encoded_postings_list[:first_end + 1])[0]
+            if first_doc <= last_doc:
+                return None
+            parts.append(VBEPostings.vb_encode_number(first_doc - last_doc))
+            parts.append(encoded_postings_list[first_end + 1:])
+        return b"".join(parts)
+
+    @staticmethod
+    def concatenate_tf(encoded_tf_lists):
+        """Menyambung beberapa encoded TF list tanpa decoding (TF tidak gap-based)"""
+        return b"".join(encoded_tf_lists)
+
+    @staticmethod
+    def encode_positions(positions_lists):
+        """
+        Encode posisi-posisi kemunculan term untuk setiap posting dari sebuah
+        postings list. Posisi dalam satu dokumen di-encode gap-based (posisi
+        pertama apa adanya), dan semuanya disambung menjadi satu bytestream
+        VBE; banyaknya posisi per posting adalah TF-nya, sehingga tidak perlu
+        disimpan.
+
+        Parameters
+        ----------
+        positions_lists: List[List[int]]
+            Posisi-posisi (terurut) term di setiap dokumen pada postings list
+
+        Returns
+        -------
+        bytes
+        """
+        gaps = []
+        for positions in positions_lists:
+            gaps.append(positions[0])
+            gaps.extend([b - a for a, b in zip(positions, positions[1:])])
+        return VBEPostings.encode_tf(gaps)
+
+    @staticmethod
+    def encode_positions_many(positions, tfs, offsets):
+        """
+        Versi vectorized dari encode_positions untuk banyak postings list
+        sekaligus (lihat InvertedIndexWriter.append_block).
+
+        Parameters
+        ----------
+        positions: np.ndarray
+            Gabungan posisi dari semua posting, terurut per posting
+        tfs: np.ndarray
+            TF (banyaknya posisi) setiap posting
+        offsets: np.ndarray
+            Postings list ke-i adalah posting offsets[i] .. offsets[i + 1] - 1
+
+        Returns
+        -------
+        List[bytes]
+            hasil encode_positions untuk setiap postings list
+        """
+        positions = np.asarray(positions, dtype=np.int64)
+        pair_ends = np.cumsum(tfs, dtype=np.int64)
+        gaps = np.diff(positions, prepend=0)
+        gaps[pair_ends - tfs] = positions[pair_ends - tfs]
+        encoded, ends = VBEPostings.vb_encode_array(gaps)
+
+        encoded = encoded.tobytes()
+        pair_offsets = np.concatenate(([0], pair_ends))[offsets]
+        byte_ends = np.concatenate(([0], ends))[pair_offsets].tolist()
+        return [encoded[byte_ends[i]:byte_ends[i + 1]] for i in range(len(byte_ends) - 1)]
+
+    @staticmethod
+    def encode_tf_many(tf_lists):
+        """Batch encoding untuk list of term frequencies, seperti encode_many"""
+        lengths = np.fromiter(map(len, tf_lists), dtype=np.int64, count=len(tf_lists))
+        tfs = np.fromiter(chain.from_iterable(tf_lists), dtype=np.int64, count=lengths.sum())
+        encoded, ends = VBEPostings.vb_encode_array(tfs)
+
+        encoded = encoded.tobytes()
+        byte_ends = np.zeros(len(tf_lists) + 1, dtype=np.int64)
+        byte_ends[1:][lengths > 0] = ends[np.cumsum(lengths)[lengths > 0] - 1]
+        byte_ends = np.maximum.accumulate(byte_ends).tolist()
+        return [encoded[byte_ends[i]:byte_ends[i + 1]] for i in range(len(tf_lists))]
+
+
+class PositionsList:
+    """
+    Posisi-posisi term di setiap posting dari sebuah postings list, hasil
+    VBEPostings.encode_positions. Posisi sebuah posting baru di-decode ketika
+    diakses. Batas antar number (byte dengan bit awal 1) dan prefix sum TF
+    list juga dicari secara bertahap, dengan potongan yang ukurannya
+    berlipat dua, hanya sampai posting yang diakses; sehingga phrase query
+    hanya men-scan bytestream sampai dokumen kandidat terakhir, dan hanya
+    men-decode posisi dari dokumen kandidat.
+
+    TF list bisa diberikan sudah di-decode (list), atau masih dalam bentuk
+    encoded (format VBEPostings.encode_tf, dengan n postings) sehingga TF
+    juga hanya di-decode sampai dokumen kandidat terakhir.
+
+    positions_list[i] adalah list posisi term di dokumen postings_list[i].
+    """
+
+    def __init__(self, encoded_positions, tf_list, n=None):
+        self.encoded_positions = encoded_positions
+        self.number_ends = VBEnds(encoded_positions)
+        if isinstance(tf_list, list):
+            self.n = len(tf_list)
+            self.tf_offsets = list(accumulate(tf_list, initial=0))
+            self.encoded_tfs = None
+        else:
+            self.n = n
+            self.tf_offsets = np.zeros(1, dtype=np.int64)
+            self.encoded_tfs = VBEnds(tf_list)
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, i):
+        if not 0 <= i < self.n:
+            raise IndexError("posting di luar postings list")
+        while len(self.tf_offsets) < i + 2:
+            # decode TF dari potongan berikutnya encoded TF list
+            start, end = self.encoded_tfs.next_chunk()
+            tfs = VBEPostings.vb_decode_array(self.encoded_tfs.encoded_bytestream[start:end])
+            self.tf_offsets = np.concatenate((self.tf_offsets, np.cumsum(tfs) + self.tf_offsets[-1]))
+        first, last = int(self.tf_offsets[i]), int(self.tf_offsets[i + 1])
+        start = self.number_ends[first - 1] + 1 if first > 0 else 0
+        end = self.number_ends[last - 1] + 1
+        return list(accumulate(VBEPostings.vb_decode(self.encoded_positions[start:end])))
+
+
+class VBEnds:
+    """
+    Posisi byte terakhir setiap number di sebuah bytestream VBE, yang dicari
+    secara bertahap: self[k] hanya men-scan bytestream sampai number ke-k,
+    dengan potongan yang ukurannya berlipat dua (minimal CHUNK_SIZE bytes).
+    """
+
+    CHUNK_SIZE = 256
+
+    def __init__(self, encoded_bytestream):
+        self.encoded_bytestream = encoded_bytestream
+        self.bytes = np.frombuffer(encoded_bytestream, dtype=np.uint8)
+        self.ends = np.zeros(0, dtype=np.int64)
+        self.scanned = 0
+
+    def next_chunk(self):
+        """
+        Scan potongan berikutnya, dan kembalikan rentang byte [start, end)
+        dari number-number (utuh) yang baru ditemukan
+        """
+        start = int(self.ends[-1]) + 1 if len(self.ends) > 0 else 0
+        while True:
+            if self.scanned >= len(self.bytes):
+                raise IndexError("bytestream VBE habis")
+            size = max(VBEnds.CHUNK_SIZE, self.scanned)
+            chunk_ends = np.flatnonzero(self.bytes[self.scanned:self.scanned + size] >= 128) + self.scanned
+            self.scanned += size
+            if len(chunk_ends) > 0:
+                self.ends = np.concatenate((self.ends, chunk_ends))
+                return start, int(chunk_ends[-1]) + 1
+
+    def __getitem__(self, k):
+        while len(self.ends) <= k:
+            self.next_chunk()
+        return int(self.ends[k])
+
+
+class BlockVBEPostings:
+    """
+    Postings list dipecah menjadi block-block berukuran BLOCK_SIZE docIDs,
+    masing-masing di-encode dengan Variable-Byte Encoding (gap-based, gap
+    pertama sebuah block dihitung terhadap docID terakhir block sebelumnya).
+    Di depan block-block tersebut disimpan skip table, sehingga sebuah
+    BlockPostingsCursor dapat melompati block yang tidak diperlukan tanpa
+    men-decode-nya.
+
+    Format bytestream (semua angka di-encode dengan VBE):
+        banyaknya block,
+        untuk setiap block: gap docID terakhir block (terhadap docID terakhir
+                            block sebelumnya), panjang block dalam bytes
+        data block ke-0, data block ke-1, ...
+
+    Karena gap pertama setiap block dihitung terhadap block sebelumnya,
+    gabungan semua data block adalah bytestream VBEPostings biasa.
+    """
+
+    BLOCK_SIZE = 128
+
+    @staticmethod
+    def encode(postings_list):
+        """
+        Encode postings_list menjadi stream of bytes (lihat format di atas).
+
+        Parameters
+        ----------
+        postings_list: List[int]
+            List of docIDs (postings)
+
+        Returns
+        -------
+        bytes
+            bytearray yang merepresentasikan urutan integer di postings_list
+        """
+        if len(postings_list) <= BlockVBEPostings.BLOCK_SIZE:
+            data = VBEPostings.encode(postings_list)
+            return VBEPostings.vb_encode([1, postings_list[-1], len(data)]) + data
+
+        gaps = np.diff(np.asarray(postings_list, dtype=np.int64), prepend=0)
+        data, ends = VBEPostings.vb_encode_array(gaps)
+        block_ends = ends[BlockVBEPostings.BLOCK_SIZE - 1::BlockVBEPostings.BLOCK_SIZE].tolist()
+        block_lasts = postings_list[BlockVBEPostings.BLOCK_SIZE - 1::BlockVBEPostings.BLOCK_SIZE]
+        if len(postings_list) % BlockVBEPostings.BLOCK_SIZE != 0:
+            block_ends.append(int(ends[-1]))
+            block_lasts.append(postings_list[-1])
+
+        header = [len(block_ends)]
+        for prev_last, last, prev_end, end in zip([0] + block_lasts, block_lasts,
+                                                  [0] + block_ends, block_ends):
+            header.extend((last - prev_last, end - prev_end))
+        return VBEPostings.vb_encode(header) + data.tobytes()
+
+    @staticmethod
+    def decode_skip_table(encoded_postings_list):
+        """
+        Decode skip table di awal encoded_postings_list.
+
+        Returns
+        -------
+        Tuple[List[int], List[int]]
+            docID terakhir dari setiap block, dan posisi awal (dalam bytes,
+            relatif terhadap awal encoded_postings_list) dari setiap block
+            ditambah posisi akhir block terakhir
+        """
+        numbers = []
+        n = 0
+        pos = 0
+        count = None
+        for b in encoded_postings_list:
+            pos += 1
+            if b < 128:
+                n = 128 * n + b
+                continue
+            numbers.append(128 * n + (b - 128))
+            n = 0
+            if count is None:
+                count = 2 * numbers.pop()
+            if len(numbers) == count:
+                break
+        block_lasts = list(accumulate(numbers[0::2]))
+        block_starts = list(accumulate(numbers[1::2], initial=pos))
+        return block_lasts, block_starts
+
+    @staticmethod
+    def decode(encoded_postings_list):
+        """
+        Decodes seluruh postings_list dari sebuah stream of bytes
+
+        Returns
+        -------
+        List[int]
+            list of docIDs yang merupakan hasil decoding dari encoded_postings_list
+        """
+        _, block_starts = BlockVBEPostings.decode_skip_table(encoded_postings_list)
+        return VBEPostings.decode(encoded_postings_list[block_starts[0]:])
+
+    @staticmethod
+    def cursor(encoded_postings_list, stats=None):
+        return BlockPostingsCursor(encoded_postings_list, stats)
+
+    # term frequencies tidak perlu skip table, di-encode seperti VBEPostings
+    encode_tf = VBEPostings.encode_tf
+    decode_tf = VBEPostings.decode_tf
+    encode_tf_many = VBEPostings.encode_tf_many
+
+
+class BlockPostingsCursor:
+    """
+    Cursor untuk postings list dengan format BlockVBEPostings. Hanya skip
+    table dan block-block yang benar-benar dikunjungi yang di-decode;
+    banyaknya docID yang di-decode dicatat sebagai postings_decoded di stats
+    (util.Stats, opsional).
+
+    Attributes
+    ----------
+    doc: int
+        docID pada posisi cursor saat ini, None jika cursor sudah habis
+    """
+
+    def __init__(self, encoded_postings_list, stats=None):
+        self.encoded_postings_list = encoded_postings_list
+        self.stats = stats
+        self.block_lasts, self.block_starts = BlockVBEPostings.decode_skip_table(
+            encoded_postings_list)
+        self.block = -1
+        self.docs = []
+        self.pos = 0
+        self.doc = None
+        self.load_block(0)
+
+    def load_block(self, block):
+        self.block = block
+        self.pos = 0
+        if block >= len(self.block_lasts):
+            self.docs = []
+            self.doc = None
+            return
+        gaps = VBEPostings.vb_decode(
+            self.encoded_postings_list[self.block_starts[block]:self.block_starts[block + 1]])
+        base = self.block_lasts[block - 1] if block > 0 else 0
+        self.docs = list(accumulate(gaps, initial=base))[1:]
+        if self.stats is not None:
+            self.stats.add('postings_decoded', len(self.docs))
+        self.doc = self.docs[0]
+
+    @property
+    def rank(self):
+        """Indeks posting saat ini di seluruh postings list"""
+        return self.block * BlockVBEPostings.BLOCK_SIZE + self.pos
+
+    def next(self):
+        """Maju ke docID berikutnya, dan kembalikan docID tersebut (None jika habis)"""
+        if self.doc is None:
+            return None
+        self.pos += 1
+        if self.pos < len(self.docs):
+            self.doc = self.docs[self.pos]
+        else:
+            self.load_block(self.block + 1)
+        return self.doc
+
+    def next_geq(self, doc_id):
+        """
+        Maju ke docID pertama yang >= doc_id (cursor tidak pernah mundur), dan
+        kembalikan docID tersebut (None jika habis). Block-block di antaranya
+        dilompati dengan bantuan skip table.
+        """
+        if self.doc is None or self.doc >= doc_id:
+            return self.doc
+        if self.block_lasts[self.block] < doc_id:
+            block = bisect_left(self.block_lasts, doc_id, self.block + 1)
+            self.load_block(block)
+            if self.doc is None or self.doc >= doc_id:
+                return self.doc
+        self.pos = bisect_left(self.docs, doc_id, self.pos)
+        self.doc = self.docs[self.pos]
+        return self.doc
 
 
 if __name__ == '__main__':
@@ -272,7 +869,7 @@ if __name__ == '__main__':
     # import random
     # for i in range (100*500):
     # postings_list.append(postings_list[-1] + random.randint(1, 1000))
-    for Postings in [StandardPostings, VBEPostings, BICPostings]:
+    for Postings in [StandardPostings, VBEPostings, BICPostings, BlockVBEPostings]:
         print(Postings.__name__)
         encoded_postings_list = Postings.encode(postings_list)
         print("byte hasil encode: ", encoded_postings_list)
@@ -281,4 +878,76 @@ if __name__ == '__main__':
             encoded_postings_list, n=len(postings_list))
         print("hasil decoding: ", decoded_posting_list)
         assert decoded_posting_list == postings_list, "hasil decoding tidak sama dengan postings original"
+        tf_list = [3, 1, 130, 1, 7]
+        encoded_tf_list = Postings.encode_tf(tf_list)
+        decoded_tf_list = Postings.decode_tf(encoded_tf_list) if Postings != BICPostings else Postings.decode_tf(
+            encoded_tf_list, n=len(tf_list))
+        assert decoded_tf_list == tf_list, "hasil decoding tidak sama dengan TF original"
+        if hasattr(Postings, 'concatenate'):
+            parts = [postings_list[:2], postings_list[2:3], postings_list[3:]]
+            assert Postings.concatenate([Postings.encode(p) for p in parts], [p[-1] for p in parts]) == \
+                encoded_postings_list, "hasil concatenate salah"
+            assert Postings.concatenate([Postings.encode(p) for p in parts[::-1]],
+                                        [p[-1] for p in parts[::-1]]) is None, "concatenate harus gagal"
+            assert Postings.concatenate_tf([Postings.encode_tf(tf_list[:2]), Postings.encode_tf(tf_list[2:])]) == \
+                encoded_tf_list, "hasil concatenate_tf salah"
         print()
+
+    # Micro-benchmark: VBE loop Python (vb_encode/vb_decode) vs vectorized
+    import random
+    import timeit
+    random.seed(0)
+    long_list = sorted(random.sample(range(10 ** 7), 10 ** 5))
+    short_lists = [sorted(random.sample(range(10 ** 5), random.randint(1, 20)))
+                   for _ in range(10 ** 4)]
+
+    def scalar_encode(p):
+        return VBEPostings.vb_encode([p[0]] + [b - a for a, b in zip(p, p[1:])])
+
+    def scalar_decode(e):
+        start = 0
+        return [start := start + a for a in VBEPostings.vb_decode(e)]
+
+    encoded_long = VBEPostings.encode(long_list)
+    encoded_short = VBEPostings.encode_many(short_lists)
+    assert encoded_long == scalar_encode(long_list), "hasil vectorized encode berbeda"
+    assert encoded_short == [scalar_encode(p) for p in short_lists], "hasil encode_many berbeda"
+    assert VBEPostings.decode(encoded_long) == long_list, "hasil vectorized decode berbeda"
+    assert VBEPostings.decode_many(encoded_short) == short_lists, "hasil decode_many berbeda"
+    assert VBEPostings.encode_tf_many(short_lists) == [VBEPostings.vb_encode(p) for p in short_lists], \
+        "hasil encode_tf_many berbeda"
+    assert VBEPostings.decode_tf(VBEPostings.encode_tf(long_list)) == long_list, "hasil encode_tf berbeda"
+
+    positions_lists = [[0, 4, 200], [7], [3, 9]]
+    encoded_positions = VBEPostings.encode_positions(positions_lists)
+    assert [PositionsList(encoded_positions, [3, 1, 2])[i] for i in (2, 0, 1)] == [
+        [3, 9], [0, 4, 200], [7]], "hasil decode positions salah"
+    lazy_positions = PositionsList(encoded_positions, VBEPostings.encode_tf([3, 1, 2]), 3)
+    assert [lazy_positions[i] for i in (1, 2, 0)] == [[7], [3, 9], [0, 4, 200]], "hasil decode positions salah"
+    assert len(lazy_positions) == 3, "panjang positions list salah"
+    long_positions = [[i, i + 200] for i in range(1000)]
+    lazy_positions = PositionsList(VBEPostings.encode_positions(long_positions),
+                                   VBEPostings.encode_tf([2] * 1000), 1000)
+    assert [lazy_positions[i] for i in (0, 700, 999, 3)] == [long_positions[i] for i in (0, 700, 999, 3)], \
+        "hasil decode positions salah"
+    assert VBEPostings.encode_positions_many(np.array([0, 4, 200, 7, 3, 9]), np.array([3, 1, 2]),
+                                             np.array([0, 2, 3])) == [
+        VBEPostings.encode_positions(positions_lists[:2]),
+        VBEPostings.encode_positions(positions_lists[2:])], "hasil encode_positions_many berbeda"
+
+    benchmarks = [
+        ("encode 1 x 100000", lambda: scalar_encode(long_list),
+         lambda: VBEPostings.encode(long_list)),
+        ("decode 1 x 100000", lambda: scalar_decode(encoded_long),
+         lambda: VBEPostings.decode(encoded_long)),
+        ("encode 10000 x ~10", lambda: [scalar_encode(p) for p in short_lists],
+         lambda: VBEPostings.encode_many(short_lists)),
+        ("decode 10000 x ~10", lambda: [scalar_decode(e) for e in encoded_short],
+         lambda: VBEPostings.decode_many(encoded_short)),
+    ]
+    print("VBEPostings micro-benchmark")
+    for name, scalar, vectorized in benchmarks:
+        t_scalar = min(timeit.repeat(scalar, number=1, repeat=5))
+        t_vectorized = min(timeit.repeat(vectorized, number=1, repeat=5))
+        print(f"{name:>20}: {t_scalar * 1000:8.2f} ms -> {t_vectorized * 1000:8.2f} ms "
+              f"({t_scalar / t_vectorized:.1f}x)")
@@ -1,7 +1,152 @@
-import pickle
+import array
+import contextlib
+import mmap
 import os
+import struct
+import threading
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from collections.abc import Mapping
+from itertools import accumulate, chain, repeat
 
-from compression import BICPostings
+import numpy as np
+
+from compression import BICPostings, BlockVBEPostings, PositionsList, VBEPostings
+from util import ChainCursor, PostingsListCursor
+
+
+class PostingsDict(Mapping):
+    """
+    Implementasi kolumnar dari postings_dict: kolom termID 'I' yang terurut,
+    dan delapan kolom sejajar (offset 'Q', banyaknya postings 'I', panjang
+    postings list dan panjang TF list dalam bytes 'I', TF terbesar 'I',
+    offset 'Q' dan panjang 'I' dari posisi-posisi term di positions file,
+    serta docID terakhir di postings list 'I'). Sebuah term dicari dengan
+    binary search di kolom termID, sehingga satu term hanya memakan 44 bytes
+    (bukan dict entry + tuple Python), dan ukuran dictionary sebuah index
+    (misalnya segment atau intermediate index) sebanding dengan banyaknya
+    term di index tersebut, bukan dengan termID terbesar di seluruh koleksi.
+
+    Semantik lookup sama dengan dictionary biasa, postings_dict[termID]
+    mengembalikan 7-tuple (start_position_in_index_file,
+    number_of_postings_in_list, length_in_bytes_of_postings_list,
+    length_in_bytes_of_tf_list, max_tf, start_position_in_positions_file,
+    length_in_bytes_of_positions). docID terakhir sebuah term (dipakai merge
+    untuk menyambung postings list tanpa decoding) diakses dengan last_doc.
+
+    Format file (header little-endian, kolom-kolom dengan byte order native
+    dari array.array):
+        MAGIC, header <count, banyaknya terms> (2 x uint64),
+        term_ids (count x 4 bytes), offsets (count x 8 bytes), dfs (count x 4 bytes),
+        lengths (count x 4 bytes), tf_lengths (count x 4 bytes),
+        max_tfs (count x 4 bytes), positions_offsets (count x 8 bytes),
+        positions_lengths (count x 4 bytes), last_docs (count x 4 bytes),
+        terms (urutan termID saat ditulis, 4 bytes per term)
+
+    dimana count = banyaknya term di index. Seluruh file dimuat dengan satu
+    kali read dan satu array.frombytes per kolom.
+    """
+
+    MAGIC = b'PDICT\x05'
+    HEADER = struct.Struct('<QQ')
+
+    def __init__(self):
+        self.term_ids = array.array('I')
+        self.offsets = array.array('Q')
+        self.dfs = array.array('I')
+        self.lengths = array.array('I')
+        self.tf_lengths = array.array('I')
+        self.max_tfs = array.array('I')
+        self.positions_offsets = array.array('Q')
+        self.positions_lengths = array.array('I')
+        self.last_docs = array.array('I')
+
+    def columns(self):
+        """Semua kolom, sesuai urutan di file"""
+        return (self.term_ids, self.offsets, self.dfs, self.lengths, self.tf_lengths, self.max_tfs,
+                self.positions_offsets, self.positions_lengths, self.last_docs)
+
+    def find(self, term):
+        """Indeks baris term di kolom-kolom, atau -1 jika term tidak ada"""
+        if type(term) is not int:
+            return -1
+        i = bisect_left(self.term_ids, term)
+        return i if i < len(self.term_ids) and self.term_ids[i] == term else -1
+
+    def __getitem__(self, term):
+        i = self.find(term)
+        if i < 0:
+            raise KeyError(term)
+        return (self.offsets[i], self.dfs[i], self.lengths[i], self.tf_lengths[i], self.max_tfs[i],
+                self.positions_offsets[i], self.positions_lengths[i])
+
+    def __contains__(self, term):
+        return self.find(term) >= 0
+
+    def __setitem__(self, term, value):
+        self.put(term, value, 0)
+
+    def put(self, term, value, last_doc):
+        """
+        Menyimpan 7-tuple value (lihat __getitem__) dan docID terakhir dari
+        term. Term yang ditambahkan dengan termID menaik (urutan penulisan
+        BSBI) cukup di-append ke setiap kolom.
+        """
+        row = (term,) + tuple(value) + (last_doc,)
+        if len(self.term_ids) == 0 or self.term_ids[-1] < term:
+            for column, item in zip(self.columns(), row):
+                column.append(item)
+            return
+        i = bisect_left(self.term_ids, term)
+        if self.term_ids[i] == term:
+            for column, item in zip(self.columns(), row):
+                column[i] = item
+        else:
+            for column, item in zip(self.columns(), row):
+                column.insert(i, item)
+
+    def __iter__(self):
+        return iter(self.term_ids)
+
+    def last_doc(self, term):
+        """docID terakhir di postings list term"""
+        i = self.find(term)
+        if i < 0:
+            raise KeyError(term)
+        return self.last_docs[i]
+
+    def __len__(self):
+        return len(self.term_ids)
+
+    def dump(self, terms, f):
+        """Menulis postings_dict dan terms (urutan term di index) ke file f"""
+        f.write(PostingsDict.MAGIC)
+        f.write(PostingsDict.HEADER.pack(len(self.term_ids), len(terms)))
+        for column in self.columns():
+            f.write(column.tobytes())
+        f.write(array.array('I', terms).tobytes())
+
+    @staticmethod
+    def load(data):
+        """
+        Kebalikan dari dump.
+
+        Returns
+        -------
+        Tuple[PostingsDict, array]
+            postings_dict dan terms
+        """
+        data = memoryview(data)
+        pos = len(PostingsDict.MAGIC)
+        count, n_terms = PostingsDict.HEADER.unpack_from(data, pos)
+        pos += PostingsDict.HEADER.size
+
+        postings_dict = PostingsDict()
+        terms = array.array('I')
+        for column, n in chain(zip(postings_dict.columns(), repeat(count)), [(terms, n_terms)]):
+            column.frombytes(data[pos:pos + column.itemsize * n])
+            pos += column.itemsize * n
+        return postings_dict, terms
 
 
 class InvertedIndex:
@@ -22,8 +167,9 @@ class InvertedIndex:
         Inverted Index. postings_dict ini diasumsikan dapat dimuat semuanya
         di memori.
 
-        Seperti namanya, "Dictionary" diimplementasikan sebagai python's Dictionary
-        yang memetakan term ID (integer) ke 3-tuple:
+        Seperti namanya, "Dictionary" berperilaku seperti python's Dictionary
+        (diimplementasikan secara kolumnar oleh PostingsDict, lihat di atas)
+        yang memetakan term ID (integer) ke 7-tuple:
            1. start_position_in_index_file : (dalam satu bytes) posisi dimana
               postings yang bersesuaian berada di file (storage). Kita bisa
               menggunakan operasi "seek" untuk mencapainya.
@@ -31,14 +177,30 @@ class InvertedIndex:
               postings
            3. length_in_bytes_of_postings_list : panjang postings list dalam
               satuan byte.
+           4. length_in_bytes_of_tf_list : panjang list of term frequencies
+              dari postings list terkait dalam satuan byte. TF list disimpan
+              tepat setelah postings list di index file.
+           5. max_tf : term frequency terbesar di postings list (untuk upper
+              bound skor pada top-k retrieval)
+           6. start_position_in_positions_file : posisi (dalam bytes) posisi-
+              posisi kemunculan term di positions file (hanya untuk index
+              positional, 0 jika tidak)
+           7. length_in_bytes_of_positions : panjang posisi-posisi tersebut
+              dalam satuan byte (0 jika index tidak positional)
 
     terms: List[int]
         List of terms IDs, untuk mengingat urutan terms yang dimasukan ke
         dalam Inverted Index.
 
+    positional: bool
+        True jika index menyimpan posisi kemunculan term di setiap dokumen.
+        Posisi disimpan di file terpisah (positions file, <index_name>.pos),
+        sehingga query yang tidak memerlukan posisi tidak membacanya sama
+        sekali.
+
     """
 
-    def __init__(self, index_name, postings_encoding, directory=''):
+    def __init__(self, index_name, postings_encoding, directory='', positional=False, stats=None):
         """
         Parameters
         ----------
@@ -46,15 +208,24 @@ class InvertedIndex:
         postings_encoding : Lihat di compression.py, kandidatnya adalah StandardPostings,
                         GapBasedPostings, dsb.
         directory (str): directory dimana file index berada
+        positional (bool): (hanya untuk writer) apakah posisi term disimpan;
+                        reader menentukannya dari keberadaan positions file
+        stats (util.Stats): Jika diberikan, bytes yang dibaca/ditulis, seek,
+                        dan banyaknya postings yang di-decode/ditulis dicatat
+                        di sini
         """
 
         self.index_file_path = os.path.join(directory, index_name+'.index')
         self.metadata_file_path = os.path.join(directory, index_name+'.dict')
+        self.positions_file_path = os.path.join(directory, index_name+'.pos')
+        self.positional = positional
+        self.positions_file = None
+        self.stats = stats
 
         self.postings_encoding = postings_encoding
         self.directory = directory
 
-        self.postings_dict = {}
+        self.postings_dict = PostingsDict()
         self.terms = []  # Untuk keep track urutan term yang dimasukkan ke index
 
     def __enter__(self):
@@ -65,39 +236,213 @@ class InvertedIndex:
             2. iterator untuk List yang berisi urutan term yang masuk ke
                 index saat konstruksi. ---> term_iter
 
-        Metadata disimpan ke file dengan bantuan library "pickle"
+        Metadata disimpan ke file dalam format PostingsDict.
+
+        Raises
+        ------
+        ValueError
+            jika metadata bukan format PostingsDict versi saat ini (index
+            lama, misalnya yang metadata-nya disimpan dengan pickle); index
+            tersebut harus dibuat ulang
 
         Perlu memahani juga special method __enter__(..) pada Python dan juga
         konsep Context Manager di Python. Silakan pelajari link berikut:
 
         https://docs.python.org/3/reference/datamodel.html#object.__enter__
         """
-        # Membuka index file
-        self.index_file = open(self.index_file_path, 'rb+')
-
         # Kita muat postings dict dan terms iterator dari file metadata
         with open(self.metadata_file_path, 'rb') as f:
-            self.postings_dict, self.terms = pickle.load(f)
-            self.term_iter = self.terms.__iter__()
+            data = f.read()
+        if not data.startswith(PostingsDict.MAGIC):
+            raise ValueError("format metadata " + self.metadata_file_path +
+                             " tidak didukung (index lama), lakukan indexing ulang")
+        self.postings_dict, self.terms = PostingsDict.load(data)
+
+        # Membuka index file
+        self.index_file = open(self.index_file_path, 'rb')
+        self.term_iter = self.terms.__iter__()
+
+        # Positions file (jika ada) dibuka, namun tidak dibaca sama sekali
+        # sampai posisi sebuah term diminta
+        self.positional = os.path.exists(self.positions_file_path)
+        if self.positional:
+            self.positions_file = open(self.positions_file_path, 'rb')
 
         return self
 
     def __exit__(self, exception_type, exception_value, traceback):
-        """Menutup index_file dan menyimpan postings_dict dan terms ketika keluar context"""
+        """Menutup index_file (dan positions file) ketika keluar context"""
         # Menutup index file
         self.index_file.close()
+        if self.positions_file is not None:
+            self.positions_file.close()
+
+
+class PostingsCache:
+    """
+    Cache postings list yang sudah di-decode, dengan key termID. Postings list
+    disimpan apa adanya sebagai list of docIDs (sehingga cache hit tidak perlu
+    membuat list baru), dan total perkiraan ukurannya (ENTRY_BYTES per docID)
+    dibatasi oleh max_bytes. List yang dikembalikan get() dipakai bersama,
+    jadi tidak boleh diubah oleh pemanggil.
+
+    Eviction menggunakan LRU, namun admission memperhatikan frekuensi akses
+    (mirip TinyLFU): sebuah postings list hanya masuk cache jika term-nya sudah
+    diakses minimal min_frequency kali, dan hanya jika frekuensinya tidak lebih
+    kecil dari entry-entry yang harus di-evict untuk memberinya tempat.
+    Dengan begitu postings list besar yang hanya sekali diakses tidak
+    menggusur postings list dari term-term yang sering di-query.
+
+    Frekuensi akses di-aging (dibagi dua) setiap aging_period akses, sehingga
+    term yang dulu populer tidak menempati cache selamanya.
 
-        # Menyimpan metadata (postings dict dan terms) ke file metadata dengan bantuan pickle
-        with open(self.metadata_file_path, 'wb') as f:
-            pickle.dump([self.postings_dict, self.terms], f)
+    Attributes
+    ----------
+    hits, misses: int
+        Banyaknya lookup yang ditemukan / tidak ditemukan di cache
+    evictions: int
+        Banyaknya entry yang di-evict untuk memberi tempat entry baru
+    rejections: int
+        Banyaknya postings list yang tidak di-admit ke cache
+    bytes: int
+        Total ukuran postings list yang ada di cache saat ini
+    """
+
+    # perkiraan ukuran satu docID di dalam list: pointer 8 byte + objek int
+    ENTRY_BYTES = 36
+
+    def __init__(self, max_bytes, min_frequency=2, aging_period=100000):
+        self.max_bytes = max_bytes
+        self.min_frequency = min_frequency
+        self.aging_period = aging_period
+        self.entries = OrderedDict()
+        self.frequency = {}
+        self.accesses = 0
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.rejections = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, term):
+        """Kembalikan postings list (list) dari term, atau None jika tidak ada di cache"""
+        with self.lock:
+            self.frequency[term] = self.frequency.get(term, 0) + 1
+            self.accesses += 1
+            if self.accesses >= self.aging_period:
+                self.age()
+            postings = self.entries.get(term)
+            if postings is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.entries.move_to_end(term)
+            return postings
+
+    def wants(self, term):
+        """True jika term cukup sering diakses untuk dipertimbangkan masuk cache"""
+        return self.frequency.get(term, 0) >= self.min_frequency and term not in self.entries
+
+    def put(self, term, postings_list):
+        """
+        Menawarkan postings list dari term (yang baru saja di-decode setelah
+        get(term) miss) untuk disimpan di cache.
+        """
+        with self.lock:
+            size = self.ENTRY_BYTES * len(postings_list)
+            frequency = self.frequency.get(term, 0)
+            if term in self.entries or size > self.max_bytes or frequency < self.min_frequency:
+                self.rejections += term not in self.entries
+                return
+
+            victims = []
+            freed = 0
+            for victim in self.entries:
+                if self.bytes - freed + size <= self.max_bytes:
+                    break
+                if self.frequency.get(victim, 0) > frequency:
+                    self.rejections += 1
+                    return
+                victims.append(victim)
+                freed += self.ENTRY_BYTES * len(self.entries[victim])
+
+            for victim in victims:
+                del self.entries[victim]
+            self.evictions += len(victims)
+            self.entries[term] = postings_list
+            self.bytes += size - freed
+
+    def age(self):
+        """Membagi dua semua frekuensi akses, dan membuang yang menjadi 0"""
+        self.frequency = {term: count // 2 for term, count in self.frequency.items() if count > 1}
+        self.accesses = 0
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self):
+        """Statistik cache dalam bentuk dictionary"""
+        return {'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hit_rate,
+                'entries': len(self.entries), 'bytes': self.bytes, 'max_bytes': self.max_bytes,
+                'evictions': self.evictions, 'rejections': self.rejections}
 
 
 class InvertedIndexReader(InvertedIndex):
     """
     Class yang mengimplementasikan bagaimana caranya scan atau membaca secara
     efisien Inverted Index yang disimpan di sebuah file.
+
+    Jika use_mmap=True, index file di-memory-map ketika memasuki context dan
+    postings list diberikan ke decoder sebagai slice memoryview dari mapping
+    tersebut: tanpa syscall seek/read dan tanpa copy ke object bytes baru.
+    Beberapa reader untuk file yang sama (juga di process yang berbeda)
+    berbagi page cache yang sama dari OS.
+
+    Jika cache (PostingsCache) diberikan, postings list yang sudah di-decode
+    oleh get_postings_list disimpan dan dipakai ulang dari cache tersebut.
     """
 
+    def __init__(self, index_name, postings_encoding, directory='', use_mmap=False, cache=None, stats=None):
+        super().__init__(index_name, postings_encoding, directory, stats=stats)
+        self.use_mmap = use_mmap
+        self.cache = cache
+        self.index_mmap = None
+        self.index_view = None
+        self.positions_mmap = None
+        self.positions_view = None
+
+    def __enter__(self):
+        super().__enter__()
+        if self.use_mmap and os.path.getsize(self.index_file_path) > 0:
+            self.index_mmap = mmap.mmap(self.index_file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.index_view = memoryview(self.index_mmap)
+        if self.use_mmap and self.positional and os.path.getsize(self.positions_file_path) > 0:
+            self.positions_mmap = mmap.mmap(self.positions_file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.positions_view = memoryview(self.positions_mmap)
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        for mapping, view in [(self.index_mmap, self.index_view),
+                              (self.positions_mmap, self.positions_view)]:
+            if mapping is None:
+                continue
+            view.release()
+            try:
+                mapping.close()
+            except BufferError:
+                # masih ada slice memoryview yang dipegang (misalnya oleh
+                # cursor); mapping akan ditutup ketika slice tersebut di-GC
+                pass
+        self.index_mmap = self.index_view = None
+        self.positions_mmap = self.positions_view = None
+        super().__exit__(exception_type, exception_value, traceback)
+
     def __iter__(self):
         return self
 
@@ -118,7 +463,9 @@ class InvertedIndexReader(InvertedIndex):
         Ketika instance dari kelas InvertedIndexReader ini digunakan
         sebagai iterator pada sebuah loop scheme, special method __next__(...)
         bertugas untuk mengembalikan pasangan (term, postings_list) berikutnya
-        pada inverted index.
+        pada inverted index, beserta list of term frequencies-nya, yaitu
+        3-tuple (term, postings_list, tf_list). Untuk index positional,
+        dikembalikan 4-tuple (term, postings_list, tf_list, positions_lists).
 
         PERHATIAN! method ini harus mengembalikan sebagian kecil data dari
         file index yang besar. Mengapa hanya sebagian kecil? karena agar muat
@@ -126,7 +473,63 @@ class InvertedIndexReader(InvertedIndex):
         """
         term = next(self.term_iter)
         postings_list = self.get_postings_list(term)
-        return (term, postings_list)
+        tf_list = self.get_tf_list(term)
+        if self.positional:
+            positions_list = self.get_positions_list(term, tf_list)
+            return (term, postings_list, tf_list, [positions_list[i] for i in range(len(tf_list))])
+        return (term, postings_list, tf_list)
+
+    def scan(self, buffer_size=1 << 20, encoded=False):
+        """
+        Sama seperti iterasi reader (__next__), namun index file (dan
+        positions file) dibaca secara sekuensial melalui buffer read-ahead
+        sebesar buffer_size bytes, tanpa seek per term: postings list ditulis
+        writer dengan urutan yang sama dengan self.terms, sehingga term
+        berikutnya selalu berada tepat setelah term sebelumnya. Dipakai oleh
+        merge, dimana banyak index dibaca bersamaan.
+
+        Yields
+        ------
+        Tuple
+            (term, postings_list, tf_list[, positions_lists]), lihat __next__;
+            atau jika encoded, (term, number_of_postings_in_list, max_tf,
+            last_doc, encoded_postings_list, encoded_tf_list,
+            encoded_positions) tanpa decoding
+        """
+        with contextlib.ExitStack() as stack:
+            index_file = stack.enter_context(open(self.index_file_path, 'rb', buffering=buffer_size))
+            if self.positional:
+                positions_file = stack.enter_context(open(self.positions_file_path, 'rb', buffering=buffer_size))
+            offset = positions_offset = 0
+            for term in self.terms:
+                start, postings_count, length, tf_length, max_tf, positions_start, positions_length = \
+                    self.postings_dict[term]
+                if self.stats is not None:
+                    self.stats.update(bytes_read=length + tf_length + positions_length,
+                                      seeks=(start != offset) + (self.positional and positions_start != positions_offset))
+                if start != offset:
+                    index_file.seek(start)
+                encoded_postings_list = index_file.read(length)
+                encoded_tf_list = index_file.read(tf_length)
+                offset = start + length + tf_length
+                encoded_positions = b""
+                if self.positional:
+                    if positions_start != positions_offset:
+                        positions_file.seek(positions_start)
+                    encoded_positions = positions_file.read(positions_length)
+                    positions_offset = positions_start + positions_length
+                if encoded:
+                    yield (term, postings_count, max_tf, self.postings_dict.last_doc(term),
+                           encoded_postings_list, encoded_tf_list, encoded_positions)
+                    continue
+
+                postings_list = self.decode(encoded_postings_list, postings_count)
+                tf_list = self.decode_tf(encoded_tf_list, postings_count)
+                if not self.positional:
+                    yield (term, postings_list, tf_list)
+                    continue
+                positions_list = PositionsList(encoded_positions, tf_list)
+                yield (term, postings_list, tf_list, [positions_list[i] for i in range(len(tf_list))])
 
     def get_postings_list(self, term):
         """
@@ -137,41 +540,308 @@ class InvertedIndexReader(InvertedIndex):
         byte tertentu pada file (index file) dimana postings list dari
         term disimpan.
         """
+        if self.cache is None:
+            return self.decode_postings_list(term)
+
+        postings = self.cache.get(term)
+        if postings is not None:
+            return postings
+        postings_list = self.decode_postings_list(term)
+        self.cache.put(term, postings_list)
+        return postings_list
+
+    def decode_postings_list(self, term):
+        """Membaca dan men-decode postings list sebuah term dari index file (tanpa cache)"""
         term_posting_dict = self.postings_dict[term]
-        self.index_file.seek(term_posting_dict[0])
+        return self.decode(self.read_encoded(term_posting_dict), term_posting_dict[1])
+
+    def decode(self, encoded_postings_list, postings_count):
+        """Decode postings list dengan postings_count docID"""
+        if self.stats is not None:
+            self.stats.add('postings_decoded', postings_count)
         if self.postings_encoding == BICPostings:
-            postings_list = self.postings_encoding.decode(
-            self.index_file.read(term_posting_dict[2]), n = term_posting_dict[1])
-        else:
-            postings_list = self.postings_encoding.decode(
-                self.index_file.read(term_posting_dict[2]))
+            return self.postings_encoding.decode(encoded_postings_list, n=postings_count)
+        return self.postings_encoding.decode(encoded_postings_list)
+
+    def decode_tf(self, encoded_tf_list, postings_count):
+        """Decode TF list dengan postings_count elemen"""
+        if self.postings_encoding == BICPostings:
+            return self.postings_encoding.decode_tf(encoded_tf_list, n=postings_count)
+        return self.postings_encoding.decode_tf(encoded_tf_list)
+
+    def get_tf_list(self, term):
+        """
+        Kembalikan list of term frequencies untuk sebuah term, sejajar dengan
+        postings list dari get_postings_list(term).
+        """
+        term_posting_dict = self.postings_dict[term]
+        return self.decode_tf(self.read_encoded(term_posting_dict, tf=True), term_posting_dict[1])
+
+    def get_positions_list(self, term, tf_list=None):
+        """
+        Kembalikan posisi-posisi term di setiap dokumen pada postings list-nya,
+        sebagai compression.PositionsList: positions_list[i] adalah posisi term
+        di dokumen ke-i pada postings list, dan hanya di-decode ketika diakses.
+        Jika tf_list tidak diberikan dan TF list di-encode dengan VBE, TF list
+        juga hanya di-decode sampai posting yang diakses.
+
+        Raises
+        ------
+        ValueError
+            jika index tidak positional
+        """
+        if not self.positional:
+            raise ValueError("index " + self.index_file_path + " tidak menyimpan posisi term")
+        term_posting_dict = self.postings_dict[term]
+        if tf_list is None:
+            if self.postings_encoding.decode_tf is VBEPostings.decode_tf:
+                tf_list = self.read_encoded(term_posting_dict, tf=True)
+            else:
+                tf_list = self.get_tf_list(term)
+        start, length = term_posting_dict[5:7]
+        if self.stats is not None:
+            self.stats.update(bytes_read=length, seeks=self.positions_view is None)
+        if self.positions_view is not None:
+            return PositionsList(self.positions_view[start:start + length], tf_list, term_posting_dict[1])
+        self.positions_file.seek(start)
+        return PositionsList(self.positions_file.read(length), tf_list, term_posting_dict[1])
+
+    def read_encoded(self, term_posting_dict, tf=False):
+        """
+        Kembalikan encoded postings list (atau, jika tf=True, encoded list of
+        term frequencies) yang ditunjuk oleh term_posting_dict (entry dari
+        self.postings_dict): sebagai slice memoryview jika use_mmap, atau
+        bytes hasil seek dan read dari index file.
+        """
+        start, _, length = term_posting_dict[:3]
+        if tf:
+            start, length = start + length, term_posting_dict[3]
+        if self.stats is not None:
+            self.stats.update(bytes_read=length, seeks=self.index_view is None)
+        if self.index_view is not None:
+            return self.index_view[start:start + length]
+        self.index_file.seek(start)
+        return self.index_file.read(length)
+
+    def get_cursor(self, term):
+        """
+        Kembalikan cursor (lihat util.PostingsListCursor) untuk postings list
+        sebuah term. Jika postings_encoding mendukung cursor (misalnya
+        BlockVBEPostings), postings list hanya di-decode sebagian sesuai
+        pergerakan cursor; jika tidak, postings list di-decode seluruhnya.
+
+        Dengan cache, postings list yang ada di cache langsung dipakai, dan
+        postings list dari term yang akan di-admit ke cache di-decode
+        seluruhnya agar bisa disimpan di cache.
+        """
+        if not hasattr(self.postings_encoding, 'cursor'):
+            return PostingsListCursor(self.get_postings_list(term))
+        if self.cache is not None:
+            postings = self.cache.get(term)
+            if postings is not None:
+                return PostingsListCursor(postings)
+            if self.cache.wants(term):
+                postings_list = self.decode_postings_list(term)
+                self.cache.put(term, postings_list)
+                return PostingsListCursor(postings_list)
+        return self.postings_encoding.cursor(self.read_encoded(self.postings_dict[term]), stats=self.stats)
+
+
+class SegmentedPostingsDict(Mapping):
+    """
+    Gabungan postings_dict dari beberapa segment index. postings_dict[termID]
+    mengembalikan 7-tuple seperti PostingsDict, dengan number_of_postings_in_list
+    adalah total df di semua segment dan max_tf adalah TF terbesar di semua
+    segment; posisi dan panjang (yang berbeda untuk setiap segment) bernilai None.
+    """
+
+    def __init__(self, postings_dicts):
+        self.postings_dicts = postings_dicts
+
+    def __getitem__(self, term):
+        entries = [postings_dict[term] for postings_dict in self.postings_dicts if term in postings_dict]
+        if len(entries) == 0:
+            raise KeyError(term)
+        return (None, sum(entry[1] for entry in entries), None, None,
+                max(entry[4] for entry in entries), None, None)
+
+    def __contains__(self, term):
+        return any(term in postings_dict for postings_dict in self.postings_dicts)
+
+    def __iter__(self):
+        return iter(sorted(set().union(*self.postings_dicts)))
+
+    def __len__(self):
+        return len(set().union(*self.postings_dicts))
+
+
+class SegmentedPositionsList:
+    """Gabungan PositionsList sebuah term dari beberapa segment"""
+
+    def __init__(self, positions_lists):
+        self.positions_lists = positions_lists
+        self.offsets = list(accumulate(map(len, positions_lists), initial=0))
+
+    def __len__(self):
+        return self.offsets[-1]
+
+    def __getitem__(self, i):
+        segment = bisect_right(self.offsets, i) - 1
+        return self.positions_lists[segment][i - self.offsets[segment]]
+
+
+class SegmentedIndexReader:
+    """
+    Reader untuk index yang terdiri dari beberapa segment (masing-masing
+    sebuah inverted index yang immutable, lihat BSBIIndex.update), dengan
+    interface query yang sama dengan InvertedIndexReader (postings_dict,
+    get_postings_list, get_tf_list, get_positions_list, get_cursor).
+
+    Rentang docID segment-segment tidak saling beririsan dan terurut sesuai
+    urutan segment_names, sehingga postings list sebuah term adalah gabungan
+    (concatenation) postings list term tersebut di setiap segment, dan cursor
+    sebuah term adalah ChainCursor dari cursor-cursor setiap segment.
+
+    Jika cache (PostingsCache) diberikan, postings list gabungan disimpan di
+    cache tersebut (segment-segment tidak mempunyai cache sendiri).
+    """
+
+    def __init__(self, segment_names, postings_encoding, directory='', use_mmap=False, cache=None, stats=None):
+        self.segments = [InvertedIndexReader(name, postings_encoding, directory=directory, use_mmap=use_mmap,
+                                             stats=stats)
+                         for name in segment_names]
+        self.postings_encoding = postings_encoding
+        self.cache = cache
+
+    def __enter__(self):
+        opened = []
+        try:
+            for segment in self.segments:
+                opened.append(segment.__enter__())
+        except BaseException:
+            for segment in opened:
+                segment.__exit__(None, None, None)
+            raise
+        self.postings_dict = SegmentedPostingsDict([segment.postings_dict for segment in self.segments])
+        self.positional = all(segment.positional for segment in self.segments)
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        for segment in self.segments:
+            segment.__exit__(exception_type, exception_value, traceback)
+
+    def segments_with(self, term):
+        return [segment for segment in self.segments if term in segment.postings_dict]
+
+    def get_postings_list(self, term):
+        """Sama seperti InvertedIndexReader.get_postings_list, untuk semua segment"""
+        if self.cache is None:
+            return self.decode_postings_list(term)
+
+        postings = self.cache.get(term)
+        if postings is not None:
+            return postings
+        postings_list = self.decode_postings_list(term)
+        self.cache.put(term, postings_list)
         return postings_list
 
+    def decode_postings_list(self, term):
+        segments = self.segments_with(term)
+        if len(segments) == 0:
+            raise KeyError(term)
+        return list(chain.from_iterable(segment.decode_postings_list(term) for segment in segments))
+
+    def get_tf_list(self, term):
+        return list(chain.from_iterable(segment.get_tf_list(term) for segment in self.segments_with(term)))
+
+    def get_positions_list(self, term, tf_list=None):
+        if not self.positional:
+            raise ValueError("tidak semua segment index menyimpan posisi term")
+        return SegmentedPositionsList([segment.get_positions_list(term) for segment in self.segments_with(term)])
+
+    def get_cursor(self, term):
+        """Sama seperti InvertedIndexReader.get_cursor, untuk semua segment"""
+        if not hasattr(self.postings_encoding, 'cursor'):
+            return PostingsListCursor(self.get_postings_list(term))
+        if self.cache is not None:
+            postings = self.cache.get(term)
+            if postings is not None:
+                return PostingsListCursor(postings)
+            if self.cache.wants(term):
+                postings_list = self.decode_postings_list(term)
+                self.cache.put(term, postings_list)
+                return PostingsListCursor(postings_list)
+        segments = self.segments_with(term)
+        return ChainCursor([segment.get_cursor(term) for segment in segments],
+                           [segment.postings_dict[term][1] for segment in segments])
+
 
 class InvertedIndexWriter(InvertedIndex):
     """
     Class yang mengimplementasikan bagaimana caranya menulis secara
     efisien Inverted Index yang disimpan di sebuah file.
+
+    Index file (dan positions file) ditulis melalui buffer write-behind
+    sebesar buffer_size bytes, sehingga append banyak postings list kecil
+    menjadi sedikit write yang besar.
+
+    Semua file ditulis ke <path>.tmp dan baru menggantikan file lama dengan
+    nama yang sama (os.replace) ketika writer selesai tanpa exception,
+    sehingga reader yang sedang me-memory-map index lama tidak terganggu.
     """
 
+    def __init__(self, index_name, postings_encoding, directory='', positional=False, buffer_size=1 << 20,
+                 stats=None):
+        super().__init__(index_name, postings_encoding, directory, positional, stats)
+        self.buffer_size = buffer_size
+
     def __enter__(self):
-        self.index_file = open(self.index_file_path, 'wb+')
+        self.index_file = open(self.index_file_path + '.tmp', 'wb+', buffering=self.buffer_size)
+        if self.positional:
+            self.positions_file = open(self.positions_file_path + '.tmp', 'wb+', buffering=self.buffer_size)
         return self
 
-    def append(self, term, postings_list):
+    def __exit__(self, exception_type, exception_value, traceback):
+        """
+        Menutup index_file, menyimpan postings_dict dan terms, lalu mengganti
+        file-file index lama ketika keluar context
+        """
+        super().__exit__(exception_type, exception_value, traceback)
+        if exception_type is not None:
+            for path in (self.index_file_path, self.positions_file_path):
+                if os.path.exists(path + '.tmp'):
+                    os.remove(path + '.tmp')
+            return
+
+        # Menyimpan metadata (postings dict dan terms) ke file metadata.
+        # Hanya writer yang menyimpan metadata; reader tidak pernah mengubah index.
+        with open(self.metadata_file_path + '.tmp', 'wb') as f:
+            self.postings_dict.dump(self.terms, f)
+
+        os.replace(self.index_file_path + '.tmp', self.index_file_path)
+        if self.positional:
+            os.replace(self.positions_file_path + '.tmp', self.positions_file_path)
+        elif os.path.exists(self.positions_file_path):
+            # positions file dari index lama dengan nama yang sama
+            os.remove(self.positions_file_path)
+        os.replace(self.metadata_file_path + '.tmp', self.metadata_file_path)
+
+    def append(self, term, postings_list, tf_list, positions_lists=None):
         """
-        Menambahkan (append) sebuah term dan juga postings_list yang terasosiasi
-        ke posisi akhir index file.
+        Menambahkan (append) sebuah term, postings_list, dan juga TF list yang
+        terasosiasi ke posisi akhir index file.
 
         Method ini melakukan 3 hal:
-        1. Encode postings_list menggunakan self.postings_encoding,
+        1. Encode postings_list dan tf_list menggunakan self.postings_encoding,
         2. Menyimpan metadata dalam bentuk self.terms dan self.postings_dict.
            Ingat kembali bahwa self.postings_dict memetakan sebuah termID ke
-           sebuah 3-tuple: - start_position_in_index_file
+           sebuah 5-tuple: - start_position_in_index_file
                            - number_of_postings_in_list
                            - length_in_bytes_of_postings_list
-        3. Menambahkan (append) bystream dari postings_list yang sudah di-encode
-           ke posisi akhir index file di harddisk.
+                           - length_in_bytes_of_tf_list
+                           - max_tf
+        3. Menambahkan (append) bystream dari postings_list dan tf_list yang
+           sudah di-encode ke posisi akhir index file di harddisk.
 
         SEARCH ON YOUR FAVORITE SEARCH ENGINE:
         - Anda mungkin mau membaca tentang Python I/O
@@ -187,59 +857,207 @@ class InvertedIndexWriter(InvertedIndex):
             term atau termID yang merupakan unique identifier dari sebuah term
         postings_list: List[Int]
             List of docIDs dimana term muncul
+        tf_list: List[Int]
+            List of term frequencies, tf_list[i] adalah banyaknya kemunculan
+            term di dokumen postings_list[i]
+        positions_lists: List[List[Int]]
+            (hanya untuk index positional) posisi-posisi term di setiap
+            dokumen, positions_lists[i] berisi tf_list[i] posisi terurut
         """
         encoded_postings_list = self.postings_encoding.encode(postings_list)
+        encoded_tf_list = self.postings_encoding.encode_tf(tf_list)
+        encoded_positions = VBEPostings.encode_positions(positions_lists) if self.positional else b""
+        self.append_encoded(term, len(postings_list), encoded_postings_list,
+                            encoded_tf_list, max(tf_list), postings_list[-1], encoded_positions)
+
+    def append_encoded(self, term, postings_count, encoded_postings_list, encoded_tf_list, max_tf, last_doc,
+                       encoded_positions=b""):
+        """
+        Sama seperti append, namun postings list dan TF list sudah dalam
+        bentuk encoded (hasil self.postings_encoding.encode dan encode_tf).
+
+        Parameters
+        ----------
+        term:
+            term atau termID yang merupakan unique identifier dari sebuah term
+        postings_count: int
+            banyaknya docID di postings list
+        encoded_postings_list: bytes
+            postings list yang sudah di-encode
+        encoded_tf_list: bytes
+            TF list yang sudah di-encode
+        max_tf: int
+            term frequency terbesar di TF list
+        last_doc: int
+            docID terakhir di postings list
+        encoded_positions: bytes
+            hasil VBEPostings.encode_positions (hanya untuk index positional)
+        """
         self.terms.append(term)
 
-        self.postings_dict[term] = (self.index_file.tell(),
-                                    len(postings_list),
-                                    len(encoded_postings_list))
+        self.postings_dict.put(term, (self.index_file.tell(),
+                                      postings_count,
+                                      len(encoded_postings_list),
+                                      len(encoded_tf_list),
+                                      max_tf,
+                                      self.positions_file.tell() if self.positional else 0,
+                                      len(encoded_positions)),
+                               last_doc)
+        if self.stats is not None:
+            self.stats.update(terms_written=1, postings_written=postings_count,
+                              bytes_written=len(encoded_postings_list) + len(encoded_tf_list) + len(encoded_positions))
 
         self.index_file.write(encoded_postings_list)
+        self.index_file.write(encoded_tf_list)
+        if self.positional:
+            self.positions_file.write(encoded_positions)
+
+    def append_block(self, terms, postings, tfs, offsets, positions=None):
+        """
+        Versi bulk dari append: menambahkan banyak term sekaligus, dimana
+        postings list dari semua term disimpan bersebelahan di satu array
+        (lihat bsbi.invert_arrays).
+
+        Parameters
+        ----------
+        terms: Sequence[int]
+            termIDs, dengan urutan yang sama dengan urutan penulisan ke index
+        postings: Sequence[int]
+            gabungan semua postings list
+        tfs: Sequence[int]
+            gabungan semua TF list, sejajar dengan postings
+        offsets: Sequence[int]
+            postings list dari terms[i] adalah postings[offsets[i]:offsets[i + 1]]
+        positions: Sequence[int]
+            (hanya untuk index positional) gabungan posisi-posisi term dari
+            semua posting, terurut per posting (tfs[j] posisi untuk posting j)
+        """
+        if self.positional:
+            encoded_positions = VBEPostings.encode_positions_many(positions, tfs, offsets)
+        else:
+            encoded_positions = repeat(b"")
+        max_tfs = np.maximum.reduceat(tfs, offsets[:-1]).tolist() if len(terms) > 0 else []
+        postings = postings.tolist()
+        tfs = tfs.tolist()
+        offsets = offsets.tolist()
+        postings_lists = [postings[offsets[i]:offsets[i + 1]] for i in range(len(terms))]
+        tf_lists = [tfs[offsets[i]:offsets[i + 1]] for i in range(len(terms))]
+        if hasattr(self.postings_encoding, 'encode_many'):
+            encoded_postings_lists = self.postings_encoding.encode_many(postings_lists)
+        else:
+            encoded_postings_lists = map(self.postings_encoding.encode, postings_lists)
+        if hasattr(self.postings_encoding, 'encode_tf_many'):
+            encoded_tf_lists = self.postings_encoding.encode_tf_many(tf_lists)
+        else:
+            encoded_tf_lists = map(self.postings_encoding.encode_tf, tf_lists)
+        for term, postings_list, encoded_postings_list, encoded_tf_list, max_tf, encoded in zip(
+                terms.tolist(), postings_lists, encoded_postings_lists, encoded_tf_lists, max_tfs,
+                encoded_positions):
+            self.append_encoded(term, len(postings_list), encoded_postings_list,
+                                encoded_tf_list, max_tf, postings_list[-1], encoded)
 
 
 if __name__ == "__main__":
 
+    import pickle
+
     from compression import StandardPostings, VBEPostings
+    from util import Stats
+
+    entry_bytes = PostingsCache.ENTRY_BYTES
+    cache = PostingsCache(max_bytes=10 * entry_bytes, min_frequency=2)
+    assert cache.get(1) is None
+    cache.put(1, [1, 2, 3])
+    assert len(cache) == 0, "term yang baru sekali diakses tidak boleh di-admit"
+    assert cache.get(1) is None
+    cache.put(1, [1, 2, 3])
+    cached = cache.get(1)
+    assert cached == [1, 2, 3] and cache.bytes == 3 * entry_bytes, "postings cache salah"
+    assert cached is cache.entries[1], "cache hit tidak boleh membuat list baru"
+    for _ in range(3):
+        cache.get(2)
+    cache.put(2, list(range(8)))
+    assert 1 not in cache.entries and cache.evictions == 1, "eviction LRU salah"
+    cache.get(3), cache.get(3)
+    cache.put(3, list(range(5)))
+    assert 3 not in cache.entries and cache.rejections == 2, "admission berdasarkan frekuensi salah"
+
+    postings_dict = PostingsDict()
+    postings_dict.put(1000000, (0, 1, 1, 1, 1, 0, 0), 7)
+    postings_dict[5] = (1, 2, 1, 1, 1, 0, 0)
+    postings_dict[1000000] = (2, 3, 1, 1, 1, 0, 0)
+    assert list(postings_dict) == [5, 1000000] and len(postings_dict) == 2, "urutan termID salah"
+    assert postings_dict[1000000][1] == 3 and 6 not in postings_dict and "5" not in postings_dict, \
+        "lookup postings dictionary salah"
+    with open('./tmp/test.dict', 'wb') as f:
+        postings_dict.dump([1000000, 5], f)
+    assert os.path.getsize('./tmp/test.dict') < 200, "ukuran dictionary harus sebanding dengan banyaknya term"
+    with open('./tmp/test.dict', 'rb') as f:
+        loaded, terms = PostingsDict.load(f.read())
+    assert dict(loaded) == dict(postings_dict) and list(terms) == [1000000, 5], "load postings dictionary salah"
+
+    for Postings in [StandardPostings, VBEPostings]:
+        with InvertedIndexWriter('test', postings_encoding=Postings, directory='./tmp/') as index:
+            index.append(1, [2, 3, 4, 8, 10], [2, 4, 2, 3, 30])
+            index.append(2, [3, 4, 5], [34, 1, 1])
+            index.index_file.seek(0)
+            assert index.terms == [1, 2], "terms salah"
+            p1, t1 = Postings.encode([2, 3, 4, 8, 10]), Postings.encode_tf([2, 4, 2, 3, 30])
+            p2, t2 = Postings.encode([3, 4, 5]), Postings.encode_tf([34, 1, 1])
+            assert index.postings_dict == {1: (0, 5, len(p1), len(t1), 30, 0, 0),
+                                           2: (len(p1) + len(t1), 3, len(p2), len(t2), 34, 0, 0)}, \
+                "postings dictionary salah"
+            assert index.postings_dict.last_doc(1) == 10 and index.postings_dict.last_doc(2) == 5, \
+                "docID terakhir salah"
+            assert index.index_file.read() == p1 + t1 + p2 + t2, "penyimpanan postings pada harddisk salah"
+
+            index.index_file.seek(index.postings_dict[2][0])
+            assert Postings.decode(index.index_file.read(index.postings_dict[2][2])) == [
+                3, 4, 5], "posisi postings salah"
+            assert Postings.decode_tf(index.index_file.read(index.postings_dict[2][3])) == [
+                34, 1, 1], "posisi TF list salah"
+
+        stats = Stats()
+        with InvertedIndexReader('test', postings_encoding=Postings, directory='./tmp/', stats=stats) as index:
+            assert list(index) == [(1, [2, 3, 4, 8, 10], [2, 4, 2, 3, 30]),
+                                   (2, [3, 4, 5], [34, 1, 1])], "InvertedIndexReader salah"
+            assert list(index.scan(buffer_size=4)) == [(1, [2, 3, 4, 8, 10], [2, 4, 2, 3, 30]),
+                                                       (2, [3, 4, 5], [34, 1, 1])], "scan salah"
+            assert list(index.scan(encoded=True)) == [(1, 5, 30, 10, p1, t1, b""), (2, 3, 34, 5, p2, t2, b"")], \
+                "scan encoded salah"
+            total_bytes = len(p1) + len(t1) + len(p2) + len(t2)
+            assert stats.snapshot()['counters'] == {'bytes_read': 3 * total_bytes, 'seeks': 4,
+                                                    'postings_decoded': 16}, "stats reader salah"
+
+    stats = Stats()
+    with InvertedIndexWriter('test', postings_encoding=BlockVBEPostings, directory='./tmp/') as index:
+        index.append(1, list(range(1, 301)), [1] * 300)
+    with InvertedIndexReader('test', postings_encoding=BlockVBEPostings, directory='./tmp/', stats=stats) as index:
+        cursor = index.get_cursor(1)
+        assert cursor.next_geq(250) == 250, "next_geq cursor blok salah"
+    assert stats.snapshot()['counters']['postings_decoded'] == 256, "postings_decoded cursor blok salah"
+
+    stats = Stats()
+    with InvertedIndexWriter('test', postings_encoding=VBEPostings, directory='./tmp/', positional=True,
+                             stats=stats) as index:
+        index.append_block(np.array([1, 2]), np.array([2, 3, 4, 3]), np.array([2, 1, 1, 3]),
+                           np.array([0, 3, 4]), positions=np.array([0, 5, 9, 1, 2, 6, 7]))
+    assert stats.snapshot()['counters'] == {
+        'terms_written': 2, 'postings_written': 4,
+        'bytes_written': os.path.getsize('./tmp/test.index') + os.path.getsize('./tmp/test.pos')}, \
+        "stats writer salah"
+    with InvertedIndexReader('test', postings_encoding=VBEPostings, directory='./tmp/') as index:
+        assert index.positional, "index harus positional"
+        assert list(index) == [(1, [2, 3, 4], [2, 1, 1], [[0, 5], [9], [1]]),
+                               (2, [3], [3], [[2, 6, 7]])], "posisi term salah"
+        assert list(index.scan(buffer_size=4)) == [(1, [2, 3, 4], [2, 1, 1], [[0, 5], [9], [1]]),
+                                                   (2, [3], [3], [[2, 6, 7]])], "scan positional salah"
+        assert index.get_positions_list(1)[1] == [9], "posisi term salah"
 
-    with InvertedIndexWriter('test', postings_encoding=StandardPostings, directory='./tmp/') as index:
-        index.append(1, [2, 3, 4, 8, 10])
-        index.append(2, [3, 4, 5])
-        index.index_file.seek(0)
-        assert index.terms == [1, 2], "terms salah"
-        assert index.postings_dict == {1: (0, 5, len(StandardPostings.encode([2, 3, 4, 8, 10]))),
-                                       2: (len(StandardPostings.encode([2, 3, 4, 8, 10])), 3,
-                                           len(StandardPostings.encode([3, 4, 5])))}, "postings dictionary salah"
-        assert StandardPostings.decode(index.index_file.read()) == [
-            2, 3, 4, 8, 10, 3, 4, 5], "penyimpanan postings pada harddisk salah"
-
-        index.index_file.seek(index.postings_dict[2][0])
-        assert StandardPostings.decode(index.index_file.read(
-            len(StandardPostings.encode([3, 4, 5])))) == [3, 4, 5], "posisi postings salah"
-
-        index.index_file.seek(0)
-        assert StandardPostings.decode(index.index_file.read(index.postings_dict[1][2])) == [
-            2, 3, 4, 8, 10], "posisi postings salah"
-        assert StandardPostings.decode(index.index_file.read(
-            index.postings_dict[2][2])) == [3, 4, 5], "posisi postings salah"
-
-    with InvertedIndexWriter('test', postings_encoding=VBEPostings, directory='./tmp/') as index:
-        index.append(1, [2, 3, 4, 8, 10])
-        index.append(2, [3, 4, 5])
-        index.index_file.seek(0)
-        assert index.terms == [1, 2], "terms salah"
-        assert index.postings_dict == {1: (0, 5, len(VBEPostings.encode([2, 3, 4, 8, 10]))),
-                                       2: (len(VBEPostings.encode([2, 3, 4, 8, 10])), 3,
-                                           len(VBEPostings.encode([3, 4, 5])))}, "postings dictionary salah"
-        assert VBEPostings.decode(index.index_file.read()) == [
-            2, 3, 4, 8, 10, 13, 14, 15], "penyimpanan postings pada harddisk salah"
-
-        index.index_file.seek(index.postings_dict[2][0])
-        assert VBEPostings.decode(index.index_file.read(
-            len(VBEPostings.encode([3, 4, 5])))) == [3, 4, 5], "terdapat kesalahan"
-
-        index.index_file.seek(0)
-        assert VBEPostings.decode(index.index_file.read(index.postings_dict[1][2])) == [
-            2, 3, 4, 8, 10], "terdapat kesalahan"
-        assert VBEPostings.decode(index.index_file.read(index.postings_dict[2][2])) == [
-            3, 4, 5], "terdapat kesalahan"
+    with open('./tmp/test.dict', 'wb') as f:
+        pickle.dump(({1: (0, 5, 10)}, [1]), f)
+    try:
+        with InvertedIndexReader('test', postings_encoding=VBEPostings, directory='./tmp/'):
+            assert False, "metadata lama harus menghasilkan ValueError"
+    except ValueError:
+        pass
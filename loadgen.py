@@ -0,0 +1,124 @@
+"""
+Load generator untuk server.py: memutar ulang query log (satu query per
+baris) ke server dengan sejumlah koneksi HTTP keep-alive yang berjalan
+bersamaan (closed loop: setiap koneksi mengirim query berikutnya segera
+setelah response sebelumnya diterima), lalu melaporkan throughput (QPS) dan
+latency p50/p95/p99.
+
+Contoh:
+    python server.py --index-dir index &
+    python loadgen.py queries.txt --concurrency 16 --requests 5000
+"""
+import argparse
+import asyncio
+import json
+import time
+from itertools import cycle, islice
+from urllib.parse import urlencode, urlsplit
+
+
+def percentile(sorted_values, p):
+    """Persentil ke-p (nearest-rank) dari sorted_values"""
+    if len(sorted_values) == 0:
+        return None
+    rank = max(1, -(-len(sorted_values) * p // 100))
+    return sorted_values[int(rank) - 1]
+
+
+async def request(reader, writer, host, target):
+    """
+    Mengirim satu GET request dan membaca response-nya.
+
+    Returns
+    -------
+    Tuple[int, bytes]
+        HTTP status dan body response
+    """
+    writer.write('GET {} HTTP/1.1\r\nHost: {}\r\n\r\n'.format(target, host).encode('latin-1'))
+    await writer.drain()
+    head = (await reader.readuntil(b'\r\n\r\n')).decode('latin-1').split('\r\n')
+    status = int(head[0].split(' ')[1])
+    length = 0
+    for line in head[1:]:
+        if line.lower().startswith('content-length:'):
+            length = int(line.split(':', 1)[1])
+    return status, await reader.readexactly(length)
+
+
+async def run(url, queries, concurrency, mode='and', k=10):
+    """
+    Mengirim semua queries ke server di url dengan concurrency koneksi.
+
+    Returns
+    -------
+    dict
+        banyaknya request, error, durasi, QPS, dan latency (ms)
+    """
+    url = urlsplit(url)
+    host, port = url.hostname, url.port or 80
+    pending = iter(queries)
+    latencies = []
+    errors = 0
+
+    async def client():
+        nonlocal errors
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            for query in pending:
+                params = {'q': query, 'mode': mode}
+                if mode == 'topk':
+                    params['k'] = k
+                start = time.perf_counter()
+                status, _ = await request(reader, writer, url.netloc, '/search?' + urlencode(params))
+                latencies.append((time.perf_counter() - start) * 1000)
+                errors += status != 200
+        finally:
+            writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*[client() for _ in range(concurrency)])
+    duration = time.perf_counter() - start
+
+    latencies.sort()
+    return {"requests": len(latencies), "errors": errors, "concurrency": concurrency,
+            "duration_s": duration, "qps": len(latencies) / duration if duration > 0 else 0.0,
+            "latency_ms": {"mean": sum(latencies) / len(latencies) if latencies else None,
+                           "p50": percentile(latencies, 50), "p95": percentile(latencies, 95),
+                           "p99": percentile(latencies, 99),
+                           "max": latencies[-1] if latencies else None}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load generator untuk server.py")
+    parser.add_argument('query_log', help="file berisi satu query per baris")
+    parser.add_argument('--url', default='http://127.0.0.1:8080')
+    parser.add_argument('--concurrency', type=int, default=8, help="banyaknya koneksi bersamaan")
+    parser.add_argument('--requests', type=int, default=None,
+                        help="banyaknya request (query log diulang jika perlu; default satu kali putaran)")
+    parser.add_argument('--mode', default='and', choices=['and', 'boolean', 'topk'])
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--json', action='store_true', help="cetak hasil sebagai JSON")
+    args = parser.parse_args()
+
+    with open(args.query_log, encoding='utf-8') as f:
+        queries = [line.strip() for line in f if line.strip()]
+    if len(queries) == 0:
+        parser.error("query log kosong")
+    n_requests = args.requests if args.requests is not None else len(queries)
+    report = asyncio.run(run(args.url, list(islice(cycle(queries), n_requests)), args.concurrency,
+                             args.mode, args.k))
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    latency = report["latency_ms"]
+    print("requests   : {} ({} error)".format(report["requests"], report["errors"]))
+    print("concurrency: {}".format(report["concurrency"]))
+    print("durasi     : {:.2f} s".format(report["duration_s"]))
+    print("QPS        : {:.1f}".format(report["qps"]))
+    print("latency ms : mean {:.2f}  p50 {:.2f}  p95 {:.2f}  p99 {:.2f}  max {:.2f}".format(
+        latency["mean"], latency["p50"], latency["p95"], latency["p99"], latency["max"]))
+
+
+if __name__ == "__main__":
+    main()
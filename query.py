@@ -0,0 +1,601 @@
+"""
+Boolean query language: AND, OR, NOT, dan tanda kurung.
+
+    query  := or
+    or     := and ("OR" and)*
+    and    := not (["AND"] not)*      (dua operand bersebelahan berarti AND)
+    not    := "NOT" not | atom
+    atom   := "(" or ")" | frasa | kata
+    frasa  := '"' kata+ '"' ["~" slop]
+
+Operator harus ditulis dengan huruf kapital; kata lain diproses dengan
+preprocessing yang sama dengan indexing (lihat plan_query), sehingga kata
+yang merupakan stopword diabaikan.
+
+Frasa "hidup sehat" cocok dengan dokumen dimana term-term frasa muncul
+berurutan dan bersebelahan (posisi dihitung setelah stopwords removal);
+dengan slop, "hidup sehat"~2 juga cocok jika term-term tersebut muncul
+berurutan dengan total sisipan paling banyak 2 term. Frasa memerlukan index
+positional (BSBIIndex(..., positional=True)).
+
+Query diproses dalam tiga tahap:
+    1. parse_query: string -> syntax tree (Term, And, Or, Not)
+    2. plan_query: NOT didorong ke daun (hukum De Morgan), And/Or bersarang
+       digabung, dan operand diurutkan berdasarkan perkiraan biaya (document
+       frequency dari postings_dict)
+    3. Plan.cursor: plan -> pohon cursor (next / next_geq, lihat
+       util.PostingsListCursor). Hasil query mengalir dari cursor akar tanpa
+       membuat list hasil antara.
+"""
+
+import re
+from bisect import bisect_right
+
+from util import PostingsListCursor
+
+
+TOKEN_PATTERN = re.compile(r'"[^"]*"(?:~\d+)?|\(|\)|[^\s()"]+')
+PHRASE_PATTERN = re.compile(r'"([^"]*)"(?:~(\d+))?')
+OPERATORS = ('AND', 'OR', 'NOT', '(', ')')
+
+
+class Term:
+    """Sebuah kata pada query (sebelum preprocessing)"""
+
+    def __init__(self, word):
+        self.word = word
+
+    def __repr__(self):
+        return repr(self.word)
+
+
+class And:
+    def __init__(self, children):
+        self.children = children
+
+    def __repr__(self):
+        return '(' + ' AND '.join(map(repr, self.children)) + ')'
+
+
+class Or:
+    def __init__(self, children):
+        self.children = children
+
+    def __repr__(self):
+        return '(' + ' OR '.join(map(repr, self.children)) + ')'
+
+
+class Phrase:
+    """Frasa (dengan slop) pada query, sebelum preprocessing"""
+
+    def __init__(self, text, slop=0):
+        self.text = text
+        self.slop = slop
+
+    def __repr__(self):
+        return repr(self.text) + (f'~{self.slop}' if self.slop else '')
+
+
+class Not:
+    def __init__(self, child):
+        self.child = child
+
+    def __repr__(self):
+        return 'NOT ' + repr(self.child)
+
+
+def parse_query(query):
+    """
+    Parsing query menjadi syntax tree.
+
+    Raises
+    ------
+    ValueError
+        jika query tidak sesuai grammar (misalnya kurung tidak seimbang)
+    """
+    tokens = TOKEN_PATTERN.findall(query)
+    pos = 0
+
+    def peek():
+        return tokens[pos] if pos < len(tokens) else None
+
+    def expect(token):
+        nonlocal pos
+        if peek() != token:
+            raise ValueError(f"query tidak valid: diharapkan {token!r} pada token ke-{pos}, "
+                             f"ditemukan {peek()!r}")
+        pos += 1
+
+    def parse_or():
+        children = [parse_and()]
+        while peek() == 'OR':
+            expect('OR')
+            children.append(parse_and())
+        return children[0] if len(children) == 1 else Or(children)
+
+    def parse_and():
+        children = [parse_not()]
+        while peek() not in (None, 'OR', ')'):
+            if peek() == 'AND':
+                expect('AND')
+            children.append(parse_not())
+        return children[0] if len(children) == 1 else And(children)
+
+    def parse_not():
+        if peek() == 'NOT':
+            expect('NOT')
+            return Not(parse_not())
+        return parse_atom()
+
+    def parse_atom():
+        nonlocal pos
+        token = peek()
+        if token == '(':
+            expect('(')
+            node = parse_or()
+            expect(')')
+            return node
+        if token is None or token in OPERATORS:
+            raise ValueError(f"query tidak valid: diharapkan kata atau '(' pada token ke-{pos}, "
+                             f"ditemukan {token!r}")
+        pos += 1
+        phrase = PHRASE_PATTERN.fullmatch(token)
+        if phrase is not None:
+            return Phrase(phrase.group(1), int(phrase.group(2) or 0))
+        return Term(token)
+
+    node = parse_or()
+    if peek() is not None:
+        raise ValueError(f"query tidak valid: token {peek()!r} tidak diharapkan")
+    return node
+
+
+class TermPlan:
+    """Daun dari plan: postings list sebuah termID, dengan biaya = df"""
+
+    def __init__(self, term, df):
+        self.term = term
+        self.cost = df
+
+    def cursor(self, index, n_docs):
+        return index.get_cursor(self.term)
+
+    def __repr__(self):
+        return f'#{self.term}'
+
+
+class PhrasePlan:
+    """
+    Frasa: intersection postings list dari term-term frasa, lalu pemeriksaan
+    posisi hanya untuk dokumen hasil intersection. Biaya = df terkecil.
+    """
+
+    def __init__(self, terms, dfs, slop):
+        self.terms = terms
+        self.dfs = dfs
+        self.slop = slop
+        self.cost = min(dfs)
+
+    def cursor(self, index, n_docs):
+        cursors = [index.get_cursor(term) for term in self.terms]
+        positions_lists = [index.get_positions_list(term) for term in self.terms]
+        return PhraseCursor(cursors, positions_lists, self.dfs, self.slop)
+
+    def __repr__(self):
+        return '"' + ' '.join(f'#{term}' for term in self.terms) + '"' + (
+            f'~{self.slop}' if self.slop else '')
+
+
+class AllPlan:
+    """Semua dokumen (docID 0 .. n_docs - 1)"""
+
+    def __init__(self, n_docs):
+        self.cost = n_docs
+
+    def cursor(self, index, n_docs):
+        return PostingsListCursor(range(n_docs))
+
+    def __repr__(self):
+        return 'ALL'
+
+
+class NonePlan:
+    """Tidak ada dokumen, misalnya term yang tidak ada di collection"""
+
+    cost = 0
+
+    def cursor(self, index, n_docs):
+        return PostingsListCursor([])
+
+    def __repr__(self):
+        return 'NONE'
+
+
+class NotPlan:
+    """Komplemen dari sebuah TermPlan atau PhrasePlan"""
+
+    def __init__(self, child, n_docs):
+        self.child = child
+        self.cost = n_docs - child.cost
+
+    def cursor(self, index, n_docs):
+        return NotCursor(self.child.cursor(index, n_docs), n_docs)
+
+    def __repr__(self):
+        return 'NOT ' + repr(self.child)
+
+
+class AndPlan:
+    """
+    Intersection dari operand positif (terurut dari biaya terkecil), dikurangi
+    union dari operand negatif (AND NOT).
+    """
+
+    def __init__(self, positives, negatives):
+        self.positives = sorted(positives, key=lambda p: p.cost)
+        self.negatives = sorted(negatives, key=lambda p: p.cost)
+        self.cost = self.positives[0].cost
+
+    def cursor(self, index, n_docs):
+        return AndCursor([p.cursor(index, n_docs) for p in self.positives],
+                         [n.child.cursor(index, n_docs) for n in self.negatives])
+
+    def __repr__(self):
+        return '(' + ' AND '.join(list(map(repr, self.positives)) +
+                                  list(map(repr, self.negatives))) + ')'
+
+
+class OrPlan:
+    def __init__(self, children, n_docs):
+        self.children = sorted(children, key=lambda p: p.cost, reverse=True)
+        self.cost = min(n_docs, sum(p.cost for p in children))
+
+    def cursor(self, index, n_docs):
+        return OrCursor([p.cursor(index, n_docs) for p in self.children])
+
+    def __repr__(self):
+        return '(' + ' OR '.join(map(repr, self.children)) + ')'
+
+
+def plan_query(node, analyze, n_docs):
+    """
+    Membuat plan dari syntax tree hasil parse_query.
+
+    NOT didorong ke daun dengan hukum De Morgan, sehingga NOT hanya muncul
+    tepat di atas sebuah term atau frasa. Di dalam AND, term yang di-NOT dievaluasi
+    sebagai pengecualian (AND NOT) terhadap intersection operand positif,
+    sehingga komplemen hanya perlu di-enumerasi jika sebuah AND tidak
+    mempunyai operand positif atau NOT berada di dalam OR.
+
+    Parameters
+    ----------
+    node: Term, And, Or, atau Not
+        Syntax tree hasil parse_query
+    analyze: Callable[[str], List[Tuple[int, int]]]
+        Fungsi yang melakukan preprocessing sebuah kata pada query, dan
+        mengembalikan pasangan <termID, df> untuk setiap token hasilnya (df 0
+        untuk term yang tidak ada di collection). Kata yang tidak menghasilkan
+        token (stopword) diabaikan.
+    n_docs: int
+        Banyaknya dokumen di collection
+
+    Returns
+    -------
+    Plan (TermPlan, AndPlan, ...), atau None jika query tidak mengandung
+    satupun term (misalnya hanya stopwords)
+    """
+    if isinstance(node, Term):
+        leaves = [TermPlan(term, df) if df > 0 else NonePlan() for term, df in analyze(node.word)]
+        if len(leaves) == 0:
+            return None
+        return leaves[0] if len(leaves) == 1 else make_and(leaves, n_docs)
+    if isinstance(node, Phrase):
+        # seluruh frasa di-preprocess sekaligus, agar urutan term-termnya
+        # sama dengan posisi-posisi di index
+        analyzed = analyze(node.text)
+        if len(analyzed) == 0:
+            return None
+        if any(df == 0 for _, df in analyzed):
+            return NonePlan()
+        if len(analyzed) == 1:
+            return TermPlan(*analyzed[0])
+        terms, dfs = zip(*analyzed)
+        return PhrasePlan(list(terms), list(dfs), node.slop)
+    if isinstance(node, Not):
+        return negate(plan_query(node.child, analyze, n_docs), n_docs)
+    children = [plan_query(child, analyze, n_docs) for child in node.children]
+    if isinstance(node, And):
+        return make_and(children, n_docs)
+    return make_or(children, n_docs)
+
+
+def negate(plan, n_docs):
+    """NOT dari sebuah plan, dengan NOT didorong ke daun (De Morgan)"""
+    if plan is None:
+        return None
+    if isinstance(plan, (TermPlan, PhrasePlan)):
+        return NotPlan(plan, n_docs)
+    if isinstance(plan, NotPlan):
+        return plan.child
+    if isinstance(plan, AllPlan):
+        return NonePlan()
+    if isinstance(plan, NonePlan):
+        return AllPlan(n_docs)
+    if isinstance(plan, AndPlan):
+        # NOT (a AND b AND NOT c) = NOT a OR NOT b OR c
+        return make_or([negate(p, n_docs) for p in plan.positives] +
+                       [n.child for n in plan.negatives], n_docs)
+    # NOT (a OR b) = NOT a AND NOT b
+    return make_and([negate(p, n_docs) for p in plan.children], n_docs)
+
+
+def make_and(children, n_docs):
+    positives, negatives = [], []
+    for child in children:
+        if child is None or isinstance(child, AllPlan):
+            continue
+        if isinstance(child, NonePlan):
+            return NonePlan()
+        if isinstance(child, AndPlan):
+            positives.extend(child.positives)
+            negatives.extend(child.negatives)
+        elif isinstance(child, NotPlan):
+            negatives.append(child)
+        else:
+            positives.append(child)
+    if len(positives) == 0 and len(negatives) == 0:
+        return AllPlan(n_docs) if any(isinstance(c, AllPlan) for c in children) else None
+    if len(positives) == 0:
+        if len(negatives) == 1:
+            return negatives[0]
+        positives.append(AllPlan(n_docs))
+    if len(positives) == 1 and len(negatives) == 0:
+        return positives[0]
+    return AndPlan(positives, negatives)
+
+
+def make_or(children, n_docs):
+    flattened = []
+    for child in children:
+        if child is None or isinstance(child, NonePlan):
+            continue
+        if isinstance(child, AllPlan):
+            return child
+        if isinstance(child, OrPlan):
+            flattened.extend(child.children)
+        else:
+            flattened.append(child)
+    if len(flattened) == 0:
+        return NonePlan() if any(isinstance(c, NonePlan) for c in children) else None
+    if len(flattened) == 1:
+        return flattened[0]
+    return OrPlan(flattened, n_docs)
+
+
+class AndCursor:
+    """
+    Cursor intersection: cursors[0] (biaya terkecil) sebagai lead, cursor lain
+    dimajukan dengan next_geq. Dokumen yang ada di salah satu cursor pada
+    excluded dilewati.
+    """
+
+    def __init__(self, cursors, excluded):
+        self.cursors = cursors
+        self.excluded = excluded
+        self.doc = self.align(cursors[0].doc)
+
+    def align(self, doc):
+        lead, others = self.cursors[0], self.cursors[1:]
+        while doc is not None:
+            for cursor in others:
+                other_doc = cursor.next_geq(doc)
+                if other_doc is None:
+                    return None
+                if other_doc > doc:
+                    doc = lead.next_geq(other_doc)
+                    break
+            else:
+                if not any(cursor.next_geq(doc) == doc for cursor in self.excluded):
+                    return doc
+                doc = lead.next()
+        return None
+
+    def next(self):
+        if self.doc is not None:
+            self.doc = self.align(self.cursors[0].next())
+        return self.doc
+
+    def next_geq(self, doc_id):
+        if self.doc is not None and self.doc < doc_id:
+            self.doc = self.align(self.cursors[0].next_geq(doc_id))
+        return self.doc
+
+
+class OrCursor:
+    """Cursor union: docID terkecil dari semua cursor"""
+
+    def __init__(self, cursors):
+        self.cursors = cursors
+        self.doc = self.smallest()
+
+    def smallest(self):
+        return min((cursor.doc for cursor in self.cursors if cursor.doc is not None), default=None)
+
+    def next(self):
+        if self.doc is not None:
+            for cursor in self.cursors:
+                if cursor.doc == self.doc:
+                    cursor.next()
+            self.doc = self.smallest()
+        return self.doc
+
+    def next_geq(self, doc_id):
+        if self.doc is not None and self.doc < doc_id:
+            for cursor in self.cursors:
+                cursor.next_geq(doc_id)
+            self.doc = self.smallest()
+        return self.doc
+
+
+class NotCursor:
+    """Cursor komplemen: docID 0 .. n_docs - 1 yang tidak ada di cursor"""
+
+    def __init__(self, cursor, n_docs):
+        self.cursor = cursor
+        self.n_docs = n_docs
+        self.doc = self.skip(0)
+
+    def skip(self, doc):
+        while doc < self.n_docs:
+            if self.cursor.next_geq(doc) != doc:
+                return doc
+            doc += 1
+        return None
+
+    def next(self):
+        if self.doc is not None:
+            self.doc = self.skip(self.doc + 1)
+        return self.doc
+
+    def next_geq(self, doc_id):
+        if self.doc is not None and self.doc < doc_id:
+            self.doc = self.skip(doc_id)
+        return self.doc
+
+
+class PhraseCursor:
+    """
+    Cursor untuk frasa: dokumen kandidat diambil dari intersection postings
+    list term-term frasa (AndCursor, terurut dari df terkecil), lalu posisi
+    term-term di dokumen kandidat di-decode dan diperiksa.
+    """
+
+    def __init__(self, cursors, positions_lists, dfs, slop):
+        self.cursors = cursors
+        self.positions_lists = positions_lists
+        self.span = len(cursors) - 1 + slop
+        order = sorted(range(len(cursors)), key=lambda i: dfs[i])
+        self.intersection = AndCursor([cursors[i] for i in order], [])
+        self.doc = self.match(self.intersection.doc)
+
+    def match(self, doc):
+        while doc is not None and not self.matches():
+            doc = self.intersection.next()
+        return doc
+
+    def matches(self):
+        """True jika term-term frasa muncul berurutan dengan jarak <= span di dokumen saat ini"""
+        positions = [positions_list[cursor.rank]
+                     for cursor, positions_list in zip(self.cursors, self.positions_lists)]
+        for start in positions[0]:
+            last = start
+            for term_positions in positions[1:]:
+                i = bisect_right(term_positions, last)
+                if i == len(term_positions):
+                    return False
+                last = term_positions[i]
+                if last - start > self.span:
+                    break
+            else:
+                return True
+        return False
+
+    def next(self):
+        if self.doc is not None:
+            self.doc = self.match(self.intersection.next())
+        return self.doc
+
+    def next_geq(self, doc_id):
+        if self.doc is not None and self.doc < doc_id:
+            self.doc = self.match(self.intersection.next_geq(doc_id))
+        return self.doc
+
+
+def iterate(cursor):
+    """Generator docID dari sebuah cursor, dari posisinya saat ini sampai habis"""
+    doc = cursor.doc
+    while doc is not None:
+        yield doc
+        doc = cursor.next()
+
+
+if __name__ == "__main__":
+
+    assert repr(parse_query("a b OR NOT (c OR d) AND e")) == "(('a' AND 'b') OR (NOT ('c' OR 'd') AND 'e'))", \
+        "parse_query salah"
+    for invalid in ["(a OR b", "a OR", "NOT", "a )", "AND a"]:
+        try:
+            parse_query(invalid)
+            assert False, "query tidak valid harus menghasilkan ValueError: " + invalid
+        except ValueError:
+            pass
+
+    n_docs = 20
+    postings = {'a': [1, 3, 5, 7, 9, 11], 'b': [3, 4, 5, 6, 7], 'c': [0, 5, 10, 15], 'd': [7, 19]}
+    stopwords = {'dan'}
+    term_ids = {word: i for i, word in enumerate(postings)}
+
+    class Index:
+        @staticmethod
+        def get_cursor(term):
+            return PostingsListCursor(list(postings.values())[term])
+
+    def analyze(word):
+        if word in stopwords:
+            return []
+        if word not in term_ids:
+            return [(None, 0)]
+        return [(term_ids[word], len(postings[word]))]
+
+    def evaluate(query):
+        plan = plan_query(parse_query(query), analyze, n_docs)
+        return [] if plan is None else list(iterate(plan.cursor(Index, n_docs)))
+
+    def docs(word):
+        return set(postings.get(word, []))
+
+    everything = set(range(n_docs))
+    expected = {
+        "a b": docs('a') & docs('b'),
+        "a AND dan AND b": docs('a') & docs('b'),
+        "a OR c": docs('a') | docs('c'),
+        "a AND NOT b": docs('a') - docs('b'),
+        "NOT a": everything - docs('a'),
+        "NOT (a OR b) c": (everything - docs('a') - docs('b')) & docs('c'),
+        "NOT (a AND NOT b)": everything - (docs('a') - docs('b')),
+        "(a OR d) AND NOT (b AND c)": (docs('a') | docs('d')) - (docs('b') & docs('c')),
+        "a OR NOT b": docs('a') | (everything - docs('b')),
+        "NOT NOT a": docs('a'),
+        "a zzz": set(),
+        "a OR zzz": docs('a'),
+        "NOT zzz": everything,
+        "dan": set(),
+    }
+    for query, result in expected.items():
+        assert evaluate(query) == sorted(result), "hasil query salah: " + query
+
+    assert repr(parse_query('"a b" OR "c  d"~3 e')) == "('a b' OR ('c  d'~3 AND 'e'))", "parse_query salah"
+
+    # posisi: positions[word][doc] = posisi word di doc
+    positions = {'a': {3: [0, 8], 5: [2], 7: [4]}, 'b': {3: [1], 5: [6], 7: [3]}}
+
+    class PositionalIndex(Index):
+        @staticmethod
+        def get_postings_list(term):
+            return list(postings.values())[term]
+
+        @staticmethod
+        def get_positions_list(term):
+            word = list(postings)[term]
+            return [positions.get(word, {}).get(doc, [100]) for doc in postings[word]]
+
+    def analyze_phrase(text):
+        return [pair for word in text.split() for pair in analyze(word)]
+
+    for query, result in {'"a b"': [3], '"a dan b"': [3], '"b a"': [7], '"a b"~4': [3, 5],
+                          '"a b" OR NOT a': sorted(everything - docs('a') | {3}), 'NOT "a b" b': [4, 5, 6, 7]}.items():
+        plan = plan_query(parse_query(query), analyze_phrase, n_docs)
+        assert list(iterate(plan.cursor(PositionalIndex, n_docs))) == result, "hasil frasa salah: " + query
+
+    plan = plan_query(parse_query("a AND b AND d"), analyze, n_docs)
+    assert [p.term for p in plan.positives] == [3, 1, 0], "urutan operand AND salah"
@@ -8,9 +8,10 @@ BSBI_instance = BSBIIndex(data_dir='collection',
                           output_dir='index')
 
 queries = ["olahraga", "tumor", "hidup sehat"]
-for query in queries:
-    print("Query  : ", query)
-    print("Results:")
-    for doc in BSBI_instance.retrieve(query):
-        print(doc)
-    print()
+with BSBI_instance.searcher() as searcher:
+    for query in queries:
+        print("Query  : ", query)
+        print("Results:")
+        for doc in searcher.retrieve(query):
+            print(doc)
+        print()
@@ -0,0 +1,257 @@
+"""
+Query server HTTP/JSON lokal di atas index hasil BSBIIndex.index(), dengan
+asyncio. Satu BSBISearcher dipakai bersama oleh semua request (searcher aman
+dipakai beberapa thread, lihat bsbi.BSBISearcher); pemrosesan query (baca dan
+decode postings) yang blocking dijalankan di thread pool, sehingga event loop
+tetap bisa menerima request lain. Banyaknya query yang diproses bersamaan
+dibatasi dengan semaphore; request lain menunggu giliran.
+
+Endpoint:
+    GET /search?q=<query>[&mode=and|boolean|topk][&k=10]
+        {"query": ..., "mode": ..., "results": [...], "took_ms": ...}
+        mode and (default) memakai retrieve, boolean memakai
+        retrieve_boolean, dan topk memakai retrieve_topk (results berisi
+        pasangan [skor, dokumen]).
+    GET /stats
+        banyaknya request, error, query yang sedang diproses, dan generation
+        index
+
+Contoh:
+    python server.py --index-dir index --port 8080
+    curl 'http://127.0.0.1:8080/search?q=hidup+sehat'
+
+Lihat loadgen.py untuk mengukur QPS dan latency server.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+import compression
+from bsbi import BSBISearcher
+
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+               413: "Payload Too Large", 500: "Internal Server Error", 504: "Gateway Timeout"}
+
+logger = logging.getLogger(__name__)
+
+
+class SearchServer:
+    """
+    Attributes
+    ----------
+    searcher(BSBISearcher): Searcher yang dipakai semua request
+    max_concurrency(int): Banyaknya query maksimum yang diproses bersamaan
+    timeout(float): Batas waktu (detik) sebuah query, termasuk waktu menunggu
+                    giliran; None berarti tanpa batas. Query yang timeout
+                    tetap menempati slot sampai thread-nya selesai
+    requests, errors(int): Banyaknya request yang sudah dilayani, dan yang
+                    berakhir dengan error
+    in_flight(int): Banyaknya query yang sedang diproses (atau menunggu thread) di
+                    thread pool, termasuk query yang sudah timeout
+    """
+
+    MAX_HEADER_BYTES = 1 << 16
+
+    def __init__(self, searcher, workers=4, max_concurrency=None, timeout=None):
+        self.searcher = searcher
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.max_concurrency = max_concurrency if max_concurrency is not None else 4 * workers
+        self.semaphore = None
+        self.timeout = timeout
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+
+    def search(self, mode, query, k):
+        """Menjalankan query (blocking, dipanggil dari thread pool)"""
+        if mode == 'and':
+            return self.searcher.retrieve(query)
+        if mode == 'boolean':
+            return self.searcher.retrieve_boolean(query)
+        return [[score, doc] for score, doc in self.searcher.retrieve_topk(query, k)]
+
+    async def run_query(self, params):
+        """
+        Memproses /search dengan parameter params (hasil parse_qs).
+
+        Returns
+        -------
+        Tuple[int, dict]
+            HTTP status dan response body
+        """
+        query = params.get('q', [None])[0]
+        mode = params.get('mode', ['and'])[0]
+        if query is None:
+            return 400, {"error": "parameter q wajib diisi"}
+        if mode not in ('and', 'boolean', 'topk'):
+            return 400, {"error": "mode harus and, boolean, atau topk"}
+        try:
+            k = int(params.get('k', ['10'])[0])
+        except ValueError:
+            return 400, {"error": "k harus bilangan bulat"}
+
+        start = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        try:
+            await asyncio.wait_for(self.semaphore.acquire(), self.timeout)
+        except asyncio.TimeoutError:
+            return 504, {"error": "query melebihi batas waktu", "query": query}
+
+        # slot semaphore baru dilepas ketika thread selesai memproses query
+        # (lihat finish_query), juga jika query sudah timeout, karena thread
+        # di executor tidak bisa dihentikan
+        self.in_flight += 1
+        future = loop.run_in_executor(self.executor, self.search, mode, query, k)
+        future.add_done_callback(self.finish_query)
+        remaining = None if self.timeout is None else max(0.0, self.timeout - (time.perf_counter() - start))
+        try:
+            results = await asyncio.wait_for(asyncio.shield(future), remaining)
+        except asyncio.TimeoutError:
+            return 504, {"error": "query melebihi batas waktu", "query": query}
+        except ValueError as e:
+            return 400, {"error": str(e), "query": query}
+        except Exception as e:
+            logger.exception("query %r (mode %s) gagal", query, mode)
+            return 500, {"error": "{}: {}".format(type(e).__name__, e), "query": query}
+        return 200, {"query": query, "mode": mode, "results": results,
+                     "took_ms": (time.perf_counter() - start) * 1000}
+
+    def finish_query(self, future):
+        """Done-callback dari query di executor: melepas slot semaphore"""
+        self.in_flight -= 1
+        self.semaphore.release()
+        if not future.cancelled():
+            # exception query yang sudah timeout tidak pernah di-await
+            future.exception()
+
+    async def dispatch(self, method, target):
+        """Routing request ke endpoint, lihat module docstring"""
+        url = urlsplit(target)
+        if url.path not in ('/search', '/stats'):
+            return 404, {"error": "endpoint tidak ditemukan: " + url.path}
+        if method != 'GET':
+            return 405, {"error": "hanya method GET yang didukung"}
+        if url.path == '/stats':
+            return 200, {"requests": self.requests, "errors": self.errors, "in_flight": self.in_flight,
+                         "generation": self.searcher.generation}
+        return await self.run_query(parse_qs(url.query))
+
+    async def handle(self, reader, writer):
+        """Melayani satu koneksi (HTTP/1.1 dengan keep-alive)"""
+        try:
+            while True:
+                request = await read_request(reader)
+                if request is None:
+                    break
+                method, target, version, headers = request
+                if method is None:
+                    status, payload = 413, {"error": "header request terlalu besar"}
+                else:
+                    status, payload = await self.dispatch(method, target)
+                self.requests += 1
+                self.errors += status != 200
+                keep_alive = method is not None and (
+                    headers.get('connection', '').lower() != 'close' if version == 'HTTP/1.1'
+                    else headers.get('connection', '').lower() == 'keep-alive')
+                write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            # koneksi terputus atau request tidak valid
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host='127.0.0.1', port=8080):
+        """Menjalankan server sampai di-cancel"""
+        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        server = await asyncio.start_server(self.handle, host, port, limit=self.MAX_HEADER_BYTES)
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        self.executor.shutdown()
+        self.searcher.close()
+
+
+async def read_request(reader):
+    """
+    Membaca satu request HTTP dari reader. Body request (jika ada) dibaca
+    dan diabaikan.
+
+    Returns
+    -------
+    Tuple[str, str, str, dict]
+        method, target, versi HTTP, dan headers (nama header lowercase); method
+        None jika header lebih besar dari limit reader. None jika koneksi
+        ditutup oleh client atau request line tidak valid.
+    """
+    try:
+        head = await reader.readuntil(b'\r\n\r\n')
+    except asyncio.IncompleteReadError:
+        return None
+    except asyncio.LimitOverrunError:
+        return None, None, None, {}
+    lines = head.decode('latin-1').split('\r\n')
+    parts = lines[0].split(' ')
+    if len(parts) != 3:
+        return None
+    method, target, version = parts
+    headers = {}
+    for line in lines[1:]:
+        if ':' in line:
+            name, value = line.split(':', 1)
+            headers[name.strip().lower()] = value.strip()
+    if int(headers.get('content-length', 0)) > 0:
+        await reader.readexactly(int(headers['content-length']))
+    return method, target, version, headers
+
+
+def write_response(writer, status, payload, keep_alive):
+    """Menulis response JSON ke writer"""
+    body = json.dumps(payload).encode('utf-8')
+    writer.write(('HTTP/1.1 {} {}\r\n'
+                  'Content-Type: application/json\r\n'
+                  'Content-Length: {}\r\n'
+                  'Connection: {}\r\n\r\n').format(status, STATUS_TEXT[status], len(body),
+                                                   'keep-alive' if keep_alive else 'close').encode('latin-1'))
+    writer.write(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query server HTTP/JSON untuk index BSBI")
+    parser.add_argument('--index-dir', default='index')
+    parser.add_argument('--index-name', default='main_index')
+    parser.add_argument('--encoding', default='VBEPostings',
+                        help="nama class postings encoding di compression.py")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--workers', type=int, default=4, help="banyaknya thread untuk pemrosesan query")
+    parser.add_argument('--max-concurrency', type=int, default=None,
+                        help="banyaknya query maksimum yang diproses bersamaan (default 4 x workers)")
+    parser.add_argument('--timeout', type=float, default=None, help="batas waktu query (detik)")
+    parser.add_argument('--cache-bytes', type=int, default=None, help="ukuran postings cache")
+    parser.add_argument('--result-cache-size', type=int, default=None, help="ukuran result cache")
+    args = parser.parse_args()
+
+    searcher = BSBISearcher(args.index_dir, getattr(compression, args.encoding), index_name=args.index_name,
+                            cache_bytes=args.cache_bytes, result_cache_size=args.result_cache_size)
+    server = SearchServer(searcher, workers=args.workers, max_concurrency=args.max_concurrency,
+                          timeout=args.timeout)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    print("Serving index {} di http://{}:{}".format(args.index_dir, args.host, args.port))
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
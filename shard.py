@@ -0,0 +1,252 @@
+"""
+Index yang dipartisi berdasarkan dokumen (document-partitioned): block-block
+(sub-directory) collection dibagi menjadi beberapa shard bersebelahan dengan
+ukuran yang kurang lebih sama, dan setiap shard adalah index BSBI biasa
+(lihat bsbi.BSBIIndex) di <output_dir>/shard_<i> dengan docID lokalnya
+sendiri. docID global sebuah dokumen adalah docID lokalnya ditambah awal
+rentang docID shard-nya (doc_ranges di manifest), sehingga hasil query dari
+shard-shard cukup disambung sesuai urutan shard untuk mendapatkan urutan
+docID global.
+
+Query dievaluasi di semua shard secara paralel di process-process worker
+(scatter-gather, lihat ShardedSearcher); setiap process membuka searcher
+untuk semua shard sekali saja.
+"""
+import heapq
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+
+from bsbi import BSBIIndex, BSBISearcher, load_id_map, read_manifest, write_manifest
+
+MANIFEST_NAME = 'shards'
+
+
+class ShardedIndex:
+    """
+    Attributes
+    ----------
+    data_dir(str): Path ke data
+    output_dir(str): Path ke directory shard-shard
+    postings_encoding: Lihat di compression.py
+    n_shards(int): Banyaknya shard (default sebanyak jumlah CPU)
+    index_kwargs(dict): Argumen tambahan untuk BSBIIndex setiap shard
+                    (misalnya positional)
+    """
+
+    def __init__(self, data_dir, output_dir, postings_encoding, n_shards=None, **index_kwargs):
+        self.data_dir = data_dir
+        self.output_dir = output_dir
+        self.postings_encoding = postings_encoding
+        self.n_shards = n_shards if n_shards is not None else os.cpu_count()
+        self.index_kwargs = index_kwargs
+
+    def shard_index(self, shard):
+        """BSBIIndex untuk shard bernama shard"""
+        return BSBIIndex(self.data_dir, os.path.join(self.output_dir, shard), self.postings_encoding,
+                         **self.index_kwargs)
+
+    def index(self, workers=None):
+        """
+        Membagi block-block collection menjadi n_shards shard (lihat
+        partition_blocks), lalu meng-index setiap shard, secara paralel di
+        workers process (None berarti sebanyak jumlah CPU, 1 berarti serial).
+
+        Returns
+        -------
+        List[Tuple[int, int]]
+            Rentang docID global [awal, akhir) setiap shard
+        """
+        block_dirs = sorted(next(os.walk(self.data_dir))[1])
+        sizes = [sum(entry.stat().st_size for entry in os.scandir(os.path.join(self.data_dir, block_dir))
+                     if entry.is_file())
+                 for block_dir in block_dirs]
+        groups = [block_dirs[part] for part in partition_blocks(sizes, self.n_shards)]
+        shards = ['shard_' + str(i) for i in range(len(groups))]
+
+        tasks = [(self.data_dir, os.path.join(self.output_dir, shard), self.postings_encoding, group,
+                  self.index_kwargs) for shard, group in zip(shards, groups)]
+        if workers == 1:
+            doc_counts = list(map(_index_shard, tasks))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                doc_counts = list(executor.map(_index_shard, tasks))
+
+        doc_ranges, start = [], 0
+        for doc_count in doc_counts:
+            doc_ranges.append((start, start + doc_count))
+            start += doc_count
+        write_manifest(self.output_dir, MANIFEST_NAME,
+                       {'shards': shards, 'blocks': groups, 'doc_ranges': doc_ranges})
+        return doc_ranges
+
+    def delete(self, doc_names):
+        """Menghapus dokumen-dokumen dari shard yang memuatnya, lihat BSBIIndex.delete"""
+        doc_names = list(doc_names)
+        manifest = read_shards_manifest(self.output_dir)
+        return sum(self.shard_index(shard).delete(doc_names) for shard in manifest['shards'])
+
+    def searcher(self, workers=None, **searcher_kwargs):
+        """Membuka ShardedSearcher untuk index ini"""
+        return ShardedSearcher(self.output_dir, self.postings_encoding, workers=workers, **searcher_kwargs)
+
+    def retrieve(self, query):
+        """Lihat BSBIIndex.retrieve"""
+        with self.searcher() as searcher:
+            return searcher.retrieve(query)
+
+
+class ShardedSearcher:
+    """
+    Coordinator scatter-gather: setiap query dikirim ke semua shard, yang
+    masing-masing dievaluasi oleh BSBISearcher di salah satu process worker,
+    lalu hasil per shard digabung. Karena shard-shard mencakup rentang docID
+    global yang bersebelahan dan terurut, hasil retrieve/retrieve_boolean
+    cukup disambung sesuai urutan shard; top-k digabung berdasarkan skor.
+
+    Skor BM25 (retrieve_topk) dihitung dengan statistik collection per shard
+    (N, df, dan avgdl lokal), sehingga bisa sedikit berbeda dari skor index
+    tunggal.
+
+    Attributes
+    ----------
+    shards(List[str]): Nama shard-shard, sesuai urutan rentang docID-nya
+    doc_ranges(List[Tuple[int, int]]): Rentang docID global setiap shard
+    workers(int): Banyaknya process worker; 0 berarti query dievaluasi di
+                    process ini (tanpa paralelisme)
+    """
+
+    def __init__(self, output_dir, postings_encoding, workers=None, **searcher_kwargs):
+        manifest = read_shards_manifest(output_dir)
+        self.shards = manifest['shards']
+        self.doc_ranges = manifest['doc_ranges']
+        self.workers = workers if workers is not None else min(len(self.shards), os.cpu_count())
+        init_args = (output_dir, self.shards, postings_encoding, searcher_kwargs)
+        if self.workers == 0:
+            self.executor = None
+            self.searchers = _open_shards(*init_args)
+        else:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_open_shards,
+                                                initargs=init_args)
+
+    def scatter(self, method, *args):
+        """
+        Memanggil BSBISearcher.<method>(*args) di semua shard secara paralel.
+
+        Returns
+        -------
+        List
+            Hasil dari setiap shard, sesuai urutan shard
+        """
+        tasks = [(shard, method, args) for shard in range(len(self.shards))]
+        if self.executor is None:
+            return [getattr(self.searchers[shard], method)(*args) for shard, method, args in tasks]
+        return list(self.executor.map(_query_shard, tasks))
+
+    def retrieve(self, query):
+        """Lihat BSBISearcher.retrieve"""
+        return list(chain.from_iterable(self.scatter('retrieve', query)))
+
+    def retrieve_boolean(self, query):
+        """Lihat BSBISearcher.retrieve_boolean"""
+        return list(chain.from_iterable(self.scatter('retrieve_boolean', query)))
+
+    def retrieve_many(self, queries):
+        """Lihat BSBISearcher.retrieve_many; setiap shard memproses seluruh batch"""
+        return [list(chain.from_iterable(results))
+                for results in zip(*self.scatter('retrieve_many', list(queries)))]
+
+    def retrieve_topk(self, query, k=10):
+        """
+        Lihat BSBISearcher.retrieve_topk. Top-k setiap shard digabung;
+        dokumen dengan skor sama terurut berdasarkan docID global.
+        """
+        shard_results = self.scatter('retrieve_topk', query, k)
+        merged = heapq.merge(*[[(-score, shard, i, doc) for i, (score, doc) in enumerate(results)]
+                               for shard, results in enumerate(shard_results)])
+        return [(-score, doc) for score, _, _, doc in merged][:k]
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+        else:
+            for searcher in self.searchers:
+                searcher.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        self.close()
+
+
+def read_shards_manifest(output_dir):
+    """
+    Manifest sharded index: dictionary dengan key 'shards' (nama shard),
+    'blocks' (block-block setiap shard), dan 'doc_ranges' (rentang docID
+    global setiap shard).
+
+    Raises
+    ------
+    FileNotFoundError
+        jika output_dir belum berisi sharded index
+    """
+    manifest = read_manifest(output_dir, MANIFEST_NAME)
+    if manifest is None:
+        raise FileNotFoundError("sharded index belum dibuat di " + output_dir)
+    return manifest
+
+
+def partition_blocks(sizes, n_shards):
+    """
+    Membagi block-block (terurut) dengan ukuran sizes menjadi paling banyak
+    n_shards kelompok bersebelahan yang tidak kosong, dengan total ukuran
+    setiap kelompok mendekati sum(sizes) / n_shards.
+
+    Returns
+    -------
+    List[slice]
+        Block-block setiap kelompok
+    """
+    total = sum(sizes)
+    bounds = [0]
+    cumulative = 0
+    for i, size in enumerate(sizes[:-1]):
+        cumulative += size
+        if len(bounds) < n_shards and cumulative * n_shards >= total * len(bounds):
+            bounds.append(i + 1)
+    bounds.append(len(sizes))
+    return [slice(start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+
+
+def _index_shard(args):
+    """Meng-index satu shard (dijalankan di process worker); mengembalikan banyaknya dokumen"""
+    data_dir, shard_dir, postings_encoding, block_dirs, index_kwargs = args
+    os.makedirs(shard_dir, exist_ok=True)
+    BSBIIndex(data_dir, shard_dir, postings_encoding, **index_kwargs).index(block_dirs=block_dirs)
+    return len(load_id_map(shard_dir, 'docs'))
+
+
+# searcher setiap shard di process worker, dibuka oleh _open_shards
+_shard_searchers = None
+
+
+def _open_shards(output_dir, shards, postings_encoding, searcher_kwargs):
+    """Initializer process worker: membuka BSBISearcher untuk semua shard"""
+    global _shard_searchers
+    _shard_searchers = [BSBISearcher(os.path.join(output_dir, shard), postings_encoding, **searcher_kwargs)
+                        for shard in shards]
+    return _shard_searchers
+
+
+def _query_shard(args):
+    shard, method, args = args
+    return getattr(_shard_searchers[shard], method)(*args)
+
+
+if __name__ == "__main__":
+
+    assert partition_blocks([1, 1, 1, 1], 2) == [slice(0, 2), slice(2, 4)], "partition_blocks salah"
+    assert partition_blocks([10, 1, 1, 1, 1], 2) == [slice(0, 1), slice(1, 5)], "partition_blocks salah"
+    assert partition_blocks([1, 1], 4) == [slice(0, 1), slice(1, 2)], "partition_blocks salah"
+    assert partition_blocks([5], 3) == [slice(0, 1)], "partition_blocks salah"
@@ -1,3 +1,19 @@
+import contextlib
+import heapq
+import mmap
+import os
+import pickle
+import struct
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+from itertools import accumulate
+
+import numpy as np
+from array import array
+
+
 class IdMap:
     """
     Ingat kembali di kuliah, bahwa secara praktis, sebuah dokumen dan
@@ -43,6 +59,14 @@ class IdMap:
             self.id_to_str.append(s)
         return self.str_to_id[s]
 
+    def get(self, s, default=None):
+        """
+        Mengembalikan integer id dari string s, atau default jika s tidak ada
+        pada IdMap. Berbeda dengan self[s], method ini tidak pernah menambahkan
+        id baru (aman dipakai pada proses query).
+        """
+        return self.str_to_id.get(s, default)
+
     def __getitem__(self, key):
         """
         __getitem__(...) adalah special method di Python, yang mengizinkan sebuah
@@ -65,6 +89,246 @@ class IdMap:
             raise TypeError
 
 
+class FrozenIdMap:
+    """
+    Versi read-only dan compact dari IdMap, untuk proses query. Semua string
+    disimpan (dalam UTF-8) bersambungan di satu blob, dengan array offsets
+    untuk mapping id -> string, dan array id yang terurut berdasarkan
+    string-nya untuk mapping string -> id (binary search).
+
+    File di-memory-map dan semua array dibaca langsung dari mapping tersebut
+    (memoryview.cast), sehingga membuka FrozenIdMap tidak memerlukan unpickle
+    dan tidak membuat object Python per string. Object str hanya dibuat
+    ketika sebuah id di-lookup.
+
+    Format file (byte order native):
+        MAGIC (8 bytes), header <n, panjang blob> (2 x uint64),
+        offsets ((n + 1) x 8 bytes), sorted_ids (n x 4 bytes), blob
+
+    IdMap biasa tetap dipakai saat indexing (mutable); FrozenIdMap dibuat
+    dari IdMap tersebut dengan FrozenIdMap.write.
+    """
+
+    MAGIC = b'IDMAP\x01\x00\x00'
+    HEADER = struct.Struct('<QQ')
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        data = memoryview(self.mmap)
+        if data[:len(FrozenIdMap.MAGIC)] != FrozenIdMap.MAGIC:
+            raise ValueError(path + " bukan file FrozenIdMap")
+        pos = len(FrozenIdMap.MAGIC)
+        self.n, blob_length = FrozenIdMap.HEADER.unpack_from(data, pos)
+        pos += FrozenIdMap.HEADER.size
+        self.offsets = data[pos:pos + 8 * (self.n + 1)].cast('Q')
+        pos += 8 * (self.n + 1)
+        self.sorted_ids = data[pos:pos + 4 * self.n].cast('I')
+        pos += 4 * self.n
+        self.blob = data[pos:pos + blob_length]
+
+    @staticmethod
+    def write(id_map, path):
+        """
+        Menyimpan IdMap id_map ke file path dalam format FrozenIdMap. File
+        ditulis ke path.tmp lalu diganti dengan os.replace, sehingga
+        FrozenIdMap yang sedang me-memory-map file lama tetap valid.
+        """
+        encoded = [s.encode('utf-8') for s in id_map.id_to_str]
+        offsets = array('Q', [0])
+        for e in encoded:
+            offsets.append(offsets[-1] + len(e))
+        sorted_ids = array('I', sorted(range(len(encoded)), key=encoded.__getitem__))
+        blob = b"".join(encoded)
+        with open(path + '.tmp', 'wb') as f:
+            f.write(FrozenIdMap.MAGIC)
+            f.write(FrozenIdMap.HEADER.pack(len(encoded), len(blob)))
+            f.write(offsets.tobytes())
+            f.write(sorted_ids.tobytes())
+            f.write(blob)
+        os.replace(path + '.tmp', path)
+
+    def __len__(self):
+        return self.n
+
+    def encoded(self, i):
+        return self.blob[self.offsets[i]:self.offsets[i + 1]].tobytes()
+
+    def get(self, s, default=None):
+        """Mengembalikan integer id dari string s, atau default jika s tidak ada"""
+        key = s.encode('utf-8')
+        lo, hi = 0, self.n
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.encoded(self.sorted_ids[mid]) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.n and self.encoded(self.sorted_ids[lo]) == key:
+            return self.sorted_ids[lo]
+        return default
+
+    def __getitem__(self, key):
+        """
+        Sama seperti IdMap: integer -> string, string -> integer. Karena
+        read-only, string yang tidak ada menghasilkan KeyError.
+        """
+        if type(key) is int:
+            if not 0 <= key < self.n:
+                raise IndexError(key)
+            return self.encoded(key).decode('utf-8')
+        elif type(key) is str:
+            i = self.get(key)
+            if i is None:
+                raise KeyError(key)
+            return i
+        else:
+            raise TypeError
+
+
+class Stats:
+    """
+    Instrumentasi untuk indexing dan query: counter (misalnya bytes yang
+    dibaca, banyaknya seek, dan banyaknya postings yang di-decode) dan total
+    durasi setiap fase. Object yang di-instrumentasi (BSBIIndex,
+    BSBISearcher, InvertedIndexReader, InvertedIndexWriter) menerima
+    parameter stats; jika None (default), satu-satunya biaya di hot path
+    adalah pengecekan "stats is not None".
+
+    Jika callback diberikan, callback(event, data) dipanggil setiap kali
+    sebuah fase selesai (event 'phase', data berisi phase dan seconds) dan
+    setiap kali sebuah query selesai (event 'query', lihat BSBISearcher),
+    misalnya untuk diteruskan ke sistem metrics. Counter tidak dikirim lewat
+    callback; ambil dengan snapshot.
+    """
+
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.timings = {}
+
+    def add(self, name, value=1):
+        """Menambah counter name sebanyak value"""
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def update(self, **values):
+        """Menambah beberapa counter sekaligus, misalnya update(seeks=1, bytes_read=10)"""
+        with self.lock:
+            for name, value in values.items():
+                self.counters[name] = self.counters.get(name, 0) + value
+
+    @contextlib.contextmanager
+    def timer(self, phase):
+        """Context manager yang menambahkan durasinya ke timings[phase]"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            with self.lock:
+                self.timings[phase] = self.timings.get(phase, 0.0) + seconds
+            self.emit('phase', phase=phase, seconds=seconds)
+
+    def emit(self, event, **data):
+        """Memanggil callback (jika ada) dengan event dan data"""
+        if self.callback is not None:
+            self.callback(event, data)
+
+    def snapshot(self):
+        """Salinan semua counter dan timings, sebagai dictionary"""
+        with self.lock:
+            return {'counters': dict(self.counters), 'timings': dict(self.timings)}
+
+    def reset(self):
+        with self.lock:
+            self.counters.clear()
+            self.timings.clear()
+
+
+def timer(stats, phase):
+    """stats.timer(phase), atau context manager kosong jika stats None"""
+    return stats.timer(phase) if stats is not None else contextlib.nullcontext()
+
+
+class StemCache:
+    """
+    Cache hasil stemming per token (surface form -> stem) dengan kebijakan
+    LRU dan ukuran maksimum tertentu. Kata-kata yang frekuensinya tinggi
+    (dan hampir selalu muncul di setiap dokumen maupun query) cukup di-stem
+    sekali saja.
+
+    Isi cache dapat disimpan ke file (save) dan dimuat kembali (load), sehingga
+    proses indexing ulang atau proses query yang baru di-restart tidak perlu
+    melakukan stemming ulang untuk kata yang sudah pernah dilihat.
+
+    Attributes
+    ----------
+    stem_word: Callable[[str], str]
+        Fungsi stemming untuk satu kata, dipanggil ketika terjadi cache miss
+    maxsize: int
+        Banyaknya entry maksimum di memori
+    hits: int
+        Banyaknya lookup yang ditemukan di cache
+    misses: int
+        Banyaknya lookup yang tidak ditemukan di cache (kata di-stem)
+    """
+
+    def __init__(self, stem_word, maxsize=2 ** 18):
+        self.stem_word = stem_word
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.cache)
+
+    def __call__(self, word):
+        """Mengembalikan stem dari word, dari cache jika ada."""
+        with self.lock:
+            stem = self.cache.get(word)
+            if stem is not None:
+                self.hits += 1
+                self.cache.move_to_end(word)
+                return stem
+            self.misses += 1
+
+        stem = self.stem_word(word)
+        with self.lock:
+            self.cache[word] = stem
+            if len(self.cache) > self.maxsize:
+                self.cache.popitem(last=False)
+        return stem
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def save(self, path):
+        """Menyimpan isi cache (urut dari yang paling lama tidak dipakai) via pickle"""
+        with self.lock:
+            items = list(self.cache.items())
+        with open(path, 'wb') as f:
+            pickle.dump(items, f)
+
+    def load(self, path):
+        """Memuat isi cache dari file hasil save(...), jika file tersebut ada"""
+        if not os.path.exists(path):
+            return
+        with open(path, 'rb') as f:
+            items = pickle.load(f)
+        with self.lock:
+            for word, stem in items[-self.maxsize:]:
+                self.cache[word] = stem
+                self.cache.move_to_end(word)
+            while len(self.cache) > self.maxsize:
+                self.cache.popitem(last=False)
+
+
 def sorted_intersect(list1, list2):
     """
     Intersects two (ascending) sorted lists and returns the sorted result
@@ -100,6 +364,450 @@ def sorted_intersect(list1, list2):
     return out
 
 
+class ResultCache:
+    """
+    Cache hasil query dengan kebijakan LRU (maksimum maxsize entry) dan,
+    opsional, TTL (entry kadaluarsa setelah ttl detik).
+
+    Setiap operasi menyertakan generation dari index yang dipakai untuk
+    menjawab query. Jika generation berubah, seluruh isi cache dibuang,
+    sehingga hasil dari index yang lama tidak pernah dikembalikan.
+
+    Attributes
+    ----------
+    hits, misses: int
+        Banyaknya lookup yang ditemukan / tidak ditemukan di cache
+    invalidations: int
+        Banyaknya isi cache dibuang karena generation index berubah
+    """
+
+    def __init__(self, maxsize=1024, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.generation = None
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def check_generation(self, generation):
+        if generation != self.generation:
+            if self.generation is not None:
+                self.invalidations += 1
+            self.entries.clear()
+            self.generation = generation
+
+    def get(self, key, generation):
+        """Kembalikan value untuk key, atau None jika tidak ada (atau sudah kadaluarsa)"""
+        with self.lock:
+            self.check_generation(generation)
+            entry = self.entries.get(key)
+            if entry is not None and self.ttl is not None and entry[0] < time.monotonic():
+                del self.entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key, value, generation):
+        """Menyimpan value untuk key; diabaikan jika generation sudah usang"""
+        with self.lock:
+            if self.generation is not None and generation < self.generation:
+                return
+            self.check_generation(generation)
+            expires = time.monotonic() + self.ttl if self.ttl is not None else None
+            self.entries[key] = (expires, value)
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self):
+        """Statistik cache dalam bentuk dictionary"""
+        return {'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hit_rate,
+                'entries': len(self.entries), 'invalidations': self.invalidations}
+
+
+class TombstoneBitmap:
+    """
+    Himpunan docID yang sudah dihapus, sebagai bitmap (1 bit per docID):
+    bit ke-(docID % 8) dari byte ke-(docID // 8). Bitmap disimpan apa adanya
+    di file, sehingga menandai sebuah dokumen sebagai terhapus (mark) cukup
+    menulis ulang satu byte.
+    """
+
+    def __init__(self, bits=b""):
+        self.bits = bytes(bits)
+        self.count = sum(bin(byte).count("1") for byte in self.bits if byte)
+
+    def __contains__(self, doc_id):
+        byte = doc_id >> 3
+        return byte < len(self.bits) and (self.bits[byte] >> (doc_id & 7)) & 1 == 1
+
+    def __len__(self):
+        return self.count
+
+    def __bool__(self):
+        return self.count > 0
+
+    def filter(self, doc_ids):
+        """Kembalikan doc_ids (terurut) tanpa docID yang sudah dihapus"""
+        if self.count == 0:
+            return doc_ids
+        return [doc_id for doc_id in doc_ids if doc_id not in self]
+
+    @staticmethod
+    def load(path):
+        """Memuat bitmap dari file path (bitmap kosong jika file tidak ada)"""
+        try:
+            with open(path, 'rb') as f:
+                return TombstoneBitmap(f.read())
+        except FileNotFoundError:
+            return TombstoneBitmap()
+
+    @staticmethod
+    def mark(path, doc_ids):
+        """
+        Menandai doc_ids sebagai terhapus langsung di file path: O(1) per
+        docID (satu read dan satu write satu byte).
+
+        Returns
+        -------
+        int
+            Banyaknya docID yang sebelumnya belum terhapus
+        """
+        marked = 0
+        with open(path, 'r+b' if os.path.exists(path) else 'w+b') as f:
+            for doc_id in doc_ids:
+                f.seek(doc_id >> 3)
+                byte = f.read(1)
+                byte = byte[0] if len(byte) > 0 else 0
+                bit = 1 << (doc_id & 7)
+                if byte & bit == 0:
+                    f.seek(doc_id >> 3)
+                    f.write(bytes([byte | bit]))
+                    marked += 1
+        return marked
+
+
+def binary_search_intersect(short_list, long_list):
+    """
+    Intersection dengan binary search: setiap elemen short_list dicari di
+    long_list (batas bawah pencarian terus maju). Cocok untuk rasio panjang
+    menengah, O(|short_list| * log |long_list|).
+    """
+    out = []
+    lo = 0
+    n = len(long_list)
+    for x in short_list:
+        lo = bisect_left(long_list, x, lo)
+        if lo == n:
+            break
+        if long_list[lo] == x:
+            out.append(x)
+            lo += 1
+    return out
+
+
+def galloping_intersect(short_list, long_list):
+    """
+    Intersection dengan galloping (exponential) search: dari posisi terakhir
+    di long_list, lompat 1, 2, 4, ... elemen sampai melewati elemen yang
+    dicari, lalu binary search di rentang terakhir. Cocok untuk rasio panjang
+    yang besar, O(|short_list| * log(|long_list| / |short_list|)).
+    """
+    out = []
+    lo = 0
+    n = len(long_list)
+    for x in short_list:
+        bound = 1
+        while lo + bound < n and long_list[lo + bound] < x:
+            bound *= 2
+        lo = bisect_left(long_list, x, lo + bound // 2, min(lo + bound + 1, n))
+        if lo == n:
+            break
+        if long_list[lo] == x:
+            out.append(x)
+            lo += 1
+    return out
+
+
+def vectorized_intersect(short_list, long_list):
+    """
+    Intersection dengan NumPy: posisi setiap elemen short_list di long_list
+    dicari sekaligus dengan np.searchsorted.
+    """
+    short_array = np.asarray(short_list, dtype=np.int64)
+    long_array = np.asarray(long_list, dtype=np.int64)
+    pos = np.minimum(np.searchsorted(long_array, short_array), len(long_array) - 1)
+    return short_array[long_array[pos] == short_array].tolist()
+
+
+# Strategi intersection dipilih berdasarkan rasio panjang kedua list (lihat
+# adaptive_intersect)
+BINARY_SEARCH_RATIO = 4
+GALLOPING_RATIO = 32
+VECTORIZE_MIN_LENGTH = 2048
+
+
+def adaptive_intersect(short_list, long_list):
+    """
+    Intersection dua sorted lists (short_list tidak lebih panjang dari
+    long_list), dengan strategi yang dipilih berdasarkan rasio panjangnya:
+    galloping untuk rasio besar, NumPy untuk list yang sama-sama panjang,
+    binary search untuk rasio menengah, dan linear merge (sorted_intersect)
+    untuk list dengan panjang yang mirip.
+    """
+    if len(short_list) == 0:
+        return []
+    ratio = len(long_list) / len(short_list)
+    if ratio >= GALLOPING_RATIO:
+        return galloping_intersect(short_list, long_list)
+    if len(short_list) >= VECTORIZE_MIN_LENGTH:
+        return vectorized_intersect(short_list, long_list)
+    if ratio >= BINARY_SEARCH_RATIO:
+        return binary_search_intersect(short_list, long_list)
+    return sorted_intersect(short_list, long_list)
+
+
+def multi_intersect(postings_lists):
+    """
+    Intersection semua postings lists sekaligus. Lists diurutkan berdasarkan
+    panjangnya, lalu hasil intersection sementara (yang tidak pernah lebih
+    panjang dari list terpendek) di-intersect dengan list berikutnya memakai
+    adaptive_intersect.
+
+    Parameters
+    ----------
+    postings_lists: List[List[int]]
+        sorted lists yang akan di-intersect
+
+    Returns
+    -------
+    List[int]
+        intersection yang sudah terurut
+    """
+    if len(postings_lists) == 0:
+        return []
+    postings_lists = sorted(postings_lists, key=len)
+    result = list(postings_lists[0])
+    for postings_list in postings_lists[1:]:
+        if len(result) == 0:
+            break
+        result = adaptive_intersect(result, postings_list)
+    return result
+
+
+class PostingsListCursor:
+    """
+    Cursor di atas postings list yang sudah di-decode seluruhnya, dengan API
+    yang sama dengan compression.BlockPostingsCursor.
+
+    Attributes
+    ----------
+    doc: int
+        docID pada posisi cursor saat ini, None jika cursor sudah habis
+    """
+
+    def __init__(self, postings_list):
+        self.postings_list = postings_list
+        self.pos = 0
+        self.doc = postings_list[0] if len(postings_list) > 0 else None
+
+    def next(self):
+        """Maju ke docID berikutnya, dan kembalikan docID tersebut (None jika habis)"""
+        return self.seek(self.pos + 1)
+
+    def next_geq(self, doc_id):
+        """Maju ke docID pertama yang >= doc_id, dan kembalikan docID tersebut (None jika habis)"""
+        if self.doc is None or self.doc >= doc_id:
+            return self.doc
+        return self.seek(bisect_left(self.postings_list, doc_id, self.pos))
+
+    def seek(self, pos):
+        self.pos = pos
+        self.doc = self.postings_list[pos] if pos < len(self.postings_list) else None
+        return self.doc
+
+    @property
+    def rank(self):
+        """Indeks posting saat ini di postings list"""
+        return self.pos
+
+
+class ChainCursor:
+    """
+    Cursor di atas gabungan beberapa cursor yang rentang docID-nya tidak
+    saling beririsan dan terurut (misalnya postings list sebuah term dari
+    segment-segment index, lihat index.SegmentedIndexReader). rank hanya
+    tersedia jika lengths (panjang postings list setiap cursor) diberikan.
+    """
+
+    def __init__(self, cursors, lengths=None):
+        self.cursors = cursors
+        self.offsets = list(accumulate(lengths, initial=0)) if lengths is not None else None
+        self.current = 0
+        self.doc = None
+        self.advance()
+
+    def advance(self):
+        """Pindah ke cursor berikutnya selama cursor saat ini sudah habis"""
+        while self.current < len(self.cursors):
+            self.doc = self.cursors[self.current].doc
+            if self.doc is not None:
+                return self.doc
+            self.current += 1
+        self.doc = None
+        return None
+
+    def next(self):
+        """Maju ke docID berikutnya, dan kembalikan docID tersebut (None jika habis)"""
+        if self.doc is None:
+            return None
+        self.cursors[self.current].next()
+        return self.advance()
+
+    def next_geq(self, doc_id):
+        """Maju ke docID pertama yang >= doc_id, dan kembalikan docID tersebut (None jika habis)"""
+        if self.doc is None or self.doc >= doc_id:
+            return self.doc
+        while self.current < len(self.cursors):
+            if self.cursors[self.current].next_geq(doc_id) is not None:
+                break
+            self.current += 1
+        return self.advance()
+
+    @property
+    def rank(self):
+        """Indeks posting saat ini di gabungan postings list"""
+        return self.offsets[self.current] + self.cursors[self.current].rank
+
+
+def cursor_intersect(cursors):
+    """
+    Intersection banyak postings list sekaligus dengan cursor (next_geq).
+    Cursor pertama sebaiknya adalah postings list terpendek; biaya intersection
+    sebanding dengan panjang postings list tersebut, bukan postings list yang
+    lain, karena cursor lain hanya dimajukan ke kandidat berikutnya.
+
+    Parameters
+    ----------
+    cursors: List[Cursor]
+        Cursor (lihat PostingsListCursor) untuk setiap postings list
+
+    Returns
+    -------
+    List[int]
+        intersection yang sudah terurut; EMPTY LIST [] jika cursors kosong
+    """
+    if len(cursors) == 0:
+        return []
+    lead, others = cursors[0], cursors[1:]
+    out = []
+    doc = lead.doc
+    while doc is not None:
+        for cursor in others:
+            other_doc = cursor.next_geq(doc)
+            if other_doc is None:
+                return out
+            if other_doc > doc:
+                doc = lead.next_geq(other_doc)
+                break
+        else:
+            out.append(doc)
+            doc = lead.next()
+    return out
+
+
+def maxscore_topk(cursors, upper_bounds, scorers, k, deleted=None):
+    """
+    Top-k retrieval (disjunctive, document-at-a-time) dengan dynamic pruning
+    MaxScore. Cursor diurutkan berdasarkan upper bound skornya; cursor dengan
+    total upper bound tidak lebih besar dari threshold (skor terkecil di top-k
+    saat ini) adalah cursor "non-essential": dokumen yang hanya muncul di
+    cursor-cursor tersebut tidak mungkin masuk top-k, sehingga kandidat hanya
+    diambil dari cursor essential, dan cursor non-essential hanya dimajukan
+    (next_geq) ke kandidat yang masih mungkin masuk top-k.
+
+    Parameters
+    ----------
+    cursors: List[Cursor]
+        Cursor (lihat PostingsListCursor) untuk setiap term
+    upper_bounds: List[float]
+        Upper bound skor yang bisa diberikan setiap term ke sebuah dokumen
+    scorers: List[Callable[[Cursor], float]]
+        Fungsi yang menghitung skor dari sebuah term untuk dokumen pada posisi
+        cursor-nya saat ini
+    k: int
+        Banyaknya dokumen yang dikembalikan
+    deleted: TombstoneBitmap
+        docID-docID yang dilewati tanpa di-score (opsional)
+
+    Returns
+    -------
+    List[Tuple[float, int]]
+        Pasangan <skor, docID> dari k dokumen dengan skor terbesar, terurut
+        dari skor terbesar (dokumen dengan skor sama terurut berdasarkan docID)
+    """
+    if k <= 0:
+        return []
+    order = sorted(range(len(cursors)), key=lambda i: upper_bounds[i])
+    cursors = [cursors[i] for i in order]
+    scorers = [scorers[i] for i in order]
+    # cumulative[i]: total upper bound dari cursors[0..i]
+    cumulative = []
+    total = 0.0
+    for i in order:
+        total += upper_bounds[i]
+        cumulative.append(total)
+
+    top = []  # min-heap <skor, -docID>
+    threshold = -1.0
+    essential = 0
+    while True:
+        doc = min((c.doc for c in cursors[essential:] if c.doc is not None), default=None)
+        if doc is None:
+            break
+        if deleted and doc in deleted:
+            for cursor in cursors[essential:]:
+                if cursor.doc == doc:
+                    cursor.next()
+            continue
+        score = 0.0
+        for cursor, scorer in zip(cursors[essential:], scorers[essential:]):
+            if cursor.doc == doc:
+                score += scorer(cursor)
+                cursor.next()
+        for i in range(essential - 1, -1, -1):
+            if score + cumulative[i] <= threshold:
+                break
+            if cursors[i].next_geq(doc) == doc:
+                score += scorers[i](cursors[i])
+
+        if len(top) < k:
+            heapq.heappush(top, (score, -doc))
+        elif score > threshold:
+            heapq.heapreplace(top, (score, -doc))
+        else:
+            continue
+        if len(top) == k:
+            threshold = top[0][0]
+            while essential < len(cursors) and cumulative[essential] <= threshold:
+                essential += 1
+    return [(score, -neg_doc) for score, neg_doc in sorted(top, reverse=True)]
+
+
 if __name__ == '__main__':
 
     doc = ["halo", "semua", "selamat", "pagi", "semua"]
@@ -117,8 +825,118 @@ if __name__ == '__main__':
     doc_id_map = IdMap()
     assert [doc_id_map[docname]
             for docname in docs] == [0, 1, 2], "docs_id salah"
+    assert doc_id_map.get("/collection/2/data100.txt") is None, "get salah"
+    assert len(doc_id_map) == 3, "get tidak boleh menambahkan id baru"
+
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        FrozenIdMap.write(term_id_map, os.path.join(tmp_dir, 'terms.idmap'))
+        frozen = FrozenIdMap(os.path.join(tmp_dir, 'terms.idmap'))
+        assert len(frozen) == 4, "FrozenIdMap salah"
+        assert [frozen[i] for i in range(4)] == ["halo", "semua", "selamat", "pagi"], "FrozenIdMap salah"
+        assert [frozen[t] for t in ["halo", "semua", "selamat", "pagi"]] == [0, 1, 2, 3], "FrozenIdMap salah"
+        assert frozen.get("malam") is None and frozen.get("") is None, "FrozenIdMap salah"
 
     assert sorted_intersect([1, 2, 3], [2, 3]) == [
         2, 3], "sorted_intersect salah"
     assert sorted_intersect([4, 5], [1, 4, 7]) == [4], "sorted_intersect salah"
     assert sorted_intersect([], []) == [], "sorted_intersect salah"
+
+    stem_cache = StemCache(str.upper, maxsize=2)
+    assert [stem_cache(w) for w in ["a", "b", "a", "c", "b"]] == [
+        "A", "B", "A", "C", "B"], "stem_cache salah"
+    assert (stem_cache.hits, stem_cache.misses) == (1, 4), "stem_cache salah"
+    assert list(stem_cache.cache) == ["c", "b"], "eviction LRU salah"
+
+    result_cache = ResultCache(maxsize=2)
+    result_cache.put((1, 2), ["a"], generation=1)
+    result_cache.put((3,), ["b"], generation=1)
+    assert result_cache.get((1, 2), generation=1) == ["a"], "result_cache salah"
+    result_cache.put((4,), ["c"], generation=1)
+    assert result_cache.get((3,), generation=1) is None, "eviction LRU salah"
+    assert result_cache.get((1, 2), generation=2) is None, "invalidasi generation salah"
+    result_cache.put((1, 2), ["a"], generation=1)
+    assert len(result_cache) == 0, "hasil dari generation lama tidak boleh disimpan"
+
+    assert cursor_intersect([PostingsListCursor([2, 5, 9]), PostingsListCursor(list(range(0, 100, 3))),
+                             PostingsListCursor([1, 9, 40])]) == [9], "cursor_intersect salah"
+    assert cursor_intersect([PostingsListCursor([]), PostingsListCursor([1])]) == [], "cursor_intersect salah"
+    assert cursor_intersect([]) == [], "cursor_intersect salah"
+    chain = ChainCursor([PostingsListCursor([1, 4]), PostingsListCursor([]), PostingsListCursor([7, 9, 12])])
+    assert (chain.doc, chain.next(), chain.next_geq(8), chain.next_geq(8), chain.next(), chain.next()) == (
+        1, 4, 9, 9, 12, None), "ChainCursor salah"
+    assert cursor_intersect([ChainCursor([PostingsListCursor([2, 5]), PostingsListCursor([9, 11])]),
+                             PostingsListCursor([5, 6, 11])]) == [5, 11], "ChainCursor salah"
+
+    import random
+    import time
+    from functools import reduce
+    random.seed(0)
+
+    # maxscore_topk harus sama dengan menghitung skor semua dokumen
+    term_postings = [sorted(random.sample(range(2000), n)) for n in (15, 300, 1200)]
+    weights = [{doc: random.randint(1, 5) * w for doc in postings}
+               for postings, w in zip(term_postings, (3.0, 1.5, 0.5))]
+    exhaustive = {}
+    for weight in weights:
+        for doc, score in weight.items():
+            exhaustive[doc] = exhaustive.get(doc, 0.0) + score
+    for k in (1, 10, 100):
+        topk = maxscore_topk([PostingsListCursor(p) for p in term_postings],
+                             [max(w.values()) for w in weights],
+                             [lambda c, w=w: w[c.doc] for w in weights], k)
+        expected = sorted(((score, doc) for doc, score in exhaustive.items()),
+                          key=lambda x: (-x[0], x[1]))[:k]
+        assert topk == expected, "maxscore_topk salah"
+
+    events = []
+    stats = Stats(callback=lambda event, data: events.append((event, data['phase'])))
+    stats.add('seeks')
+    stats.add('bytes_read', 10)
+    stats.update(bytes_read=5)
+    with timer(stats, 'merge'):
+        pass
+    with timer(None, 'merge'):
+        pass
+    snapshot = stats.snapshot()
+    assert snapshot['counters'] == {'seeks': 1, 'bytes_read': 15} and list(snapshot['timings']) == ['merge'], \
+        "Stats salah"
+    assert events == [('phase', 'merge')], "callback Stats salah"
+    stats.reset()
+    assert stats.snapshot() == {'counters': {}, 'timings': {}}, "Stats.reset salah"
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'deleted')
+        assert TombstoneBitmap.mark(path, [3, 17, 3]) == 2 and TombstoneBitmap.mark(path, [17, 8]) == 1, \
+            "TombstoneBitmap.mark salah"
+        tombstones = TombstoneBitmap.load(path)
+        assert len(tombstones) == 3 and 17 in tombstones and 16 not in tombstones and 1000 not in tombstones, \
+            "TombstoneBitmap salah"
+        assert tombstones.filter(list(range(20))) == [d for d in range(20) if d not in (3, 8, 17)], \
+            "TombstoneBitmap.filter salah"
+    deleted_docs = TombstoneBitmap(bytes([0, 0, 0, 0, 255]))
+    topk = maxscore_topk([PostingsListCursor(p) for p in term_postings], [max(w.values()) for w in weights],
+                         [lambda c, w=w: w[c.doc] for w in weights], 10, deleted=deleted_docs)
+    assert topk == sorted(((score, doc) for doc, score in exhaustive.items() if doc not in deleted_docs),
+                          key=lambda x: (-x[0], x[1]))[:10], "maxscore_topk dengan deleted salah"
+    for short_length, long_length in [(0, 10), (5, 10), (10, 100), (20, 10000), (3000, 5000)]:
+        short_list = sorted(random.sample(range(20000), short_length))
+        long_list = sorted(random.sample(range(20000), long_length))
+        expected = sorted_intersect(short_list, long_list)
+        for intersect in [binary_search_intersect, galloping_intersect, adaptive_intersect]:
+            assert intersect(short_list, long_list) == expected, intersect.__name__ + " salah"
+        if short_length > 0:
+            assert vectorized_intersect(short_list, long_list) == expected, "vectorized_intersect salah"
+    assert multi_intersect([[1, 2, 3, 9], [2, 3, 9], [0, 3, 9, 12]]) == [3, 9], "multi_intersect salah"
+    assert multi_intersect([]) == [], "multi_intersect salah"
+
+    # query dengan panjang postings lists yang sangat timpang
+    skewed = [sorted(random.sample(range(10 ** 6), n)) for n in (20, 200000, 500000)]
+    start = time.perf_counter()
+    expected = reduce(sorted_intersect, skewed)
+    middle = time.perf_counter()
+    result = multi_intersect(skewed)
+    end = time.perf_counter()
+    assert result == expected, "multi_intersect salah"
+    print(f"skewed intersection: reduce(sorted_intersect) {(middle - start) * 1000:.2f} ms, "
+          f"multi_intersect {(end - middle) * 1000:.2f} ms")